@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gemini -> Lokal Öğrenci Model Distillation
+Etiketsiz (scrape edilmiş) yorumlar few-shot Gemini yoluyla (predict_with_few_shot)
+etiketlenir, etiketler kayıt dosyasına yazılır ve orijinal veriyle birlikte küçük bir
+öğrenci model eğitilir:
+- linear: TF-IDF + kalibre logistic regression ("linear" backend'i, LINEAR_MODEL_PATH)
+- transformer: train_turkish_sentiment_model.py ile fine-tune ("local" backend'i,
+  --export-onnx ile "onnx" backend'i)
+
+Öğretmen etiketlerinin bir kısmı eğitime alınmaz; öğrencinin öğretmenle uyumu bu
+ayrılmış set üzerinde raporlanır. Etiketli test setlerindeki (load_test_sets) yorumlar
+ne öğretmene gönderilir ne de eğitime alınır; öğrenci bu setlerde raporlanır. Kayıt dosyasındaki yorumlar tekrar Gemini'ye
+gönderilmez (yarıda kalan etiketleme kaldığı yerden devam eder).
+
+Kullanım:
+    python ML/distill_student_model.py --comments scraped/instagram_comments.csv --from-db
+    python ML/distill_student_model.py --student transformer --export-onnx
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import cohen_kappa_score, confusion_matrix
+from sklearn.model_selection import train_test_split
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "ML"))
+
+from config import DATA_DIR, BASE_DIR
+from backend.few_shot.embedding_cache import normalize_text
+from backend.classifiers.linear_classifier import fit_linear_model, save_linear_model
+from train_linear_model import load_training_data, load_test_sets, evaluate
+
+
+def load_unlabeled(comment_files, from_db=False):
+    """CSV dosyalarından (comment veya text sütunu) ve/veya kayıtlı analizlerden yorumlar"""
+    texts = []
+    for file_path in comment_files:
+        df = pd.read_csv(file_path, on_bad_lines="skip", engine="python")
+        column = "comment" if "comment" in df.columns else "text"
+        texts.extend(df[column].dropna().astype(str).tolist())
+        print(f"✅ {file_path}: {len(df)} yorum")
+
+    if from_db:
+        from database.database import SessionLocal
+        from database import Analysis
+        db = SessionLocal()
+        try:
+            count = 0
+            for (comments,) in db.query(Analysis.comments).yield_per(100):
+                for comment in comments or []:
+                    if comment.get("text"):
+                        texts.append(str(comment["text"]))
+                        count += 1
+            print(f"✅ Veritabanı: {count} scrape edilmiş yorum")
+        finally:
+            db.close()
+
+    # Normalize edilmiş metne göre tekrarları at
+    unique = {}
+    for text in texts:
+        text = text.strip()
+        if text:
+            unique.setdefault(normalize_text(text), text)
+    return list(unique.values())
+
+
+def load_recorded_labels(labels_path):
+    """Kayıt dosyası: text,label,confidence (normalize metin -> satır)"""
+    if not Path(labels_path).exists():
+        return {}
+    df = pd.read_csv(labels_path, on_bad_lines="skip", engine="python").dropna(subset=["text", "label"])
+    return {
+        normalize_text(str(row.text)): {"text": str(row.text), "label": int(row.label),
+                                        "confidence": float(getattr(row, "confidence", 1.0))}
+        for row in df.itertuples()
+    }
+
+
+def label_with_teacher(texts, labels_path, concurrency=4):
+    """
+    Kayıtta olmayan yorumları Gemini ile etiketle; her etiket geldiği anda dosyaya eklenir.
+    Sadece Gemini'nin kendisinin cevapladığı tahminler tutulur (fallback'ler öğretmen değil).
+    """
+    recorded = load_recorded_labels(labels_path)
+    pending = [text for text in texts if normalize_text(text) not in recorded]
+    print(f"📊 Öğretmen etiketleri: {len(recorded)} kayıtlı, {len(pending)} yeni yorum")
+    if not pending:
+        return recorded
+
+    from backend.few_shot.fewshot_model import few_shot_model, LLM_MESSAGE
+    if few_shot_model.model is None:
+        print("⚠️ GOOGLE_API_KEY yok: sadece kayıtlı öğretmen etiketleri kullanılacak")
+        return recorded
+    if few_shot_model.model.name != "gemini":
+        # Fake istemcinin komşu oyları öğretmen etiketi değildir (dosyaya yazılırsa kalıcı olur)
+        print(f"⚠️ LLM_CLIENT={few_shot_model.model.name}: öğretmen sadece gemini olabilir, kayıtlı etiketler kullanılacak")
+        return recorded
+
+    labels_path = Path(labels_path)
+    labels_path.parent.mkdir(parents=True, exist_ok=True)
+    write_header = not labels_path.exists()
+    lock = threading.Lock()
+    started = time.perf_counter()
+    rejected = 0
+
+    with open(labels_path, "a", encoding="utf-8", newline="") as output, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        if write_header:
+            output.write("text,label,confidence\n")
+        futures = {executor.submit(few_shot_model.predict_with_few_shot, text): text for text in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            text = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ Etiketleme hatası: {e}")
+                result = {}
+            if result.get("message") != LLM_MESSAGE:
+                rejected += 1
+                continue
+            row = {"text": text, "label": int(result["category"]), "confidence": float(result["confidence"])}
+            with lock:
+                pd.DataFrame([row]).to_csv(output, header=False, index=False)
+                output.flush()
+                recorded[normalize_text(text)] = row
+            if done % 50 == 0:
+                print(f"   {done}/{len(pending)} ({done / (time.perf_counter() - started):.1f} yorum/s)")
+
+    print(f"✅ Gemini etiketlemesi bitti: {len(pending) - rejected} yeni etiket, {rejected} reddedildi")
+    return recorded
+
+
+def train_linear_student(base_df, distilled_texts, distilled_labels, output_path, C):
+    """Orijinal + augmented + öğretmen etiketli veride TF-IDF lineer öğrenci"""
+    texts = base_df["text"].tolist() + list(distilled_texts)
+    labels = np.concatenate([base_df["label"].to_numpy(), distilled_labels])
+    # Her öğretmen etiketli yorum kendi grubudur
+    groups = np.concatenate([
+        base_df["group"].to_numpy(),
+        base_df["group"].max() + 1 + np.arange(len(distilled_texts))
+    ])
+    vectorizer, model = fit_linear_model(texts, labels, groups, C=C)
+    save_linear_model(output_path, vectorizer, model, metadata={
+        "train_samples": len(texts), "distilled_samples": len(distilled_texts)
+    })
+    print(f"✅ Lineer öğrenci kaydedildi: {output_path}")
+    return lambda batch: model.predict_proba(vectorizer.transform(batch))
+
+
+def train_transformer_student(base_df, distilled_texts, distilled_labels, output_dir, model_name,
+                              max_length, cache_dir, export_onnx):
+    """train_turkish_sentiment_model.py altyapısıyla transformer öğrenci"""
+    import train_turkish_sentiment_model as trainer_module
+    from transformers import AutoTokenizer
+    from backend.classifiers.transformer_classifier import TransformerClassifier
+
+    texts = np.array(base_df["text"].tolist() + list(distilled_texts), dtype=object)
+    labels = np.concatenate([base_df["label"].to_numpy(), distilled_labels])
+    train_texts, val_texts, train_labels, val_labels = train_test_split(
+        texts, labels, test_size=0.1, random_state=42, stratify=labels
+    )
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    train_dataset = trainer_module.TurkishSentimentDataset(train_texts, train_labels, tokenizer, max_length, cache_dir)
+    val_dataset = trainer_module.TurkishSentimentDataset(val_texts, val_labels, tokenizer, max_length, cache_dir)
+    trainer_module.train_model(model_name, train_dataset, val_dataset, num_labels=5, output_dir=str(output_dir))
+    print(f"✅ Transformer öğrenci kaydedildi: {output_dir} (LOCAL_MODEL_PATH)")
+
+    if export_onnx:
+        from export_onnx_model import export_onnx as export_to_onnx, quantize
+        onnx_path = export_to_onnx(str(output_dir), Path(f"{output_dir}_onnx"))
+        print(f"✅ ONNX öğrenci: {quantize(onnx_path)} (ONNX_MODEL_PATH)")
+
+    student = TransformerClassifier(str(output_dir))
+    return student.predict_proba
+
+
+def agreement_report(teacher_labels, student_labels):
+    """Öğrencinin ayrılmış öğretmen etiketleriyle uyumu"""
+    matrix = confusion_matrix(teacher_labels, student_labels, labels=list(range(5)))
+    per_class = {
+        str(label): round(float(matrix[label, label] / matrix[label].sum()), 4)
+        for label in range(5) if matrix[label].sum()
+    }
+    return {
+        "samples": int(len(teacher_labels)),
+        "agreement": round(float((teacher_labels == student_labels).mean()), 4),
+        "cohen_kappa": round(float(cohen_kappa_score(teacher_labels, student_labels, labels=list(range(5)))), 4),
+        "per_class_agreement": per_class,
+        "confusion_matrix_teacher_x_student": matrix.tolist(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gemini etiketlerinden lokal öğrenci model eğitimi")
+    parser.add_argument("--comments", nargs="*", default=[], help="Etiketsiz yorum CSV'leri (comment veya text sütunu)")
+    parser.add_argument("--from-db", action="store_true", help="Kayıtlı analizlerdeki scrape edilmiş yorumları da kullan")
+    parser.add_argument("--labels-file", default=str(DATA_DIR / "teacher_labels.csv"),
+                        help="Öğretmen etiket kaydı (text,label,confidence); yeni etiketler eklenir")
+    parser.add_argument("--concurrency", type=int, default=4, help="Eşzamanlı Gemini isteği")
+    parser.add_argument("--min-confidence", type=float, default=0.0, help="Bu confidence'ın altındaki öğretmen etiketleri atılır")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Uyum raporu için ayrılan öğretmen etiketi oranı")
+    parser.add_argument("--student", choices=["linear", "transformer"], default="linear")
+    parser.add_argument("--output", default=None, help="Öğrenci model yolu")
+    parser.add_argument("--C", type=float, default=10.0, help="Lineer öğrenci regularization")
+    parser.add_argument("--base-model", default="dbmdz/distilbert-base-turkish-cased", help="Transformer öğrenci başlangıç modeli")
+    parser.add_argument("--max-length", type=int, default=128)
+    parser.add_argument("--cache-dir", default=str(BASE_DIR / "models" / "tokenized_cache"))
+    parser.add_argument("--export-onnx", action="store_true", help="Transformer öğrenciyi ONNX int8'e aktar")
+    args = parser.parse_args()
+
+    # 1. Öğretmen etiketleri
+    # Test yorumları öğretmen etiketiyle eğitime sızarsa rapor iyimser olur
+    test_sets = load_test_sets()
+    test_keys = {normalize_text(text) for test_texts, _ in test_sets.values() for text in test_texts}
+    texts = load_unlabeled(args.comments, from_db=args.from_db)
+    excluded = sum(1 for text in texts if normalize_text(text) in test_keys)
+    texts = [text for text in texts if normalize_text(text) not in test_keys]
+    print(f"📊 Etiketsiz benzersiz yorum: {len(texts)} ({excluded} test yorumu çıkarıldı)")
+    recorded = label_with_teacher(texts, args.labels_file, concurrency=args.concurrency)
+
+    base_df = load_training_data(DATA_DIR / "dataset.csv", DATA_DIR / "nlpaug_turkish_augmented.csv")
+    known = {normalize_text(text) for text in base_df["text"]} | test_keys
+    teacher = pd.DataFrame([
+        row for key, row in recorded.items()
+        if key not in known and row["confidence"] >= args.min_confidence
+    ])
+    if teacher.empty:
+        print("❌ Öğretmen etiketli yorum yok (--comments/--from-db ve GOOGLE_API_KEY veya --labels-file gerekli)")
+        sys.exit(1)
+    print(f"📊 Öğretmen etiketli yorum: {len(teacher)}")
+    print(teacher["label"].value_counts().sort_index().to_string())
+
+    # 2. Ayrılmış set: öğrenci bu yorumları görmez
+    stratify = teacher["label"] if teacher["label"].value_counts().min() >= 2 else None
+    train_part, holdout_part = train_test_split(teacher, test_size=args.holdout, random_state=42, stratify=stratify)
+
+    # 3. Öğrenci eğitimi
+    started = time.perf_counter()
+    if args.student == "linear":
+        output = args.output or str(BASE_DIR / "models" / "linear_distilled.joblib")
+        predict_proba = train_linear_student(
+            base_df, train_part["text"], train_part["label"].to_numpy(), output, args.C
+        )
+        report_path = Path(output).with_suffix(".distill_report.json")
+    else:
+        output = args.output or str(BASE_DIR / "models" / "turkish_sentiment_distilled")
+        predict_proba = train_transformer_student(
+            base_df, train_part["text"], train_part["label"].to_numpy(), output, args.base_model,
+            args.max_length, args.cache_dir, args.export_onnx
+        )
+        report_path = Path(output) / "distill_report.json"
+    train_time = time.perf_counter() - started
+
+    # 4. Öğretmenle uyum + etiketli test setleri
+    student_labels = predict_proba(holdout_part["text"].tolist()).argmax(axis=1)
+    report = {
+        "student": args.student,
+        "output": output,
+        "teacher_labels": len(teacher),
+        "distilled_train_samples": len(train_part),
+        "base_train_samples": len(base_df),
+        "train_time_s": round(train_time, 1),
+        "agreement_vs_teacher": agreement_report(holdout_part["label"].to_numpy(), student_labels),
+        "test_sets": {
+            name: evaluate(labels, predict_proba(test_texts).argmax(axis=1))
+            for name, (test_texts, labels) in test_sets.items()
+        },
+    }
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    print(f"\n{'='*60}")
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"✅ Rapor kaydedildi: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fine-tune edilmiş modeli ONNX'e aktar ve dinamik int8 quantization uygula
+train_turkish_sentiment_model.py çıktısı (trainer.save_model()) -> model.onnx + model.quant.onnx
+
+Dışa aktarılan modeller test seti üzerinde PyTorch modeliyle karşılaştırılır;
+int8 modelin doğruluk kaybı --max-accuracy-drop'u aşarsa script hata ile çıkar.
+
+Kullanım:
+    python ML/export_onnx_model.py --model-dir models/turkish_sentiment --output-dir models/turkish_sentiment_onnx
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from onnxruntime.quantization import quantize_dynamic, QuantType
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from backend.classifiers.transformer_classifier import TransformerClassifier
+from backend.classifiers.onnx_classifier import OnnxClassifier
+
+
+class LogitsOnly(torch.nn.Module):
+    """ONNX grafiğinin tek çıktısı logits olsun (SequenceClassifierOutput yerine)"""
+
+    def __init__(self, model, input_names):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *inputs):
+        return self.model(**dict(zip(self.input_names, inputs))).logits
+
+
+def export_onnx(model_dir, output_dir, opset=14):
+    """PyTorch checkpoint'ini dinamik batch/sequence eksenleriyle ONNX'e aktar"""
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+
+    sample = tokenizer(["örnek bir yorum", "ikinci örnek"], padding=True, return_tensors="pt")
+    input_names = [name for name in tokenizer.model_input_names if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    onnx_path = output_dir / "model.onnx"
+    with torch.inference_mode():
+        torch.onnx.export(
+            LogitsOnly(model, input_names),
+            tuple(sample[name] for name in input_names),
+            str(onnx_path),
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+
+    # OnnxClassifier tokenizer ve config'i modelin yanında arar
+    tokenizer.save_pretrained(output_dir)
+    model.config.save_pretrained(output_dir)
+    print(f"✅ ONNX model kaydedildi: {onnx_path}")
+    return onnx_path
+
+
+def quantize(onnx_path):
+    """Dinamik int8 quantization (ağırlıklar int8, aktivasyonlar çalışma anında)"""
+    quant_path = onnx_path.with_name("model.quant.onnx")
+    quantize_dynamic(str(onnx_path), str(quant_path), weight_type=QuantType.QInt8)
+    print(f"✅ Quantize edilmiş model kaydedildi: {quant_path}")
+    return quant_path
+
+
+def load_test_set(file_path):
+    """comment,label formatındaki test setini yükle"""
+    df = pd.read_csv(file_path)
+    text_column = "comment" if "comment" in df.columns else "text"
+    df = df.dropna(subset=[text_column, "label"])
+    return df[text_column].astype(str).tolist(), df["label"].astype(int).to_numpy()
+
+
+def validate(model_dir, onnx_path, quant_path, texts, labels):
+    """Her model için doğruluk ve PyTorch tahminleriyle uyum"""
+    classifiers = {
+        "pytorch": TransformerClassifier(str(model_dir)),
+        "onnx_fp32": OnnxClassifier(str(onnx_path)),
+        "onnx_int8": OnnxClassifier(str(quant_path)),
+    }
+    probabilities = {name: clf.predict_proba(texts) for name, clf in classifiers.items()}
+    reference = probabilities["pytorch"]
+
+    report = {}
+    for name, probs in probabilities.items():
+        predictions = probs.argmax(axis=1)
+        report[name] = {
+            "accuracy": round(float((predictions == labels).mean()), 4),
+            "agreement_with_pytorch": round(float((predictions == reference.argmax(axis=1)).mean()), 4),
+            "max_prob_diff": round(float(np.abs(probs - reference).max()), 4),
+            "model_size_mb": round(Path(classifiers[name].model_path).stat().st_size / 2**20, 1)
+            if name != "pytorch" else None,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX export + int8 quantization")
+    parser.add_argument("--model-dir", required=True, help="trainer.save_model() çıktı klasörü")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--test-set", default=str(ROOT_DIR / "data" / "test_set_siber_zorbalik_v2.csv"))
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.02,
+                        help="int8 model için kabul edilen en fazla doğruluk kaybı")
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir)
+    onnx_path = export_onnx(args.model_dir, output_dir, opset=args.opset)
+    quant_path = quantize(onnx_path)
+
+    texts, labels = load_test_set(args.test_set)
+    report = validate(args.model_dir, onnx_path, quant_path, texts, labels)
+
+    print(f"\n{'='*60}")
+    print(f"DOĞRULAMA ({args.test_set}, {len(texts)} örnek)")
+    print(f"{'='*60}")
+    for name, metrics in report.items():
+        print(f"{name}: " + ", ".join(f"{key}={value}" for key, value in metrics.items()))
+
+    (output_dir / "export_report.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    accuracy_drop = report["pytorch"]["accuracy"] - report["onnx_int8"]["accuracy"]
+    if accuracy_drop > args.max_accuracy_drop:
+        print(f"❌ int8 doğruluk kaybı çok yüksek: {accuracy_drop:.4f} > {args.max_accuracy_drop}")
+        sys.exit(1)
+    print(f"✅ int8 doğruluk kaybı kabul edilebilir: {accuracy_drop:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
+import argparse
+import csv
+import os
+import time
 import pandas as pd
 import numpy as np
 import random
+from concurrent.futures import ProcessPoolExecutor
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -9,10 +14,17 @@ import nlpaug.augmenter.word as naw
 import nlpaug.augmenter.char as nac
 
 class TurkishNLPAugmentation:
-    def __init__(self):
+    """
+    Streaming augmentation pipeline: augmenter'lar bir kez oluşturulur, satırlar
+    parça parça (opsiyonel olarak process pool'da) işlenir, tekrarlar set ile elenir
+    ve çıktı parça parça diske yazılır. Her satır kendi seed'i ile augment edildiği
+    için çıktı worker sayısından bağımsızdır.
+    """
+    def __init__(self, seed=35):
         # Random seed ayarla
-        random.seed(35)
-        np.random.seed(35)
+        self.seed = seed
+        random.seed(seed)
+        np.random.seed(seed)
         
         # Türkçe synonym sözlüğü
         self.turkish_synonyms = {
@@ -37,13 +49,35 @@ class TurkishNLPAugmentation:
             'sanıyorsun': ['zannediyorsun', 'düşünüyorsun', 'inanıyorsun', 'varsayıyorsun']
         }
         
-    def load_sample_data(self):
+        # Augmenter'lar bir kez oluşturulur (her çağrıda yeniden değil)
+        self.synonym_aug = self._build_augmenter(lambda: naw.SynonymAug(aug_src='wordnet', lang='tur'))
+        self.swap_aug = self._build_augmenter(lambda: naw.RandomWordAug(action="swap", aug_p=0.3))
+        self.deletion_aug = self._build_augmenter(lambda: naw.RandomWordAug(action="delete", aug_p=0.2))
+        self.insertion_aug = self._build_augmenter(lambda: naw.RandomWordAug(action="insert", aug_p=0.2))
+    
+    @staticmethod
+    def _build_augmenter(factory):
+        """Augmenter oluşturulamazsa (ör. WordNet yok) None; ilgili adım fallback'e düşer"""
+        try:
+            return factory()
+        except Exception:
+            return None
+    
+    @staticmethod
+    def _augment_once(augmenter, text):
+        """nlpaug >= 1.1 liste döndürür, eski sürümler string"""
+        augmented_text = augmenter.augment(text)
+        if isinstance(augmented_text, list):
+            augmented_text = augmented_text[0] if augmented_text else text
+        return augmented_text
+        
+    def load_sample_data(self, path='sample_dataset.csv'):
         """Sample dataset'i yükle ve temizle"""
         print("📊 Sample dataset yükleniyor...")
         
         try:
             # CSV'yi daha esnek şekilde oku
-            df = pd.read_csv('sample_dataset.csv', encoding='utf-8', on_bad_lines='skip')
+            df = pd.read_csv(path, encoding='utf-8', on_bad_lines='skip')
             print(f"✅ Toplam {len(df)} satır yüklendi")
             
             # Sadece text ve label sütunlarını al
@@ -207,8 +241,7 @@ class TurkishNLPAugmentation:
         """NLPAug ile synonym augmentation"""
         try:
             # WordNet tabanlı synonym augmentation
-            synonym_aug = naw.SynonymAug(aug_src='wordnet', lang='tur')
-            augmented_text = synonym_aug.augment(text)
+            augmented_text = self._augment_once(self.synonym_aug, text)
             return [text, augmented_text] if augmented_text != text else [text]
         except:
             # WordNet çalışmazsa manuel synonym kullan
@@ -217,8 +250,7 @@ class TurkishNLPAugmentation:
     def nlpaug_random_swap(self, text):
         """NLPAug ile random word swap"""
         try:
-            swap_aug = naw.RandomWordAug(action="swap", aug_p=0.3)
-            augmented_text = swap_aug.augment(text)
+            augmented_text = self._augment_once(self.swap_aug, text)
             return [text, augmented_text] if augmented_text != text else [text]
         except:
             return [text]
@@ -226,8 +258,7 @@ class TurkishNLPAugmentation:
     def nlpaug_random_deletion(self, text):
         """NLPAug ile random word deletion"""
         try:
-            deletion_aug = naw.RandomWordAug(action="delete", aug_p=0.2)
-            augmented_text = deletion_aug.augment(text)
+            augmented_text = self._augment_once(self.deletion_aug, text)
             return [text, augmented_text] if augmented_text != text else [text]
         except:
             return [text]
@@ -235,59 +266,108 @@ class TurkishNLPAugmentation:
     def nlpaug_random_insertion(self, text):
         """NLPAug ile random word insertion"""
         try:
-            insertion_aug = naw.RandomWordAug(action="insert", aug_p=0.2)
-            augmented_text = insertion_aug.augment(text)
+            augmented_text = self._augment_once(self.insertion_aug, text)
             return [text, augmented_text] if augmented_text != text else [text]
         except:
             return [text]
     
-    def apply_all_augmentations(self, df):
-        """Tüm augmentation tekniklerini uygula"""
+    def augment_row(self, index, text):
+        """
+        Tek satırın tüm aday metinleri, adım sırasıyla:
+        (türkçe synonym, nlpaug synonym, swap, deletion, insertion).
+        Random state satır index'inden türetilir -> deterministik ve sıradan bağımsız.
+        """
+        row_seed = (self.seed * 1_000_003 + index) % (2 ** 32)
+        random.seed(row_seed)
+        np.random.seed(row_seed)
+        return (
+            self.turkish_synonym_augmentation(text),
+            self.nlpaug_synonym_augmentation(text),
+            self.nlpaug_random_swap(text),
+            self.nlpaug_random_deletion(text),
+            self.nlpaug_random_insertion(text),
+        )
+    
+    def augment_chunk(self, chunk):
+        """[(index, text), ...] -> her satır için augment_row çıktısı"""
+        return [self.augment_row(index, text) for index, text in chunk]
+    
+    def apply_all_augmentations(self, df, workers=1, chunk_size=256, output_path=None):
+        """
+        Tüm augmentation tekniklerini uygula.
+        
+        Args:
+            df: text ve label sütunlu DataFrame
+            workers: Process sayısı (1: aynı process'te)
+            chunk_size: Worker'a tek seferde gönderilen satır sayısı
+            output_path: Verilirse sonuçlar parça parça bu CSV'ye yazılır
+        """
         print("📝 NLPAug ile metin augmentation başlıyor...")
+        started = time.perf_counter()
+        
+        rows = list(zip(range(len(df)), df['text'].astype(str), df['label']))
+        chunks = [rows[start:start + chunk_size] for start in range(0, len(rows), chunk_size)]
         
         augmented_data = []
+        seen = set()
+        writer = None
+        output_file = None
+        if output_path:
+            output_file = open(output_path, 'w', encoding='utf-8', newline='')
+            writer = csv.writer(output_file)
+            writer.writerow(['text', 'label'])
         
-        for _, row in df.iterrows():
-            text = row['text']
-            label = row['label']
-            
-            # 1. Türkçe Synonym Augmentation
-            synonym_texts = self.turkish_synonym_augmentation(text)
-            for aug_text in synonym_texts:
-                augmented_data.append({'text': aug_text, 'label': label})
-            
-            # 2. NLPAug Synonym (eğer çalışırsa)
-            try:
-                nlpaug_synonym_texts = self.nlpaug_synonym_augmentation(text)
-                for aug_text in nlpaug_synonym_texts:
-                    if aug_text not in [item['text'] for item in augmented_data[-len(synonym_texts):]]:
-                        augmented_data.append({'text': aug_text, 'label': label})
-            except:
-                pass
-            
-            # 3. Random Word Swap
-            swap_texts = self.nlpaug_random_swap(text)
-            for aug_text in swap_texts:
-                if aug_text not in [item['text'] for item in augmented_data]:
-                    augmented_data.append({'text': aug_text, 'label': label})
-            
-            # 4. Random Word Deletion
-            deletion_texts = self.nlpaug_random_deletion(text)
-            for aug_text in deletion_texts:
-                if aug_text not in [item['text'] for item in augmented_data]:
-                    augmented_data.append({'text': aug_text, 'label': label})
-            
-            # 5. Random Word Insertion
-            insertion_texts = self.nlpaug_random_insertion(text)
-            for aug_text in insertion_texts:
-                if aug_text not in [item['text'] for item in augmented_data]:
-                    augmented_data.append({'text': aug_text, 'label': label})
+        def emit(aug_text, label, chunk_rows):
+            seen.add(aug_text)
+            augmented_data.append({'text': aug_text, 'label': label})
+            chunk_rows.append((aug_text, label))
         
-        augmented_df = pd.DataFrame(augmented_data)
-        print(f"✅ NLPAug augmentation: {len(df)} -> {len(augmented_df)} örnek")
+        try:
+            for chunk, chunk_candidates in zip(chunks, self._map_chunks(chunks, workers)):
+                chunk_rows = []
+                for (_, _, label), candidates in zip(chunk, chunk_candidates):
+                    synonym_texts, nlpaug_synonym_texts, swap_texts, deletion_texts, insertion_texts = candidates
+                    
+                    # 1. Türkçe Synonym Augmentation
+                    for aug_text in synonym_texts:
+                        emit(aug_text, label, chunk_rows)
+                    
+                    # 2. NLPAug Synonym: sadece bu satırın synonym'lerinde yoksa
+                    row_synonyms = set(synonym_texts)
+                    for aug_text in nlpaug_synonym_texts:
+                        if aug_text not in row_synonyms:
+                            emit(aug_text, label, chunk_rows)
+                    
+                    # 3-5. Random swap / deletion / insertion: tüm çıktıda yoksa
+                    for texts in (swap_texts, deletion_texts, insertion_texts):
+                        for aug_text in texts:
+                            if aug_text not in seen:
+                                emit(aug_text, label, chunk_rows)
+                
+                if writer is not None:
+                    writer.writerows(chunk_rows)
+                    output_file.flush()
+        finally:
+            if output_file is not None:
+                output_file.close()
+        
+        augmented_df = pd.DataFrame(augmented_data, columns=['text', 'label'])
+        elapsed = time.perf_counter() - started
+        print(f"✅ NLPAug augmentation: {len(df)} -> {len(augmented_df)} örnek "
+              f"({elapsed:.1f}s, {len(df) / max(elapsed, 1e-9):.0f} satır/s, {workers} worker)")
         
         return augmented_df
     
+    def _map_chunks(self, chunks, workers):
+        """Parça sonuçlarını sırayla üret; workers > 1 ise process pool kullanılır"""
+        texts = [[(index, text) for index, text, _ in chunk] for chunk in chunks]
+        if workers <= 1 or len(chunks) <= 1:
+            for chunk in texts:
+                yield self.augment_chunk(chunk)
+            return
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self.seed,)) as executor:
+            yield from executor.map(_augment_chunk, texts)
+    
     def save_augmented_data(self, df, filename):
         """Augmented verileri tek dosya olarak kaydet"""
         print(f"\n💾 {filename} verileri kaydediliyor...")
@@ -298,16 +378,38 @@ class TurkishNLPAugmentation:
         print(f"✅ {filename} verileri kaydedildi!")
         print(f"   - {filename}.csv")
 
+
+# Worker process'lerinde bir kez oluşturulan augmenter
+_worker_augmentation = None
+
+
+def _init_worker(seed):
+    global _worker_augmentation
+    _worker_augmentation = TurkishNLPAugmentation(seed)
+
+
+def _augment_chunk(chunk):
+    return _worker_augmentation.augment_chunk(chunk)
+
+
 def main():
     """Ana fonksiyon"""
+    parser = argparse.ArgumentParser(description="Türkçe NLPAug augmentation")
+    parser.add_argument("--input", default="sample_dataset.csv", help="text,label sütunlu CSV")
+    parser.add_argument("--output", default="nlpaug_turkish_augmented", help="Çıktı dosya adı (.csv eklenir)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Process sayısı")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Worker başına parça boyutu")
+    parser.add_argument("--seed", type=int, default=35)
+    args = parser.parse_args()
+    
     print("🚀 TÜRKÇE NLPAUG AUGMENTATION")
     print("=" * 50)
     
     # Augmentation sınıfını oluştur
-    aug = TurkishNLPAugmentation()
+    aug = TurkishNLPAugmentation(seed=args.seed)
     
     # Sample dataset'i yükle
-    df = aug.load_sample_data()
+    df = aug.load_sample_data(args.input)
     if df is None:
         return
     
@@ -321,12 +423,12 @@ def main():
         print("❌ Label 0 hariç kategori bulunamadı!")
         return
     
-    # NLPAug ile augmentation uygula
+    # NLPAug ile augmentation uygula (sonuçlar parça parça diske yazılır)
     print(f"\n{'='*20} NLPAUG AUGMENTATION {'='*20}")
-    augmented_df = aug.apply_all_augmentations(non_zero_df)
-    
-    # Sonuçları kaydet
-    aug.save_augmented_data(augmented_df, 'nlpaug_turkish_augmented')
+    output_path = f'{args.output}.csv'
+    augmented_df = aug.apply_all_augmentations(
+        non_zero_df, workers=args.workers, chunk_size=args.chunk_size, output_path=output_path
+    )
     
     # Final dağılım
     print(f"\n📊 Final Dağılım:")
@@ -335,7 +437,7 @@ def main():
         print(f"   Label {label}: {count} adet")
     
     print(f"\n🎉 NLPAug Türkçe augmentation tamamlandı!")
-    print(f"📁 Augmented veriler 'nlpaug_turkish_augmented.csv' olarak kaydedildi")
+    print(f"📁 Augmented veriler '{output_path}' olarak kaydedildi")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TF-IDF Lineer Model Eğitimi
+data/dataset.csv + data/nlpaug_turkish_augmented.csv üzerinde kelime + karakter
+n-gram TF-IDF ve kalibre edilmiş logistic regression eğitir.
+
+Çıktı backend'in "linear" sınıflandırıcısı (Gemini fallback'i ve cascade ilk
+aşaması) tarafından yüklenir. Mevcut test setleri üzerinde doğruluk raporu üretir.
+
+Kullanım:
+    python ML/train_linear_model.py
+    python ML/train_linear_model.py --output models/linear_tfidf.joblib --C 10
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from sklearn.metrics import accuracy_score, f1_score, classification_report
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config import DATA_DIR, LINEAR_MODEL_PATH
+from backend.classifiers.linear_classifier import (
+    fit_linear_model, out_of_fold_probabilities, save_linear_model
+)
+
+
+def clean_label(value):
+    """'  3 ' gibi bozuk etiketleri temizle; 0-4 dışını at"""
+    digits = "".join(filter(str.isdigit, str(value)))
+    if not digits:
+        return None
+    label = int(digits)
+    return label if label in range(5) else None
+
+
+def load_training_data(dataset_path, augmented_path):
+    """
+    Orijinal + augmented veri. Augmented dosyada her orijinal yorumu kendi
+    varyantları takip eder; grup id'si bu blokları birlikte tutar.
+    """
+    original = pd.read_csv(dataset_path, on_bad_lines="skip", engine="python")
+    original["label"] = original["label"].map(clean_label)
+    original = original.dropna(subset=["text", "label"])
+    original_texts = set(original["text"].astype(str))
+
+    frames = [original[["text", "label"]].assign(source="dataset")]
+    if augmented_path and Path(augmented_path).exists():
+        augmented = pd.read_csv(augmented_path, on_bad_lines="skip", engine="python")
+        augmented["label"] = augmented["label"].map(clean_label)
+        augmented = augmented.dropna(subset=["text", "label"])
+        frames = [augmented[["text", "label"]].assign(source="augmented")]
+        # Augmented dosya orijinalleri de içeriyor; içermeyen orijinaller ayrıca eklenir
+        missing = original[~original["text"].astype(str).isin(set(augmented["text"].astype(str)))]
+        frames.append(missing[["text", "label"]].assign(source="dataset"))
+
+    df = pd.concat(frames, ignore_index=True)
+    df["text"] = df["text"].astype(str)
+    df["label"] = df["label"].astype(int)
+    # Her orijinal yorum yeni bir grup başlatır
+    df["group"] = df["text"].isin(original_texts).cumsum()
+    return df
+
+
+def load_test_sets():
+    """Etiketli test setleri: {isim: (texts, labels)}"""
+    test_sets = {}
+    csv_path = DATA_DIR / "test_set_siber_zorbalik_v2.csv"
+    if csv_path.exists():
+        df = pd.read_csv(csv_path).dropna(subset=["comment", "label"])
+        test_sets[csv_path.name] = (df["comment"].astype(str).tolist(), df["label"].astype(int).to_numpy())
+    json_path = DATA_DIR / "labeled_test_dataset.json"
+    if json_path.exists():
+        df = pd.read_json(json_path).dropna(subset=["comment", "label"])
+        test_sets[json_path.name] = (df["comment"].astype(str).tolist(), df["label"].astype(int).to_numpy())
+    return test_sets
+
+
+def evaluate(labels, predictions):
+    return {
+        "samples": int(len(labels)),
+        "accuracy": round(float(accuracy_score(labels, predictions)), 4),
+        "macro_f1": round(float(f1_score(labels, predictions, average="macro", labels=list(range(5)), zero_division=0)), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TF-IDF lineer model eğitimi")
+    parser.add_argument("--dataset", default=str(DATA_DIR / "dataset.csv"))
+    parser.add_argument("--augmented", default=str(DATA_DIR / "nlpaug_turkish_augmented.csv"))
+    parser.add_argument("--output", default=LINEAR_MODEL_PATH)
+    parser.add_argument("--C", type=float, default=10.0, help="Logistic regression regularization")
+    parser.add_argument("--folds", type=int, default=5, help="Out-of-fold değerlendirme fold sayısı")
+    args = parser.parse_args()
+
+    df = load_training_data(args.dataset, args.augmented)
+    texts = df["text"].tolist()
+    labels = df["label"].to_numpy()
+    groups = df["group"].to_numpy()
+    print(f"📊 Eğitim verisi: {len(df)} örnek, {df['group'].nunique()} orijinal yorum grubu")
+    print(df["label"].value_counts().sort_index().to_string())
+
+    # Grup bazlı out-of-fold olasılıklar: dürüst doğruluk + cascade eşik kalibrasyonu
+    started = time.perf_counter()
+    oof = out_of_fold_probabilities(texts, labels, groups, folds=args.folds, C=args.C)
+    print(f"✅ {args.folds}-fold out-of-fold tahminler: {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    vectorizer, model = fit_linear_model(texts, labels, groups, C=args.C)
+    train_time = time.perf_counter() - started
+
+    report = {
+        "train_samples": len(df),
+        "train_time_s": round(train_time, 2),
+        "vocabulary_size": sum(len(v.vocabulary_) for _, v in vectorizer.transformer_list),
+        "out_of_fold": evaluate(labels, oof.argmax(axis=1)),
+        "test_sets": {},
+    }
+
+    for name, (test_texts, test_labels) in load_test_sets().items():
+        predictions = model.predict(vectorizer.transform(test_texts))
+        report["test_sets"][name] = evaluate(test_labels, predictions)
+        print(f"\n📋 {name}")
+        print(classification_report(test_labels, predictions, labels=list(range(5)), zero_division=0))
+
+    # Tek çekirdek throughput (vectorize + predict)
+    sample = (texts * ((5000 // len(texts)) + 1))[:5000]
+    started = time.perf_counter()
+    model.predict_proba(vectorizer.transform(sample))
+    report["throughput_per_s"] = round(len(sample) / (time.perf_counter() - started), 1)
+
+    save_linear_model(
+        args.output, vectorizer, model,
+        calibration={"probabilities": oof, "labels": labels},
+        metadata={key: report[key] for key in ("train_samples", "out_of_fold", "test_sets")}
+    )
+    report_path = Path(args.output).with_suffix(".report.json")
+    report_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    print(f"\n{'='*60}")
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"✅ Model kaydedildi: {args.output}")
+    print(f"✅ Rapor kaydedildi: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
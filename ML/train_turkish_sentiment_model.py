@@ -3,15 +3,29 @@
 """
 Türkçe Duygu/Saldırganlık Analizi Modeli Eğitimi
 BERTurk ve ElecTRa-tr modelleri ile fine-tuning
+
+CPU'da pratik eğitim için:
+- Tokenizasyon bir kez yapılır ve NumPy olarak diske cache'lenir
+- Batch'ler 512'ye değil, batch içindeki en uzun yoruma pad'lenir (dynamic padding)
+- Benzer uzunluktaki örnekler aynı batch'e düşer (group_by_length)
+
+Kullanım:
+    python ML/train_turkish_sentiment_model.py --data data/nlpaug_turkish_augmented.csv
 """
 
+import argparse
+import hashlib
+import json
+import time
+from pathlib import Path
 import pandas as pd
 import numpy as np
 import torch
 from torch.utils.data import Dataset, DataLoader
 from transformers import (
     AutoTokenizer, AutoModelForSequenceClassification,
-    TrainingArguments, Trainer, EarlyStoppingCallback
+    TrainingArguments, Trainer, EarlyStoppingCallback,
+    DataCollatorWithPadding, TrainerCallback
 )
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_recall_fscore_support, classification_report
@@ -23,35 +37,100 @@ device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
 print(f"Kullanılan cihaz: {device}")
 print(f"GPU: {torch.cuda.get_device_name(0) if torch.cuda.is_available() else 'Yok'}")
 
+def pretokenize(texts, tokenizer, max_length=512, cache_dir=None):
+    """
+    Tüm metinleri padding'siz tokenize et. Sonuç düz bir token dizisi + offset'ler
+    olarak {cache_dir}/{hash}.npz dosyasına yazılır; aynı tokenizer, max_length ve
+    metinlerle tekrar çağrıldığında diskten okunur.
+    """
+    texts = [str(text) for text in texts]
+    cache_path = None
+    if cache_dir:
+        digest = hashlib.sha1(f"{tokenizer.name_or_path}|{max_length}".encode("utf-8"))
+        for text in texts:
+            digest.update(b"\0" + text.encode("utf-8"))
+        cache_path = Path(cache_dir) / f"{digest.hexdigest()}.npz"
+        if cache_path.exists():
+            cached = np.load(cache_path)
+            print(f"✅ Tokenizasyon cache'ten yüklendi: {cache_path}")
+            return cached["input_ids"], cached["offsets"]
+    
+    started = time.perf_counter()
+    encoded = tokenizer(texts, truncation=True, max_length=max_length)["input_ids"]
+    lengths = np.fromiter((len(ids) for ids in encoded), dtype=np.int64, count=len(encoded))
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    input_ids = np.fromiter((token for ids in encoded for token in ids), dtype=np.int32, count=int(offsets[-1]))
+    print(f"✅ {len(texts)} metin tokenize edildi ({time.perf_counter() - started:.1f}s, "
+          f"ortalama {lengths.mean():.1f} token)")
+    
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(cache_path, input_ids=input_ids, offsets=offsets)
+    return input_ids, offsets
+
+
 class TurkishSentimentDataset(Dataset):
-    """Türkçe duygu analizi veri seti"""
+    """Türkçe duygu analizi veri seti (önceden tokenize edilmiş, padding'siz)"""
     
-    def __init__(self, texts, labels, tokenizer, max_length=512):
-        self.texts = texts
-        self.labels = labels
-        self.tokenizer = tokenizer
-        self.max_length = max_length
+    def __init__(self, texts, labels, tokenizer, max_length=512, cache_dir=None):
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.input_ids, self.offsets = pretokenize(texts, tokenizer, max_length, cache_dir)
     
     def __len__(self):
-        return len(self.texts)
+        return len(self.labels)
     
     def __getitem__(self, idx):
-        text = str(self.texts[idx])
-        label = self.labels[idx]
-        
-        encoding = self.tokenizer(
-            text,
-            truncation=True,
-            padding='max_length',
-            max_length=self.max_length,
-            return_tensors='pt'
-        )
-        
+        input_ids = self.input_ids[self.offsets[idx]:self.offsets[idx + 1]].tolist()
         return {
-            'input_ids': encoding['input_ids'].flatten(),
-            'attention_mask': encoding['attention_mask'].flatten(),
-            'labels': torch.tensor(label, dtype=torch.long)
+            'input_ids': input_ids,
+            'attention_mask': [1] * len(input_ids),
+            'labels': int(self.labels[idx])
+        }
+
+
+class TokenCountingCollator:
+    """Dynamic padding (batch'teki en uzun örneğe) + gerçek/pad'li token sayacı"""
+    
+    def __init__(self, tokenizer):
+        self.collator = DataCollatorWithPadding(tokenizer, pad_to_multiple_of=8)
+        self.real_tokens = 0
+        self.padded_tokens = 0
+    
+    def __call__(self, features):
+        batch = self.collator(features)
+        self.real_tokens += int(batch['attention_mask'].sum())
+        self.padded_tokens += int(batch['input_ids'].numel())
+        return batch
+
+
+class ThroughputCallback(TrainerCallback):
+    """Epoch başına süre, token/s ve padding verimliliği"""
+    
+    def __init__(self, collator):
+        self.collator = collator
+        self.epochs = []
+        self._started = None
+        self._real = self._padded = 0
+    
+    def on_epoch_begin(self, args, state, control, **kwargs):
+        self._started = time.perf_counter()
+        self._real, self._padded = self.collator.real_tokens, self.collator.padded_tokens
+    
+    def on_epoch_end(self, args, state, control, **kwargs):
+        elapsed = time.perf_counter() - self._started
+        # Epoch içindeki ara değerlendirmelerin batch'leri de sayaca girer
+        real = self.collator.real_tokens - self._real
+        padded = self.collator.padded_tokens - self._padded
+        stats = {
+            'epoch': round(state.epoch or 0, 2),
+            'wall_time_s': round(elapsed, 1),
+            'tokens_per_s': round(real / elapsed, 1) if elapsed else 0.0,
+            'padded_tokens_per_s': round(padded / elapsed, 1) if elapsed else 0.0,
+            'padding_efficiency': round(real / padded, 3) if padded else 0.0,
         }
+        self.epochs.append(stats)
+        print(f"⏱️ Epoch {stats['epoch']}: {stats['wall_time_s']}s, "
+              f"{stats['tokens_per_s']} token/s (padding verimi {stats['padding_efficiency']})")
 
 def load_and_preprocess_data(file_path):
     """Veri setini yükle ve ön işle"""
@@ -89,7 +168,7 @@ def compute_metrics(eval_pred):
     }
 
 def train_model(model_name, train_dataset, val_dataset, num_labels=5, output_dir=None):
-    """Model eğitimi"""
+    """Model eğitimi (epoch süresi ve token/s raporu output_dir/throughput.json'a yazılır)"""
     print(f"\n{model_name} modeli eğitiliyor...")
     
     # Tokenizer ve model yükle
@@ -103,9 +182,13 @@ def train_model(model_name, train_dataset, val_dataset, num_labels=5, output_dir
     # Model'i GPU'ya taşı
     model.to(device)
     
+    output_dir = output_dir or f'./results_{model_name.replace("/", "_")}'
+    collator = TokenCountingCollator(tokenizer)
+    throughput = ThroughputCallback(collator)
+    
     # Eğitim parametreleri
     training_args = TrainingArguments(
-        output_dir=output_dir or f'./results_{model_name.replace("/", "_")}',
+        output_dir=output_dir,
         num_train_epochs=3,
         per_device_train_batch_size=8,
         per_device_eval_batch_size=16,
@@ -124,6 +207,7 @@ def train_model(model_name, train_dataset, val_dataset, num_labels=5, output_dir
         save_total_limit=2,
         learning_rate=2e-5,
         fp16=torch.cuda.is_available(),  # GPU varsa mixed precision kullan
+        group_by_length=True,  # Benzer uzunluklar aynı batch'te -> daha az padding
     )
     
     # Trainer oluştur
@@ -132,17 +216,29 @@ def train_model(model_name, train_dataset, val_dataset, num_labels=5, output_dir
         args=training_args,
         train_dataset=train_dataset,
         eval_dataset=val_dataset,
+        data_collator=collator,
         compute_metrics=compute_metrics,
-        callbacks=[EarlyStoppingCallback(early_stopping_patience=3)]
+        callbacks=[EarlyStoppingCallback(early_stopping_patience=3), throughput]
     )
     
     # Eğitimi başlat
     print("Eğitim başlıyor...")
+    started = time.perf_counter()
     trainer.train()
+    train_time = time.perf_counter() - started
     
     # En iyi modeli kaydet
     trainer.save_model()
-    tokenizer.save_pretrained(output_dir or f'./results_{model_name.replace("/", "_")}')
+    tokenizer.save_pretrained(output_dir)
+    
+    report = {
+        'model': model_name,
+        'train_samples': len(train_dataset),
+        'train_time_s': round(train_time, 1),
+        'epochs': throughput.epochs,
+    }
+    Path(output_dir, 'throughput.json').write_text(json.dumps(report, indent=2), encoding='utf-8')
+    print(f"⏱️ Toplam eğitim süresi: {train_time:.1f}s")
     
     # Test seti üzerinde değerlendirme
     print("\nModel değerlendiriliyor...")
@@ -153,8 +249,16 @@ def train_model(model_name, train_dataset, val_dataset, num_labels=5, output_dir
 
 def main():
     """Ana fonksiyon"""
+    root_dir = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Türkçe transformer fine-tuning")
+    parser.add_argument("--data", default=str(root_dir / "data" / "nlpaug_turkish_augmented.csv"))
+    parser.add_argument("--max-length", type=int, default=512, help="Truncation sınırı (padding dinamik)")
+    parser.add_argument("--cache-dir", default=str(root_dir / "models" / "tokenized_cache"),
+                        help="Önceden tokenize edilmiş veri cache'i")
+    args = parser.parse_args()
+    
     # Veri setini yükle
-    df = load_and_preprocess_data('E:/Melike/IBM/ml_model/nlpaug_turkish_augmented.csv')
+    df = load_and_preprocess_data(args.data)
     
     # Train/validation split
     train_texts, val_texts, train_labels, val_labels = train_test_split(
@@ -183,8 +287,8 @@ def main():
             tokenizer = AutoTokenizer.from_pretrained(model_name)
             
             # Dataset'leri oluştur
-            train_dataset = TurkishSentimentDataset(train_texts, train_labels, tokenizer)
-            val_dataset = TurkishSentimentDataset(val_texts, val_labels, tokenizer)
+            train_dataset = TurkishSentimentDataset(train_texts, train_labels, tokenizer, args.max_length, args.cache_dir)
+            val_dataset = TurkishSentimentDataset(val_texts, val_labels, tokenizer, args.max_length, args.cache_dir)
             
             # Model eğit
             trainer, tokenizer, model = train_model(
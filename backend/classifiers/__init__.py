@@ -0,0 +1,84 @@
+"""
+Classifier Backends
+Tüm backend'ler predict(text) ve predict_batch(texts) sunar ve
+{"category", "confidence", "message"} formatında sonuç döndürür.
+"""
+import threading
+from config import (
+    CLASSIFIER_BACKEND, LOCAL_MODEL_PATH, ONNX_MODEL_PATH, LINEAR_MODEL_PATH,
+    CASCADE_FIRST_STAGE, CASCADE_THRESHOLD, CASCADE_TARGET_ACCURACY, CASCADE_CALIBRATION_SET,
+    CASCADE_CALIBRATION_HOLDOUT
+)
+
+CLASSIFIER_BACKENDS = ("fewshot", "local", "onnx", "linear", "tfidf", "cascade")
+CASCADE_FIRST_STAGES = ("linear", "tfidf", "local", "onnx")
+
+_classifiers = {}
+_lock = threading.RLock()  # cascade kendi ilk aşamasını yüklerken tekrar girer
+
+
+def _create_classifier(name: str):
+    if name == "fewshot":
+        from backend.few_shot.fewshot_model import few_shot_model
+        return few_shot_model
+    if name == "local":
+        from .transformer_classifier import TransformerClassifier
+        return TransformerClassifier(LOCAL_MODEL_PATH)
+    if name == "onnx":
+        from .onnx_classifier import OnnxClassifier
+        return OnnxClassifier(ONNX_MODEL_PATH)
+    if name == "linear":
+        from .linear_classifier import LinearTextClassifier
+        return LinearTextClassifier(LINEAR_MODEL_PATH)
+    if name == "tfidf":
+        from backend.few_shot.fewshot_model import few_shot_model
+        from .tfidf_classifier import TfidfLogisticClassifier
+        return TfidfLogisticClassifier(few_shot_model)
+    if name == "cascade":
+        if CASCADE_FIRST_STAGE not in CASCADE_FIRST_STAGES:
+            raise ValueError(f"Geçersiz CASCADE_FIRST_STAGE: {CASCADE_FIRST_STAGE}")
+        from backend.few_shot.fewshot_model import few_shot_model
+        from .cascade import build_cascade
+        return build_cascade(
+            get_classifier(CASCADE_FIRST_STAGE),
+            few_shot_model,
+            threshold=CASCADE_THRESHOLD,
+            target_accuracy=CASCADE_TARGET_ACCURACY,
+            calibration_set=CASCADE_CALIBRATION_SET,
+            calibration_holdout=CASCADE_CALIBRATION_HOLDOUT
+        )
+    raise ValueError(
+        f"Bilinmeyen sınıflandırıcı backend'i: {name} (seçenekler: {', '.join(CLASSIFIER_BACKENDS)})"
+    )
+
+
+def get_classifier(name: str = None):
+    """
+    İsmi verilen backend'i döndür (varsayılan: CLASSIFIER_BACKEND).
+    Modeller ilk kullanımda bir kez yüklenir ve paylaşılır.
+    """
+    name = (name or CLASSIFIER_BACKEND).strip().lower()
+    classifier = _classifiers.get(name)
+    if classifier is None:
+        with _lock:
+            classifier = _classifiers.get(name)
+            if classifier is None:
+                classifier = _classifiers[name] = _create_classifier(name)
+    return classifier
+
+
+def loaded_classifiers() -> list:
+    """Yüklenmiş backend isimleri (health check için)"""
+    return sorted(_classifiers)
+
+
+def classifier_stats() -> dict:
+    """Sayaç tutan backend'lerin istatistikleri (ör. cascade escalation oranı)"""
+    return {
+        name: classifier.stats()
+        for name, classifier in list(_classifiers.items())
+        if hasattr(classifier, "stats")
+    }
+
+
+__all__ = ['CLASSIFIER_BACKENDS', 'get_classifier', 'loaded_classifiers', 'classifier_stats']
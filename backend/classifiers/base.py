@@ -0,0 +1,83 @@
+"""Lokal (Gemini'siz) sınıflandırıcılar için ortak arayüz ve batched inference"""
+from typing import List, Dict
+import numpy as np
+
+
+class ProbabilisticClassifier:
+    """
+    Kategori olasılığı üreten lokal sınıflandırıcıların ortak arayüzü.
+    Alt sınıflar predict_proba'yı uygular; cascade ilk aşaması da bunu kullanır.
+    """
+    name = None
+    message = None
+    num_labels = 5
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """Her metin için kategori olasılıkları (girdi sırasıyla)"""
+        raise NotImplementedError
+
+    def _expand_classes(self, probabilities: np.ndarray, classes) -> np.ndarray:
+        """Eğitimde görülmeyen kategoriler için sıfır sütun ekle (sütun = kategori id)"""
+        full = np.zeros((probabilities.shape[0], self.num_labels), dtype=np.float32)
+        full[:, classes] = probabilities
+        return full
+
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, any]]:
+        """Metinleri sınıflandır (predict_with_few_shot ile aynı response formatı)"""
+        if not texts:
+            return []
+        probabilities = self.predict_proba([str(text) for text in texts])
+        categories = probabilities.argmax(axis=1)
+        return [
+            {
+                "category": int(category),
+                "confidence": round(float(probs[category]), 3),
+                "message": self.message
+            }
+            for category, probs in zip(categories, probabilities)
+        ]
+
+    def predict(self, text: str) -> Dict[str, any]:
+        """Tek metin tahmini"""
+        return self.predict_batch([text])[0]
+
+
+class BatchedTextClassifier(ProbabilisticClassifier):
+    """
+    Tokenizer tabanlı lokal sınıflandırıcıların ortak kısmı.
+    Metinler uzunluğa göre sıralanıp partilenir; her parti kendi en uzun
+    örneğine kadar pad edilir (dynamic padding). Alt sınıflar _logits'i uygular.
+    """
+    tensor_type = "np"  # Tokenizer çıktı tipi ("np" veya "pt")
+
+    def __init__(self, tokenizer, num_labels: int, batch_size: int, max_length: int):
+        self.tokenizer = tokenizer
+        self.num_labels = num_labels
+        self.batch_size = batch_size
+        self.max_length = max_length
+
+    def _logits(self, encoded) -> np.ndarray:
+        """Bir partinin logit'leri (batch, num_labels)"""
+        raise NotImplementedError
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """Her metin için kategori olasılıkları (girdi sırasıyla)"""
+        probabilities = np.zeros((len(texts), self.num_labels), dtype=np.float32)
+        # Benzer uzunluktaki metinler aynı partiye düşsün -> daha az padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            encoded = self.tokenizer(
+                [texts[i] for i in indices],
+                padding=True,  # Partideki en uzun örneğe kadar
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors=self.tensor_type
+            )
+            logits = np.asarray(self._logits(encoded), dtype=np.float32)
+            logits -= logits.max(axis=1, keepdims=True)
+            exp = np.exp(logits)
+            probabilities[indices] = exp / exp.sum(axis=1, keepdims=True)
+
+        return probabilities
@@ -0,0 +1,172 @@
+"""
+Tiered classification cascade.
+Hızlı lokal aşama emin olduğu yorumlara karar verir; confidence'ı kalibre
+edilmiş eşiğin altında kalanlar predict_with_few_shot'ın Gemini yoluna gider.
+"""
+import threading
+import time
+from typing import List, Dict
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+
+def calibrate_threshold(probabilities: np.ndarray, labels: np.ndarray, target_accuracy: float) -> float:
+    """
+    İlk aşamada kalan (confidence >= eşik) tahminlerin doğruluğu target_accuracy'ye
+    ulaşacak şekilde en düşük eşiği seç. Hiçbir eşik yetmiyorsa 1.0 (her şey LLM'e).
+    """
+    confidences = probabilities.max(axis=1)
+    correct = probabilities.argmax(axis=1) == labels
+    order = np.argsort(-confidences, kind="stable")
+    # En emin k tahminin doğruluğu, k = 1..n
+    accepted_accuracy = np.cumsum(correct[order]) / np.arange(1, len(order) + 1)
+    valid = np.nonzero(accepted_accuracy >= target_accuracy)[0]
+    if len(valid) == 0:
+        return 1.0
+    return float(confidences[order][valid[-1]])
+
+
+class CascadeClassifier:
+    """
+    İki aşamalı sınıflandırıcı: first_stage (ProbabilisticClassifier) + few-shot LLM.
+    Aşama sayaçları ve escalation oranı stats() ile okunur.
+    """
+    name = "cascade"
+
+    def __init__(self, first_stage, llm_model, threshold: float):
+        self.first_stage = first_stage
+        self.llm_model = llm_model
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.total = 0
+        self.accepted = 0
+        self.escalated = 0
+        self.llm_answered = 0
+        self.llm_unavailable = 0
+        self.first_stage_time = 0.0
+        self.llm_time = 0.0
+
+        print(f"✅ Cascade hazır: {first_stage.name} -> Gemini (eşik: {threshold:.3f})")
+
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, any]]:
+        """Metinleri sınıflandır; sadece belirsiz olanlar LLM'e gider"""
+        if not texts:
+            return []
+        texts = [str(text) for text in texts]
+
+        started = time.perf_counter()
+        probabilities = self.first_stage.predict_proba(texts)
+        first_stage_time = time.perf_counter() - started
+
+        categories = probabilities.argmax(axis=1)
+        confidences = probabilities.max(axis=1)
+        results = [
+            {
+                "category": int(category),
+                "confidence": round(float(confidence), 3),
+                "message": f"Cascade: {self.first_stage.message}"
+            }
+            for category, confidence in zip(categories, confidences)
+        ]
+
+        uncertain = [i for i, confidence in enumerate(confidences) if confidence < self.threshold]
+        llm_answered = 0
+        llm_time = 0.0
+        llm_client = self.llm_model.model
+        if uncertain and llm_client is not None:
+            started = time.perf_counter()
+            llm_results = self.llm_model.predict_batch([texts[i] for i in uncertain])
+            llm_time = time.perf_counter() - started
+            for i, result in zip(uncertain, llm_results):
+                # LLM hata verip fallback'e düştüyse ilk aşamanın cevabı daha iyi
+                if result.get("message") == llm_client.message:
+                    results[i] = {**result, "message": f"Cascade: {llm_client.message}"}
+                    llm_answered += 1
+
+        with self._lock:
+            self.total += len(texts)
+            self.accepted += len(texts) - len(uncertain)
+            self.escalated += len(uncertain)
+            self.llm_answered += llm_answered
+            if self.llm_model.model is None:
+                self.llm_unavailable += len(uncertain)
+            self.first_stage_time += first_stage_time
+            self.llm_time += llm_time
+
+        return results
+
+    def predict(self, text: str) -> Dict[str, any]:
+        """Tek metin tahmini"""
+        return self.predict_batch([text])[0]
+
+    def stats(self) -> dict:
+        """Aşama sayaçları (health check için)"""
+        with self._lock:
+            return {
+                "first_stage": self.first_stage.name,
+                "threshold": round(self.threshold, 4),
+                "total": self.total,
+                "accepted_by_first_stage": self.accepted,
+                "escalated": self.escalated,
+                "escalation_rate": round(self.escalated / self.total, 4) if self.total else 0.0,
+                "llm_answered": self.llm_answered,
+                "llm_unavailable": self.llm_unavailable,
+                "first_stage_ms_per_comment": round(self.first_stage_time / self.total * 1000, 3) if self.total else 0.0,
+                "llm_ms_per_escalation": round(self.llm_time / self.escalated * 1000, 1) if self.escalated else 0.0,
+            }
+
+
+# Doğruluk raporlanan setler; eşik bunlarla kalibre edilirse cascade doğruluğu iyimser çıkar
+EVALUATION_SETS = ("test_set_siber_zorbalik_v2.csv", "labeled_test_dataset.json", "test_dataset.csv")
+# Eğitim sırasında dışarıda bırakılan split'i üretebilen ilk aşamalar (train_turkish_sentiment_model.py)
+HOLDOUT_FIRST_STAGES = ("local", "onnx")
+
+
+def _calibration_set(file_path: str, holdout: float = 0.2):
+    """
+    text/comment,label formatındaki kalibrasyon seti. holdout > 0 ise eğitim scriptiyle
+    aynı stratified split (random_state=42) yapılır ve sadece ayrılan kısım döner.
+    """
+    if Path(file_path).name in EVALUATION_SETS:
+        raise ValueError(f"Cascade eşiği test seti ile kalibre edilemez: {file_path}")
+    df = pd.read_csv(file_path, on_bad_lines="skip", engine="python")
+    text_column = "comment" if "comment" in df.columns else "text"
+    df = df.dropna(subset=[text_column, "label"])
+    df["label"] = pd.to_numeric(df["label"], errors="coerce")
+    df = df[df["label"].isin([0, 1, 2, 3, 4])]
+    texts = df[text_column].astype(str).to_numpy()
+    labels = df["label"].astype(int).to_numpy()
+    if holdout > 0:
+        _, texts, _, labels = train_test_split(texts, labels, test_size=holdout, random_state=42, stratify=labels)
+    return texts.tolist(), labels
+
+
+def build_cascade(first_stage, llm_model, threshold: float = 0, target_accuracy: float = 0.85,
+                  calibration_set: str = None, calibration_holdout: float = 0.2) -> CascadeClassifier:
+    """
+    Cascade'i oluştur. threshold verilmezse (0) kalibre edilir: ilk aşamanın kendi
+    out-of-fold olasılıkları varsa onlar, yoksa (local/onnx) eğitimde ayrılmış
+    calibration_set split'i kullanılır. Tüm veriyle eğitilmiş ve out-of-fold verisi
+    olmayan ilk aşamalar (eski linear modeller) için eşik açıkça verilmelidir.
+    """
+    if threshold <= 0:
+        calibration = first_stage.calibration_data() if hasattr(first_stage, "calibration_data") else None
+        if calibration is not None:
+            probabilities, labels = calibration
+            source = "out-of-fold"
+        elif first_stage.name in HOLDOUT_FIRST_STAGES:
+            texts, labels = _calibration_set(calibration_set, calibration_holdout)
+            probabilities = first_stage.predict_proba(texts)
+            source = f"{Path(calibration_set).name}, ayrılmış %{calibration_holdout * 100:.0f}" if calibration_holdout > 0 else calibration_set
+        else:
+            raise ValueError(
+                f"{first_stage.name} ilk aşamasında out-of-fold kalibrasyon verisi yok: modeli "
+                "ML/train_linear_model.py ile yeniden eğitin veya CASCADE_THRESHOLD verin"
+            )
+        threshold = calibrate_threshold(probabilities, labels, target_accuracy)
+        accepted = float((probabilities.max(axis=1) >= threshold).mean())
+        print(f"📊 Cascade eşiği kalibre edildi ({source}): {threshold:.3f} "
+              f"(hedef doğruluk {target_accuracy:.2f}, ilk aşamada kalan: %{accepted * 100:.1f})")
+    return CascadeClassifier(first_stage, llm_model, threshold)
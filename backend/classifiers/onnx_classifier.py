@@ -0,0 +1,68 @@
+"""
+ONNX Runtime sınıflandırıcı (CPU inference).
+ML/export_onnx_model.py ile dışa aktarılan (isteğe bağlı int8 quantize edilmiş)
+modeli yükler; torch gerektirmez.
+"""
+from pathlib import Path
+import numpy as np
+from config import (
+    LOCAL_MODEL_BATCH_SIZE, LOCAL_MODEL_MAX_LENGTH,
+    ONNX_INTRA_OP_THREADS, ONNX_INTER_OP_THREADS
+)
+from .base import BatchedTextClassifier
+
+
+class OnnxClassifier(BatchedTextClassifier):
+    """ONNX Runtime InferenceSession ile batched inference"""
+    name = "onnx"
+    message = "Lokal ONNX model"
+    tensor_type = "np"
+
+    def __init__(self, model_path: str, batch_size: int = LOCAL_MODEL_BATCH_SIZE,
+                 max_length: int = LOCAL_MODEL_MAX_LENGTH,
+                 intra_op_threads: int = ONNX_INTRA_OP_THREADS,
+                 inter_op_threads: int = ONNX_INTER_OP_THREADS):
+        try:
+            import onnxruntime as ort
+            from transformers import AutoTokenizer, AutoConfig
+        except ImportError as e:
+            raise RuntimeError(
+                f"ONNX model için onnxruntime ve transformers kurulu olmalı: {e}"
+            ) from e
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads > 0:
+            options.inter_op_num_threads = inter_op_threads
+
+        self.model_path = model_path
+        self.session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+        # Tokenizer ve config dışa aktarım sırasında modelin yanına kaydedilir
+        model_dir = str(Path(model_path).parent)
+        num_labels = self.session.get_outputs()[0].shape[-1]
+        if not isinstance(num_labels, int):
+            num_labels = AutoConfig.from_pretrained(model_dir).num_labels
+
+        super().__init__(
+            AutoTokenizer.from_pretrained(model_dir),
+            num_labels=num_labels,
+            batch_size=batch_size,
+            max_length=max_length
+        )
+
+        print(f"✅ ONNX model yüklendi: {model_path}")
+        print(f"   - Girdiler: {', '.join(self.input_names)}")
+        print(f"   - Batch size: {batch_size}, max_length: {max_length}, "
+              f"threads: intra={intra_op_threads or 'auto'} inter={inter_op_threads or 'auto'}")
+
+    def _logits(self, encoded):
+        # Model hangi girdileri bekliyorsa (token_type_ids modele göre değişir) onları ver
+        feed = {name: np.asarray(encoded[name], dtype=np.int64) for name in self.input_names}
+        return self.session.run(None, feed)[0]
@@ -0,0 +1,44 @@
+"""
+TF-IDF + Logistic Regression sınıflandırıcı.
+Few-shot modelin zaten hazırladığı tfidf_matrix üzerinde başlangıçta eğitilir;
+ek dosya veya bağımlılık gerektirmez (cascade'in varsayılan ilk aşaması).
+"""
+from typing import List
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold, cross_val_predict
+from .base import ProbabilisticClassifier
+
+
+class TfidfLogisticClassifier(ProbabilisticClassifier):
+    """few_shot_model.vectorizer / tfidf_matrix üzerinde multinomial logistic regression"""
+    name = "tfidf"
+    message = "TF-IDF logistic regression"
+
+    def __init__(self, few_shot_model, C: float = 10.0):
+        if few_shot_model.vectorizer is None or few_shot_model.tfidf_matrix is None:
+            raise RuntimeError("TF-IDF vectorizer hazır değil (training data yüklenemedi)")
+
+        self.vectorizer = few_shot_model.vectorizer
+        self._features = few_shot_model.tfidf_matrix
+        self._labels = np.array([ex["label"] for ex in few_shot_model.training_data])
+        self.model = LogisticRegression(C=C, max_iter=1000)
+        self.model.fit(self._features, self._labels)
+
+        print(f"✅ TF-IDF logistic regression eğitildi: {self._features.shape[0]} örnek")
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        features = self.vectorizer.transform(texts)
+        return self._expand_classes(self.model.predict_proba(features), self.model.classes_)
+
+    def calibration_data(self, folds: int = 5):
+        """
+        Eşik kalibrasyonu için out-of-fold olasılıklar ve gerçek etiketler.
+        Eğitim verisinin kendisi üzerindeki (aşırı iyimser) skorlar kullanılmaz.
+        """
+        cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+        probabilities = cross_val_predict(
+            LogisticRegression(C=self.model.C, max_iter=1000),
+            self._features, self._labels, cv=cv, method="predict_proba"
+        )
+        return self._expand_classes(probabilities, np.unique(self._labels)), self._labels
@@ -0,0 +1,46 @@
+"""
+Lokal transformer sınıflandırıcı (CPU inference).
+ML/train_turkish_sentiment_model.py ile fine-tune edilip trainer.save_model()
+ile kaydedilen checkpoint'i yükler; Gemini'ye gitmeden tahmin yapar.
+"""
+from config import LOCAL_MODEL_BATCH_SIZE, LOCAL_MODEL_MAX_LENGTH, LOCAL_MODEL_THREADS
+from .base import BatchedTextClassifier
+
+
+class TransformerClassifier(BatchedTextClassifier):
+    """AutoModelForSequenceClassification checkpoint'i ile PyTorch batched inference"""
+    name = "local"
+    message = "Lokal transformer model"
+    tensor_type = "pt"
+
+    def __init__(self, model_path: str, batch_size: int = LOCAL_MODEL_BATCH_SIZE,
+                 max_length: int = LOCAL_MODEL_MAX_LENGTH, num_threads: int = LOCAL_MODEL_THREADS):
+        try:
+            import torch
+            from transformers import AutoTokenizer, AutoModelForSequenceClassification
+        except ImportError as e:
+            raise RuntimeError(
+                f"Lokal model için torch ve transformers kurulu olmalı: {e}"
+            ) from e
+
+        self._torch = torch
+        if num_threads > 0:
+            torch.set_num_threads(num_threads)
+
+        self.model_path = model_path
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        self.model.eval()
+        super().__init__(
+            AutoTokenizer.from_pretrained(model_path),
+            num_labels=self.model.config.num_labels,
+            batch_size=batch_size,
+            max_length=max_length
+        )
+
+        print(f"✅ Lokal transformer model yüklendi: {model_path}")
+        print(f"   - Label sayısı: {self.num_labels}")
+        print(f"   - Batch size: {batch_size}, max_length: {max_length}, threads: {torch.get_num_threads()}")
+
+    def _logits(self, encoded):
+        with self._torch.inference_mode():
+            return self.model(**encoded).logits.numpy()
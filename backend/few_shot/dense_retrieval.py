@@ -0,0 +1,308 @@
+"""
+Dense retrieval (opsiyonel): sentence embedding + ANN index.
+Eğitim korpusu bir kez embed edilir, vektörler float16 memmap dosyasında
+saklanır ve HNSW index'i ile top-k benzer örnekler milisaniyenin altında bulunur.
+RETRIEVAL_MODE=dense ile FewShotLearningModel._retrieve bu yolu kullanır.
+"""
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple
+import numpy as np
+
+
+class SentenceEncoder:
+    """
+    Lokal sentence embedding modeli. İki format desteklenir:
+    - model.onnx içeren klasör (onnxruntime + tokenizer, mean pooling; torch gerekmez)
+    - sentence-transformers model adı veya klasörü
+    Çıktı L2-normalize float32 vektörlerdir (nokta çarpımı = cosine similarity).
+    """
+
+    def __init__(self, model_name_or_path: str, batch_size: int = 64, max_length: int = 128):
+        self.model_name = model_name_or_path
+        self.batch_size = batch_size
+        self.max_length = max_length
+        path = Path(model_name_or_path)
+
+        if (path / "model.onnx").exists():
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+            self.tokenizer = AutoTokenizer.from_pretrained(str(path))
+            self.session = ort.InferenceSession(str(path / "model.onnx"), providers=["CPUExecutionProvider"])
+            self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+            self.model = None
+            self.dim = int(self.session.get_outputs()[0].shape[-1])
+        else:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise RuntimeError(
+                    f"Dense retrieval için sentence-transformers kurulu olmalı "
+                    f"veya EMBEDDING_MODEL model.onnx içeren bir klasör olmalı: {e}"
+                ) from e
+            self.model = SentenceTransformer(model_name_or_path, device="cpu")
+            self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Metinleri (n, dim) float32 normalize vektörlere çevir"""
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        if self.model is not None:
+            return self.model.encode(
+                list(texts), batch_size=self.batch_size,
+                normalize_embeddings=True, convert_to_numpy=True
+            ).astype(np.float32)
+
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        # Uzunluğa göre sıralı partiler -> daha az padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            encoded = self.tokenizer(
+                [texts[i] for i in indices], padding=True, truncation=True,
+                max_length=self.max_length, return_tensors="np"
+            )
+            feed = {name: np.asarray(encoded[name], dtype=np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feed)[0]
+            # Mean pooling (padding token'ları hariç)
+            mask = feed["attention_mask"][..., None].astype(np.float32)
+            vectors[indices] = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return _normalize(vectors)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+def corpus_fingerprint(model_name: str, texts: List[str]) -> str:
+    """Korpus veya model değişince cache'lenmiş vektörler geçersiz olur"""
+    digest = hashlib.sha1(model_name.encode("utf-8"))
+    for text in texts:
+        digest.update(b"\0" + text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Korpus vektörleri: {directory}/embeddings.f16 (float16 memmap) + meta.json.
+    float32'nin yarısı kadar yer kaplar; sayfalar işletim sistemi tarafından paylaşılır.
+    """
+
+    def __init__(self, directory: Path, vectors: np.memmap, meta: dict):
+        self.directory = directory
+        self.vectors = vectors
+        self.meta = meta
+
+    @staticmethod
+    def _paths(directory: Path):
+        return directory / "embeddings.f16", directory / "meta.json"
+
+    @classmethod
+    def open(cls, directory, fingerprint: str):
+        """Cache'lenmiş vektörleri aç; fingerprint uyuşmazsa None"""
+        directory = Path(directory)
+        vectors_path, meta_path = cls._paths(directory)
+        if not vectors_path.exists() or not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("fingerprint") != fingerprint:
+            return None
+        vectors = np.memmap(vectors_path, dtype=np.float16, mode="r", shape=(meta["count"], meta["dim"]))
+        return cls(directory, vectors, meta)
+
+    @classmethod
+    def build(cls, directory, encoder: SentenceEncoder, texts: List[str], fingerprint: str,
+              chunk_size: int = 1024):
+        """Korpusu parça parça embed edip memmap'e yaz"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        vectors_path, meta_path = cls._paths(directory)
+
+        vectors = np.memmap(vectors_path, dtype=np.float16, mode="w+", shape=(len(texts), encoder.dim))
+        for start in range(0, len(texts), chunk_size):
+            vectors[start:start + chunk_size] = encoder.encode(texts[start:start + chunk_size])
+        vectors.flush()
+        del vectors
+
+        meta = {"fingerprint": fingerprint, "count": len(texts), "dim": encoder.dim, "model": encoder.model_name}
+        # meta en son yazılır: yarım kalmış bir build sonraki açılışta geçersiz sayılır
+        meta_path.write_text(json.dumps(meta), encoding="utf-8")
+        return cls.open(directory, fingerprint)
+
+
+class ExactIndex:
+    """Brute-force inner product (ANN kütüphanesi yoksa ve benchmark'ta referans olarak)"""
+    name = "exact"
+
+    def __init__(self, vectors: np.ndarray, chunk_size: int = 8192):
+        self.vectors = vectors
+        self.chunk_size = chunk_size
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        """Yeni satırlar sona eklenir (ids = mevcut satır sayısından itibaren ardışık)"""
+        # Yeni dizi oluşturulup tek atamayla değiştirilir; devam eden aramalar eski diziyi görür
+        self.vectors = np.concatenate([np.asarray(self.vectors), vectors.astype(self.vectors.dtype)])
+
+    def search(self, queries: np.ndarray, k: int, allowed: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """allowed: id başına bool maske (verilirse sadece True olan satırlar aranır)"""
+        vectors = self.vectors
+        k = min(k, len(vectors) if allowed is None else int(allowed[:len(vectors)].sum()))
+        if k == 0:
+            return np.zeros((len(queries), 0), dtype=np.int64), np.zeros((len(queries), 0), dtype=np.float32)
+        scores = np.empty((len(queries), len(vectors)), dtype=np.float32)
+        for start in range(0, len(vectors), self.chunk_size):
+            block = np.asarray(vectors[start:start + self.chunk_size], dtype=np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        if allowed is not None:
+            mask = np.zeros(len(vectors), dtype=bool)
+            mask[:len(allowed)] = allowed[:len(vectors)]
+            scores[:, ~mask] = -np.inf
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+class HnswIndex:
+    """hnswlib HNSW index (inner product; vektörler normalize olduğundan = cosine)"""
+    name = "hnsw"
+
+    def __init__(self, index):
+        self.index = index
+        # resize_index, eşzamanlı knn_query ile güvenli değil
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, M: int = 16, ef_construction: int = 200, ef_search: int = 64,
+              chunk_size: int = 8192):
+        import hnswlib
+        index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        index.init_index(max_elements=max(len(vectors), 1), M=M, ef_construction=ef_construction)
+        for start in range(0, len(vectors), chunk_size):
+            block = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+            index.add_items(block, np.arange(start, start + len(block)))
+        index.set_ef(ef_search)
+        return cls(index)
+
+    @classmethod
+    def load(cls, path, dim: int, ef_search: int = 64):
+        import hnswlib
+        index = hnswlib.Index(space="ip", dim=dim)
+        index.load_index(str(path))
+        index.set_ef(ef_search)
+        return cls(index)
+
+    def save(self, path) -> None:
+        self.index.save_index(str(path))
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        """Yeni vektörleri ekle; kapasite yetmezse index iki katına büyütülür"""
+        with self._lock:
+            needed = self.index.get_current_count() + len(vectors)
+            if needed > self.index.get_max_elements():
+                self.index.resize_index(max(needed, 2 * self.index.get_max_elements()))
+            self.index.add_items(np.asarray(vectors, dtype=np.float32), ids)
+
+    def search(self, queries: np.ndarray, k: int, allowed: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """allowed: id başına bool maske; hnswlib filter'ı ile graf üzerinde filtrelenir"""
+        if allowed is not None:
+            return self._search_filtered(queries, k, allowed)
+        with self._lock:
+            k = min(k, self.index.get_current_count())
+            labels, distances = self.index.knn_query(queries, k=k)
+        # hnswlib "ip" uzaklığı = 1 - iç çarpım
+        return labels.astype(np.int64), (1.0 - distances).astype(np.float32)
+
+    def _search_filtered(self, queries: np.ndarray, k: int, allowed: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        ids = np.nonzero(allowed)[0]
+        k = min(k, len(ids))
+        if k == 0:
+            return np.zeros((len(queries), 0), dtype=np.int64), np.zeros((len(queries), 0), dtype=np.float32)
+        size = len(allowed)
+        try:
+            with self._lock:
+                labels, distances = self.index.knn_query(
+                    queries, k=k, num_threads=1, filter=lambda i: i < size and bool(allowed[i])
+                )
+        except RuntimeError:
+            # Seyrek filtrede graf k sonuç bulamayabilir: izinli satırlarda exact arama
+            with self._lock:
+                vectors = np.asarray(self.index.get_items(ids), dtype=np.float32)
+            top, scores = ExactIndex(vectors).search(queries, k)
+            return ids[top], scores
+        # hnswlib "ip" uzaklığı = 1 - iç çarpım
+        return labels.astype(np.int64), (1.0 - distances).astype(np.float32)
+
+
+class DenseRetriever:
+    """Encoder + memmap vektörler + ANN index; korpus değişmedikçe diskten yüklenir"""
+
+    def __init__(self, texts: List[str], encoder: SentenceEncoder, directory,
+                 M: int = 16, ef_construction: int = 200, ef_search: int = 64, cache=None):
+        self.encoder = encoder
+        self.cache = cache
+        # Sorgular cache üzerinden embed edilir; korpus cache'i doldurmaz
+        if cache is not None:
+            from .embedding_cache import CachedEncoder
+            self.query_encoder = CachedEncoder(encoder, cache)
+        else:
+            self.query_encoder = encoder
+        directory = Path(directory)
+        fingerprint = corpus_fingerprint(encoder.model_name, texts)
+
+        self.store = EmbeddingStore.open(directory, fingerprint)
+        rebuilt = self.store is None
+        if rebuilt:
+            print(f"🔄 Korpus embed ediliyor ({len(texts)} örnek, {encoder.model_name})...")
+            self.store = EmbeddingStore.build(directory, encoder, texts, fingerprint)
+
+        index_path = directory / "index.hnsw"
+        try:
+            if not rebuilt and index_path.exists():
+                self.index = HnswIndex.load(index_path, encoder.dim, ef_search=ef_search)
+            else:
+                self.index = HnswIndex.build(self.store.vectors, M=M, ef_construction=ef_construction,
+                                             ef_search=ef_search)
+                self.index.save(index_path)
+        except ImportError:
+            print("⚠️ hnswlib kurulu değil, exact search kullanılacak")
+            self.index = ExactIndex(self.store.vectors)
+
+        print("✅ Dense retrieval hazır")
+        print(f"   - Vektörler: {self.store.vectors.shape} float16 ({directory})")
+        print(f"   - Index: {self.index.name}")
+
+    def add(self, texts: List[str], start: int) -> None:
+        """
+        Yeni örnekleri index'e ekle (id'ler start'tan itibaren korpus sırası).
+        Embedding korpustan bağımsız olduğundan ekleme tam rebuild ile aynı sonucu verir;
+        diskteki store bir sonraki açılışta fingerprint değiştiği için yeniden oluşturulur.
+        """
+        vectors = self.query_encoder.encode(list(texts))
+        self.index.add(vectors, np.arange(start, start + len(vectors)))
+
+    def search(self, texts: List[str], limit: int) -> List[List[Tuple[int, float]]]:
+        """Her sorgu için (korpus index'i, similarity) listesi, benzerliğe göre azalan"""
+        queries = self.query_encoder.encode(list(texts))
+        indices, scores = self.index.search(queries, limit)
+        return _hit_lists(indices, scores)
+
+    def search_by_label(self, texts: List[str], labels: np.ndarray, per_label: int) -> List[Dict[int, List[Tuple[int, float]]]]:
+        """Her sorgu için {etiket: (korpus index'i, similarity) listesi}; sorgular bir kez embed edilir"""
+        queries = self.query_encoder.encode(list(texts))
+        results = [{} for _ in texts]
+        for label in np.unique(labels):
+            indices, scores = self.index.search(queries, per_label, allowed=labels == label)
+            for result, hits in zip(results, _hit_lists(indices, scores)):
+                result[int(label)] = hits
+        return results
+
+
+def _hit_lists(indices: np.ndarray, scores: np.ndarray) -> List[List[Tuple[int, float]]]:
+    return [
+        [(int(i), float(score)) for i, score in zip(row_indices, row_scores) if i >= 0]
+        for row_indices, row_scores in zip(indices, scores)
+    ]
@@ -0,0 +1,184 @@
+"""
+Gelen yorumlar için kalıcı embedding cache'i.
+Anahtar: normalize edilmiş metnin hash'i. Vektörler sabit kapasiteli float16
+memmap dosyasında, anahtar -> slot index'i LRU sırasıyla ayrı dosyada tutulur.
+Tekrarlanan ve sadece büyük/küçük harf veya boşlukla farklılaşan yorumlar
+yeniden embed edilmez.
+"""
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Tuple
+import numpy as np
+
+
+# str.lower() Türkçe I/İ'yi yanlış çevirir ("I" -> "i", "İ" -> "i̇")
+_TURKISH_UPPER = str.maketrans({"I": "ı", "İ": "i"})
+
+
+def normalize_text(text: str) -> str:
+    """Cache anahtarı için normalizasyon: NFC, Türkçe küçük harf, tek boşluk"""
+    text = unicodedata.normalize("NFC", str(text)).translate(_TURKISH_UPPER).lower()
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def text_key(text: str) -> str:
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    {directory}/vectors.f16: (capacity, dim) float16 memmap
+    {directory}/index.json: model, dim, LRU sırasıyla [anahtar, slot] listesi
+    Index yalnızca vektörler diske yazıldıktan sonra (atomik olarak) güncellenir.
+    Kapasite dolunca kayıtlar toplu çıkarılır ve slotları, çıkarılan anahtarlar
+    diskteki index'ten silinmeden yeniden kullanılmaz (çökme sonrası eski anahtar
+    yeni metnin vektörünü döndürmez).
+    """
+
+    def __init__(self, directory, dim: int, capacity: int, model_name: str, flush_every: int = 256):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.capacity = capacity
+        self.model_name = model_name
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # anahtar -> slot (en eski başta)
+        self._dirty = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        vectors_path = self.directory / "vectors.f16"
+        index_path = self.directory / "index.json"
+        meta = None
+        if index_path.exists() and vectors_path.exists():
+            meta = json.loads(index_path.read_text(encoding="utf-8"))
+        valid = (
+            meta is not None
+            and meta.get("model") == model_name
+            and meta.get("dim") == dim
+            and meta.get("capacity") == capacity
+        )
+        self.vectors = np.memmap(
+            vectors_path, dtype=np.float16, mode="r+" if valid else "w+", shape=(capacity, dim)
+        )
+        if valid:
+            self._entries = OrderedDict((key, slot) for key, slot in meta["entries"])
+        self._free = sorted(set(range(capacity)) - set(self._entries.values()), reverse=True)
+
+        atexit.register(self.flush)
+        print(f"✅ Embedding cache: {len(self._entries)}/{capacity} kayıt ({self.directory})")
+
+    def get_many(self, keys: List[str]) -> Tuple[np.ndarray, List[int]]:
+        """
+        Toplu okuma. (vektörler, eksik pozisyonlar) döndürür; eksik satırlar sıfırdır.
+        Bulunan anahtarlar LRU'da en yeniye taşınır.
+        """
+        vectors = np.zeros((len(keys), self.dim), dtype=np.float32)
+        missing = []
+        with self._lock:
+            for position, key in enumerate(keys):
+                slot = self._entries.get(key)
+                if slot is None:
+                    missing.append(position)
+                    continue
+                self._entries.move_to_end(key)
+                vectors[position] = self.vectors[slot]
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return vectors, missing
+
+    def put_many(self, keys: List[str], vectors: np.ndarray) -> None:
+        """Toplu yazma; kapasite doluysa en az kullanılan kayıtlar çıkarılır"""
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                slot = self._entries.get(key)
+                if slot is None:
+                    if not self._free:
+                        self._evict_locked(max(len(keys), self.flush_every))
+                    slot = self._free.pop()
+                    self._entries[key] = slot
+                else:
+                    self._entries.move_to_end(key)
+                self.vectors[slot] = vector
+            self._dirty += len(keys)
+            should_flush = self._dirty >= self.flush_every
+        if should_flush:
+            self.flush()
+
+    def _evict_locked(self, count: int) -> None:
+        """
+        En az kullanılan `count` kaydı çıkar. Slotlar ancak çıkarılan anahtarlar
+        diskteki index'ten silindikten sonra boş listeye döner; toplu çıkarma bu
+        index yazımını flush_every kayıtta bire indirir.
+        """
+        evicted = [self._entries.popitem(last=False)[1] for _ in range(min(count, len(self._entries)))]
+        self.evictions += len(evicted)
+        self._write_index_locked()
+        self._free.extend(evicted)
+
+    def _write_index_locked(self) -> None:
+        """Vektörleri diske yaz, sonra index'i atomik olarak değiştir (kilit tutulurken)"""
+        self.vectors.flush()
+        index = {
+            "model": self.model_name,
+            "dim": self.dim,
+            "capacity": self.capacity,
+            "entries": list(self._entries.items()),
+        }
+        tmp_path = self.directory / "index.json.tmp"
+        tmp_path.write_text(json.dumps(index), encoding="utf-8")
+        os.replace(tmp_path, self.directory / "index.json")
+        self._dirty = 0
+
+    def flush(self) -> None:
+        """Vektörleri diske yaz, sonra index'i atomik olarak değiştir"""
+        with self._lock:
+            if self._dirty:
+                self._write_index_locked()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class CachedEncoder:
+    """SentenceEncoder önüne cache: sadece gerçekten yeni metinler embed edilir"""
+
+    def __init__(self, encoder, cache: EmbeddingCache):
+        self.encoder = encoder
+        self.cache = cache
+        self.model_name = encoder.model_name
+        self.dim = encoder.dim
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        keys = [text_key(text) for text in texts]
+        vectors, missing = self.cache.get_many(keys)
+        if missing:
+            # Aynı parti içindeki tekrarlar da bir kez embed edilir
+            new_keys = list(dict.fromkeys(keys[i] for i in missing))
+            first_text = {}
+            for i in missing:
+                first_text.setdefault(keys[i], texts[i])
+            new_vectors = self.encoder.encode([first_text[key] for key in new_keys])
+            self.cache.put_many(new_keys, new_vectors)
+            by_key = dict(zip(new_keys, new_vectors))
+            for i in missing:
+                vectors[i] = by_key[keys[i]]
+        return vectors
@@ -1,178 +1,314 @@
 """
 Few-Shot Model Değerlendirme Scripti
-Test veri seti üzerinde classification report çıkartır.
+Test veri seti üzerinde seçilen sınıflandırıcıyı (fewshot/llm, local, onnx, linear,
+tfidf, cascade) değerlendirir: accuracy, macro-F1, confusion matrix, gecikme
+yüzdelikleri ve 1000 yorum başına tahmini LLM maliyeti.
+
+Tahminler sınırlı eşzamanlılıkla yapılır ve her biri geldiği anda sonuç dosyasına
+(JSON lines) yazılır; yarıda kalan bir çalışma aynı komutla kaldığı yerden devam eder.
+
+Kullanım (herhangi bir klasörden):
+    python backend/few_shot/evaluate_fewshot_model.py
+    python backend/few_shot/evaluate_fewshot_model.py --backend cascade --concurrency 8
+    python backend/few_shot/evaluate_fewshot_model.py --backend linear --fresh
 """
 
-import pandas as pd
+import argparse
+import contextlib
+import io
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
+
 import numpy as np
-from few_shot.fewshot_model import few_shot_model
-from config import DATA_DIR
-import time
+import pandas as pd
+from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, f1_score
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config import DATA_DIR, CATEGORY_NAMES
+from backend.classifiers import CLASSIFIER_BACKENDS, get_classifier
+from backend.few_shot.fewshot_model import LLM_MESSAGE
+
+# "llm" = few-shot Gemini yolu
+BACKEND_ALIASES = {"llm": "fewshot"}
+
+
+def load_test_set(test_file: str) -> pd.DataFrame:
+    """comment,label (veya text,label) CSV'si ya da JSON listesi"""
+    test_path = Path(test_file)
+    if not test_path.is_absolute() and not test_path.exists():
+        test_path = DATA_DIR / test_file
+    if test_path.suffix == ".json":
+        df = pd.read_json(test_path)
+    else:
+        df = pd.read_csv(test_path, encoding='utf-8')
+    if "comment" not in df.columns and "text" in df.columns:
+        df = df.rename(columns={"text": "comment"})
+    # Boş satırları temizle
+    df = df.dropna(subset=['comment', 'label']).reset_index(drop=True)
+    df["comment"] = df["comment"].astype(str)
+    df["label"] = df["label"].astype(int)
+    return df
+
+
+def load_checkpoint(results_path: Path) -> dict:
+    """Önceki çalışmanın tamamlanmış tahminleri: (index, yorum) -> kayıt"""
+    done = {}
+    if results_path.exists():
+        with open(results_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Yarım yazılmış son satır
+                done[(record["index"], record["comment"])] = record
+    return done
 
-def evaluate_fewshot_model(test_file: str = "test_set_siber_zorbalik_v2.csv"):
+
+def run_predictions(classifier, df: pd.DataFrame, results_path: Path, concurrency: int = 4) -> list:
     """
-    Test veri seti üzerinde few-shot modeli değerlendir.
-    
-    Args:
-        test_file: Test veri seti dosya adı
+    Eksik tahminleri en fazla `concurrency` eşzamanlı istekle yap; her sonuç dosyaya eklenir.
+    Hata veren yorumlar kaydedilmez, bir sonraki çalışmada tekrar denenir.
     """
-    print("=" * 80)
-    print("FEW-SHOT MODEL DEĞERLENDİRME")
-    print("=" * 80)
-    
-    # Test veri setini yükle
-    test_path = DATA_DIR / test_file
-    print(f"\n📂 Test veri seti yükleniyor: {test_path}")
-    
-    try:
-        df = pd.read_csv(test_path, encoding='utf-8')
-        # Boş satırları temizle
-        df = df.dropna(subset=['comment', 'label'])
-        print(f"✅ {len(df)} test örneği yüklendi")
-        
-    except Exception as e:
-        print(f"❌ Veri yükleme hatası: {e}")
-        return
-    
-    # Kategori isimleri
-    category_names = {
-        0: "No Harassment / Neutral",
-        1: "Direct Insult / Profanity",
-        2: "Sexist / Sexual Implication",
-        3: "Sarcasm / Microaggression",
-        4: "Appearance-based Criticism"
+    done = load_checkpoint(results_path)
+    items = [(index, row.comment, int(row.label)) for index, row in enumerate(df.itertuples())]
+    pending = [item for item in items if item[:2] not in done]
+    print(f"📊 {len(done)} tahmin checkpoint'ten yüklendi, {len(pending)} tahmin yapılacak")
+
+    def predict(index, comment, true_label):
+        started = time.perf_counter()
+        result = classifier.predict(comment)
+        return {
+            "index": index,
+            "comment": comment,
+            "true_label": true_label,
+            "predicted_label": int(result["category"]),
+            "confidence": float(result["confidence"]),
+            "message": result.get("message", ""),
+            "latency_s": round(time.perf_counter() - started, 4),
+        }
+
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    lock = threading.Lock()
+    errors = 0
+    started = time.perf_counter()
+    with open(results_path, "a", encoding="utf-8") as output, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(predict, *item) for item in pending]
+        for completed, future in enumerate(as_completed(futures), 1):
+            try:
+                record = future.result()
+            except Exception as e:
+                errors += 1
+                print(f"❌ Tahmin hatası: {e}")
+                continue
+            with lock:
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                done[(record["index"], record["comment"])] = record
+            if completed % 25 == 0 or completed == len(pending):
+                elapsed = time.perf_counter() - started
+                print(f"   [{completed}/{len(pending)}] {completed / elapsed:.1f} yorum/s")
+
+    if errors:
+        print(f"⚠️ {errors} tahmin başarısız oldu (tekrar çalıştırınca yeniden denenecek)")
+    # Test seti değiştiyse checkpoint'teki eski kayıtlar dahil edilmez
+    return [done[item[:2]] for item in items if item[:2] in done]
+
+
+def estimate_prompt_tokens(comments: list, sample_size: int = 20) -> float:
+    """Few-shot prompt'unun ortalama tahmini token sayısı (örneklem üzerinden)"""
+    from backend.few_shot.fewshot_model import few_shot_model
+    from backend.few_shot.prompt_builder import estimate_tokens
+    sample = comments[:sample_size]
+    if not sample:
+        return 0.0
+    with contextlib.redirect_stdout(io.StringIO()):
+        sizes = [estimate_tokens(few_shot_model.create_enhanced_prompt(comment)) for comment in sample]
+    return float(np.mean(sizes))
+
+
+def summarize(records: list, input_price: float, output_price: float, output_tokens: int = 2) -> dict:
+    """Doğruluk, macro-F1, confusion matrix, gecikme ve LLM maliyeti"""
+    y_true = np.array([record["true_label"] for record in records])
+    y_pred = np.array([record["predicted_label"] for record in records])
+    latencies = np.array([record["latency_s"] for record in records])
+    llm_calls = sum(1 for record in records if record["message"].endswith(LLM_MESSAGE))
+
+    cost_per_1k = 0.0
+    prompt_tokens = 0.0
+    if llm_calls:
+        prompt_tokens = estimate_prompt_tokens(
+            [record["comment"] for record in records if record["message"].endswith(LLM_MESSAGE)]
+        )
+        cost_per_call = (prompt_tokens * input_price + output_tokens * output_price) / 1e6
+        cost_per_1k = cost_per_call * llm_calls / len(records) * 1000
+
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+    return {
+        "samples": len(records),
+        "accuracy": round(float(accuracy_score(y_true, y_pred)), 4),
+        "macro_f1": round(float(f1_score(y_true, y_pred, average="macro", labels=list(range(5)), zero_division=0)), 4),
+        "avg_confidence": round(float(np.mean([record["confidence"] for record in records])), 4),
+        "confusion_matrix": confusion_matrix(y_true, y_pred, labels=list(range(5))).tolist(),
+        "latency_ms": {
+            "p50": round(float(p50) * 1000, 2),
+            "p90": round(float(p90) * 1000, 2),
+            "p99": round(float(p99) * 1000, 2),
+            "mean": round(float(latencies.mean()) * 1000, 2),
+        },
+        "llm_calls": llm_calls,
+        "llm_call_rate": round(llm_calls / len(records), 4),
+        "avg_prompt_tokens": round(prompt_tokens, 1),
+        "cost_per_1k_comments_usd": round(cost_per_1k, 5),
     }
-    
-    # Tahminleri topla
-    y_true = []
-    y_pred = []
-    confidences = []
-    
-    print("\n" + "=" * 80)
-    print("TAHMİNLER YAPILIYOR...")
-    print("=" * 80)
-    
-    for idx, row in df.iterrows():
-        comment = row['comment']
-        true_label = int(row['label'])
-        
-        print(f"\n[{idx + 1}/{len(df)}] Yorum: '{comment}'")
-        print(f"Gerçek Label: {true_label} ({category_names[true_label]})")
-        
-        # Tahmin yap
-        try:
-            result = few_shot_model.predict_with_few_shot(comment)
-            predicted_label = result['category']
-            confidence = result['confidence']
-            
-            y_true.append(true_label)
-            y_pred.append(predicted_label)
-            confidences.append(confidence)
-            
-            # Sonuç
-            match_status = "✅" if predicted_label == true_label else "❌"
-            print(f"{match_status} Tahmin: {predicted_label} ({category_names[predicted_label]})")
-            print(f"   Güven: {confidence:.3f}")
-            
-            # API rate limit için kısa bekleme
-            time.sleep(0.5)
-            
-        except Exception as e:
-            print(f"❌ Tahmin hatası: {e}")
-            # Hata durumunda varsayılan değer
-            y_true.append(true_label)
-            y_pred.append(0)  # Varsayılan: Zararsız
-            confidences.append(0.5)
-            time.sleep(1)  # Hata durumunda daha uzun bekle
-    
-    # Değerlendirme metrikleri hesapla
+
+
+def print_report(records: list, summary: dict):
+    """Classification report, confusion matrix ve kategori bazında analiz"""
+    y_true = [record["true_label"] for record in records]
+    y_pred = [record["predicted_label"] for record in records]
+
     print("\n" + "=" * 80)
     print("DEĞERLENDIRME SONUÇLARI")
     print("=" * 80)
-    
-    # Accuracy
-    accuracy = accuracy_score(y_true, y_pred)
-    print(f"\n📊 Genel Doğruluk (Accuracy): {accuracy:.4f} ({accuracy*100:.2f}%)")
-    
-    # Ortalama güven
-    avg_confidence = np.mean(confidences)
-    print(f"📊 Ortalama Güven Skoru: {avg_confidence:.4f}")
-    
-    # Classification Report
+    print(f"\n📊 Genel Doğruluk (Accuracy): {summary['accuracy']:.4f} ({summary['accuracy']*100:.2f}%)")
+    print(f"📊 Macro-F1: {summary['macro_f1']:.4f}")
+    print(f"📊 Ortalama Güven Skoru: {summary['avg_confidence']:.4f}")
+    latency = summary["latency_ms"]
+    print(f"⏱️ Gecikme: p50 {latency['p50']}ms, p90 {latency['p90']}ms, p99 {latency['p99']}ms")
+    print(f"💰 LLM çağrısı: {summary['llm_calls']} (%{summary['llm_call_rate']*100:.1f}), "
+          f"1000 yorum başına ~${summary['cost_per_1k_comments_usd']:.4f}")
+    if "prompt" in summary:
+        prompt = summary["prompt"]
+        print(f"📝 Prompt ({prompt['mode']}): ortalama ~{prompt['avg_tokens']} token, en fazla {prompt['max_tokens']}")
+
     print("\n" + "=" * 80)
     print("CLASSIFICATION REPORT")
     print("=" * 80)
-    
-    target_names = [f"{i}: {category_names[i]}" for i in range(5)]
-    report = classification_report(
-        y_true, 
-        y_pred, 
-        target_names=target_names,
-        digits=4,
-        zero_division=0
-    )
-    print(report)
-    
-    # Confusion Matrix
+    target_names = [f"{i}: {CATEGORY_NAMES[i]}" for i in range(5)]
+    print(classification_report(y_true, y_pred, labels=list(range(5)), target_names=target_names,
+                                digits=4, zero_division=0))
+
     print("\n" + "=" * 80)
     print("CONFUSION MATRIX")
     print("=" * 80)
-    
-    cm = confusion_matrix(y_true, y_pred, labels=[0, 1, 2, 3, 4])
-    
+    cm = summary["confusion_matrix"]
     print("\n    ", end="")
     for i in range(5):
         print(f"Pred-{i:>2}", end=" ")
     print()
     print("    " + "-" * 50)
-    
     for i in range(5):
         print(f"True-{i} |", end=" ")
         for j in range(5):
             print(f"{cm[i][j]:>6}", end=" ")
         print()
-    
-    # Her kategori için detaylı analiz
+
     print("\n" + "=" * 80)
     print("KATEGORİ BAZINDA DETAYLI ANALİZ")
     print("=" * 80)
-    
+    y_true, y_pred = np.array(y_true), np.array(y_pred)
     for i in range(5):
-        true_count = np.sum(np.array(y_true) == i)
-        pred_count = np.sum(np.array(y_pred) == i)
-        correct_count = np.sum((np.array(y_true) == i) & (np.array(y_pred) == i))
-        
-        if true_count > 0:
-            category_accuracy = correct_count / true_count
-        else:
-            category_accuracy = 0.0
-        
-        print(f"\n📌 Kategori {i}: {category_names[i]}")
+        true_count = int(np.sum(y_true == i))
+        pred_count = int(np.sum(y_pred == i))
+        correct_count = int(np.sum((y_true == i) & (y_pred == i)))
+        category_accuracy = correct_count / true_count if true_count else 0.0
+        print(f"\n📌 Kategori {i}: {CATEGORY_NAMES[i]}")
         print(f"   - Gerçek örnekler: {true_count}")
         print(f"   - Tahmin edilen: {pred_count}")
         print(f"   - Doğru tahmin: {correct_count}")
         print(f"   - Kategori doğruluğu: {category_accuracy:.4f} ({category_accuracy*100:.2f}%)")
-    
-    # Sonuçları kaydet
-    results_df = pd.DataFrame({
-        'comment': df['comment'],
-        'true_label': y_true,
-        'predicted_label': y_pred,
-        'confidence': confidences,
-        'correct': [1 if t == p else 0 for t, p in zip(y_true, y_pred)]
-    })
-    
-    output_path = DATA_DIR / "fewshot_evaluation_results.csv"
-    results_df.to_csv(output_path, index=False, encoding='utf-8')
+
+
+def evaluate_fewshot_model(test_file: str = "test_set_siber_zorbalik_v2.csv", backend: str = "fewshot",
+                           concurrency: int = 4, results_file: str = None, fresh: bool = False,
+                           input_price: float = 0.10, output_price: float = 0.40) -> dict:
+    """
+    Test veri seti üzerinde seçilen backend'i değerlendir.
+
+    Args:
+        test_file: Test veri seti (DATA_DIR'e göre veya tam yol)
+        backend: llm/fewshot, local, onnx, linear, tfidf veya cascade
+        concurrency: Eşzamanlı tahmin sayısı
+        results_file: Checkpoint dosyası (JSON lines); verilmezse data/evaluation_runs altında
+        fresh: Checkpoint'i silip baştan başla
+        input_price / output_price: 1M token başına LLM fiyatı (USD)
+
+    Returns:
+        Özet metrikler
+    """
+    backend = BACKEND_ALIASES.get(backend, backend)
+    print("=" * 80)
+    print(f"MODEL DEĞERLENDİRME ({backend})")
+    print("=" * 80)
+
+    df = load_test_set(test_file)
+    print(f"✅ {len(df)} test örneği yüklendi: {test_file}")
+
+    results_path = Path(results_file) if results_file else \
+        DATA_DIR / "evaluation_runs" / f"{backend}_{Path(test_file).stem}.jsonl"
+    if fresh and results_path.exists():
+        results_path.unlink()
+
+    classifier = get_classifier(backend)
+    records = run_predictions(classifier, df, results_path, concurrency=concurrency)
+    if not records:
+        print("❌ Hiç tahmin yapılamadı")
+        return {}
+
+    summary = {"backend": backend, "test_file": str(test_file), **summarize(records, input_price, output_price)}
+    # Bu çalışmada oluşturulan prompt'ların boyutu (PROMPT_MODE A/B karşılaştırması için)
+    from backend.few_shot.fewshot_model import few_shot_model
+    prompt_stats = few_shot_model.prompt_builder.stats()
+    if prompt_stats["prompts"]:
+        summary["prompt"] = prompt_stats
+    print_report(records, summary)
+
+    summary_path = results_path.with_suffix(".summary.json")
+    summary_path.write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    # Satır bazında sonuçlar (önceki CSV formatı)
+    output_path = DATA_DIR / f"{backend}_evaluation_results.csv"
+    pd.DataFrame({
+        'comment': [record["comment"] for record in records],
+        'true_label': [record["true_label"] for record in records],
+        'predicted_label': [record["predicted_label"] for record in records],
+        'confidence': [record["confidence"] for record in records],
+        'correct': [int(record["true_label"] == record["predicted_label"]) for record in records],
+    }).to_csv(output_path, index=False, encoding='utf-8')
     print(f"\n💾 Detaylı sonuçlar kaydedildi: {output_path}")
-    
+    print(f"💾 Özet: {summary_path}")
+
     print("\n" + "=" * 80)
     print("DEĞERLENDİRME TAMAMLANDI")
     print("=" * 80)
+    return summary
 
 
-if __name__ == "__main__":
-    evaluate_fewshot_model()
+def main():
+    parser = argparse.ArgumentParser(description="Sınıflandırıcı değerlendirme")
+    parser.add_argument("--test-file", default="test_set_siber_zorbalik_v2.csv")
+    parser.add_argument("--backend", default="fewshot",
+                        choices=sorted(set(CLASSIFIER_BACKENDS) | set(BACKEND_ALIASES)))
+    parser.add_argument("--concurrency", type=int, default=4, help="Eşzamanlı tahmin (Gemini rate limit'ine göre)")
+    parser.add_argument("--results-file", default=None, help="Checkpoint dosyası (JSON lines)")
+    parser.add_argument("--fresh", action="store_true", help="Checkpoint'i yok say, baştan başla")
+    parser.add_argument("--input-price", type=float, default=0.10, help="1M input token fiyatı (USD)")
+    parser.add_argument("--output-price", type=float, default=0.40, help="1M output token fiyatı (USD)")
+    args = parser.parse_args()
 
+    evaluate_fewshot_model(
+        test_file=args.test_file, backend=args.backend, concurrency=args.concurrency,
+        results_file=args.results_file, fresh=args.fresh,
+        input_price=args.input_price, output_price=args.output_price
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,34 +2,72 @@ from typing import List, Dict
 import pandas as pd
 from pathlib import Path
 import os
-import google.generativeai as genai
 import unicodedata
 import re
+import functools
+import threading
+import time
+import scipy.sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 from config import DATA_DIR
+from backend.metrics import RETRIEVAL_SECONDS, RETRIEVAL_QUERIES
+from backend.tracing import span, traced
+from .llm_clients import create_llm_client, GeminiClient
+from .prompt_builder import PromptBuilder
+from .embedding_cache import normalize_text
+
+# Gemini'nin cevap verdiği tahminlerin mesajı (fallback'lerden ve fake istemciden ayırt etmek için)
+LLM_MESSAGE = GeminiClient.message
+
+
+def _observe_retrieval(op: str):
+    """Toplu arama metodlarının süresini ve sorgu sayısını /metrics'e ve trace'e yaz"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, texts, *args, **kwargs):
+            RETRIEVAL_QUERIES.inc(len(texts), op=op)
+            with RETRIEVAL_SECONDS.time(op=op), span(f"retrieval.{op}", queries=len(texts)):
+                return method(self, texts, *args, **kwargs)
+        return wrapper
+    return decorator
+
 
 class FewShotLearningModel:
     """
     Few-Shot Learning model using Gemini API with static training data.
     """
     def __init__(self):
+        # training_data / vectorizer / tfidf_matrix birlikte değişir (ekleme ve refit swap'ı)
+        self._index_lock = threading.RLock()
+        self._refit_thread = None
+        self.appended_since_refit = 0
+        self.refits = 0
+        self.last_refit = None
+        # Etikete göre bloklanmış TF-IDF matrisi / etiket dizisi (korpus değişince yeniden kurulur)
+        self._label_blocks_cache = None
+        self._labels_cache = None
+        
         self.training_data = self._load_training_data()
+        # Korpustaki metinlerin normalize anahtarları (eklemelerde tekrarları atlamak için)
+        self._text_keys = {normalize_text(ex["text"]) for ex in self.training_data}
         self.static_examples = self._select_static_examples()
         
         # TF-IDF vectorizer oluştur
         self._prepare_tfidf_vectorizer()
         
-        # Gemini API'yi yapılandır
-        from config import GEMINI_API_KEY
-        if GEMINI_API_KEY:
-            genai.configure(api_key=GEMINI_API_KEY)
-            self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
-            print("✅ Gemini 2.0 Flash API configured for few-shot learning")
-        else:
-            self.model = None
-            print("⚠️ GEMINI_API_KEY not found, falling back to majority vote")
+        # Opsiyonel dense retrieval (RETRIEVAL_MODE=dense)
+        self._prepare_dense_retriever()
+        
+        # Gemini yokken/hata verdiğinde kullanılacak lineer model (ilk ihtiyaçta yüklenir)
+        self._fallback = None
+        
+        # LLM istemcisi (LLM_CLIENT: gemini veya ağsız fake); None ise fallback'ler kullanılır
+        self.model = create_llm_client()
+        
+        # Token bütçeli prompt oluşturucu (prompt boyutu istatistiklerini de tutar)
+        self.prompt_builder = self._create_prompt_builder()
     
     def _load_training_data(self) -> List[Dict[str, any]]:
         """Load training data from static CSV file."""
@@ -74,6 +112,8 @@ class FewShotLearningModel:
                 except (ValueError, KeyError, TypeError) as e:
                     continue
             
+            training_data.extend(self._load_additions())
+            
             print(f"✅ Loaded {len(training_data)} training examples from {dataset_path}")
             print(f"📊 Dataset shape: {df.shape}")
             print(f"📊 Label distribution:")
@@ -89,6 +129,25 @@ class FewShotLearningModel:
             print(f"❌ Error loading training data: {e}")
             return []
     
+    def _load_additions(self) -> List[Dict[str, any]]:
+        """Çalışma zamanında eklenmiş örnekler (TRAINING_ADDITIONS_PATH)"""
+        from config import TRAINING_ADDITIONS_PATH
+        if not os.path.exists(TRAINING_ADDITIONS_PATH):
+            return []
+        try:
+            df = pd.read_csv(TRAINING_ADDITIONS_PATH, encoding='utf-8', on_bad_lines='skip', engine='python')
+            df = df.dropna(subset=["text", "label"])
+            additions = [
+                {"text": str(text), "label": int(label)}
+                for text, label in zip(df["text"], df["label"])
+                if int(label) in range(5)
+            ]
+            print(f"✅ Loaded {len(additions)} added examples from {TRAINING_ADDITIONS_PATH}")
+            return additions
+        except Exception as e:
+            print(f"⚠️ Eklenen örnekler okunamadı: {e}")
+            return []
+    
     def _select_static_examples(self) -> Dict[int, List[Dict[str, any]]]:
         """Her kategoriden 5 manuel seçilmiş karakteristik örnek"""
         static_examples = {
@@ -157,27 +216,178 @@ class FewShotLearningModel:
             List of examples with text, label, and similarity score
         """
         try:
-            if not self.training_data:
-                return []
-            
-            # Calculate similarities
-            similarities = []
-            for example in self.training_data:
-                similarity = self._calculate_similarity(text, example["text"])
-                similarities.append({
-                    "text": example["text"],
-                    "label": example["label"],
-                    "similarity": similarity
-                })
-            
-            # Sort by similarity and return top examples
-            similarities.sort(key=lambda x: x["similarity"], reverse=True)
-            return similarities[:limit]
-            
+            return self._retrieve([text], limit)[0]
         except Exception as e:
             print(f"Error getting similar examples: {e}")
             return []
     
+    @_observe_retrieval("top_k")
+    def _retrieve(self, texts: List[str], limit: int, chunk_size: int = 256) -> List[List[Dict[str, any]]]:
+        """
+        Batch retrieval: tüm sorgular için benzer örnekleri tek matris çarpımıyla bul.
+        TF-IDF satırları L2-normalize olduğundan nokta çarpımı = cosine similarity.
+        """
+        if not self.training_data:
+            return [[] for _ in texts]
+        
+        if self.dense_retriever is not None:
+            hits = self.dense_retriever.search(texts, limit)
+            # Arama sonrası okunur: index'e eklenen her id için örnek listede zaten var
+            training_data = self.training_data
+            return [
+                [
+                    {
+                        "text": training_data[i]["text"],
+                        "label": training_data[i]["label"],
+                        "similarity": similarity
+                    }
+                    for i, similarity in row
+                ]
+                for row in hits
+            ]
+        
+        training_data, vectorizer, tfidf_matrix = self._snapshot()
+        if vectorizer is None or tfidf_matrix is None:
+            return self._rank_pairwise(texts, training_data, limit)
+        
+        results = []
+        for start in range(0, len(texts), chunk_size):
+            query_matrix = vectorizer.transform(texts[start:start + chunk_size])
+            scores = (query_matrix @ tfidf_matrix.T).toarray()
+            # Stable sort: eşit skorlarda veri seti sırası korunur
+            top_indices = np.argsort(-scores, axis=1, kind="stable")[:, :limit]
+            for row, indices in enumerate(top_indices):
+                results.append([
+                    {
+                        "text": training_data[i]["text"],
+                        "label": training_data[i]["label"],
+                        "similarity": float(scores[row, i])
+                    }
+                    for i in indices
+                ])
+        return results
+    
+    def _rank_pairwise(self, texts: List[str], training_data: List[Dict], limit: int) -> List[List[Dict[str, any]]]:
+        """Vectorizer yokken fallback: her sorguyu örneklerle tek tek karşılaştır (Jaccard)"""
+        results = []
+        for text in texts:
+            similarities = [
+                {"text": ex["text"], "label": ex["label"], "similarity": self._calculate_similarity(text, ex["text"])}
+                for ex in training_data
+            ]
+            similarities.sort(key=lambda x: x["similarity"], reverse=True)
+            results.append(similarities[:limit])
+        return results
+    
+    def get_examples_by_label(self, text: str, per_label: int = 5) -> Dict[int, List[Dict[str, any]]]:
+        """Her kategoriden en benzer per_label örnek: {etiket: [örnek, ...]}"""
+        try:
+            return self._retrieve_by_label([text], per_label)[0]
+        except Exception as e:
+            print(f"Error getting similar examples: {e}")
+            return {}
+    
+    @_observe_retrieval("by_label")
+    def _retrieve_by_label(self, texts: List[str], per_label: int = 5, chunk_size: int = 256) -> List[Dict[int, List[Dict[str, any]]]]:
+        """
+        Etiket bazında top-k: tek matris çarpımı, ardından her etiket bloğunda argpartition.
+        Global top-k her zaman etiket bazındaki top-k'ların birleşiminin içindedir
+        (bkz. _merge_neighbours), bu yüzden ayrı bir global arama gerekmez.
+        """
+        if not self.training_data:
+            return [{} for _ in texts]
+        
+        if self.dense_retriever is not None:
+            training_data = self.training_data
+            hits = self.dense_retriever.search_by_label(texts, self._labels_array(training_data), per_label)
+            return [
+                {
+                    label: [
+                        {"text": training_data[i]["text"], "label": label, "similarity": similarity}
+                        for i, similarity in row
+                    ]
+                    for label, row in result.items()
+                }
+                for result in hits
+            ]
+        
+        training_data, vectorizer, tfidf_matrix = self._snapshot()
+        if vectorizer is None or tfidf_matrix is None:
+            results = []
+            # Dekoratörsüz yardımcı: arama /metrics'te yalnızca "by_label" olarak sayılır
+            for ranked in self._rank_pairwise(texts, training_data, limit=len(training_data)):
+                by_label = {}
+                for ex in ranked:
+                    by_label.setdefault(ex["label"], [])
+                    if len(by_label[ex["label"]]) < per_label:
+                        by_label[ex["label"]].append(ex)
+                results.append(by_label)
+            return results
+        
+        order, offsets, blocked = self._label_blocks(training_data, tfidf_matrix)
+        results = []
+        for start in range(0, len(texts), chunk_size):
+            query_matrix = vectorizer.transform(texts[start:start + chunk_size])
+            scores = (query_matrix @ blocked.T).toarray()
+            chunk_results = [{} for _ in range(scores.shape[0])]
+            for label in range(5):
+                begin, end = offsets[label], offsets[label + 1]
+                if begin == end:
+                    continue
+                segment = scores[:, begin:end]
+                k = min(per_label, end - begin)
+                top = np.argpartition(-segment, k - 1, axis=1)[:, :k]
+                top_scores = np.take_along_axis(segment, top, axis=1)
+                ranked = np.argsort(-top_scores, axis=1, kind="stable")
+                top = np.take_along_axis(top, ranked, axis=1) + begin
+                top_scores = np.take_along_axis(top_scores, ranked, axis=1)
+                for row, (indices, row_scores) in enumerate(zip(top, top_scores)):
+                    chunk_results[row][label] = [
+                        {"text": training_data[order[j]]["text"], "label": label, "similarity": float(score)}
+                        for j, score in zip(indices, row_scores)
+                    ]
+            results.extend(chunk_results)
+        return results
+    
+    def _label_blocks(self, training_data, tfidf_matrix):
+        """
+        Satırları etikete göre (stabil) sıralanmış CSR matris: her etiket ardışık bir blok.
+        (order, offsets, blocked) döndürür; blocked[offsets[c]:offsets[c+1]] = etiket c.
+        """
+        cached = self._label_blocks_cache
+        if cached is not None and cached[0] is tfidf_matrix:
+            return cached[1:]
+        labels = self._labels_array(training_data)
+        order = np.argsort(labels, kind="stable")
+        offsets = np.searchsorted(labels[order], np.arange(6))
+        blocked = tfidf_matrix[order]
+        self._label_blocks_cache = (tfidf_matrix, order, offsets, blocked)
+        return order, offsets, blocked
+    
+    def _labels_array(self, training_data) -> np.ndarray:
+        cached = self._labels_cache
+        if cached is not None and cached[0] is training_data:
+            return cached[1]
+        labels = np.array([ex["label"] for ex in training_data], dtype=np.int64)
+        self._labels_cache = (training_data, labels)
+        return labels
+    
+    @staticmethod
+    def _merge_neighbours(examples_by_label: Dict[int, List[Dict]], limit: int) -> List[Dict[str, any]]:
+        """Etiket bazındaki listelerden global top-k"""
+        merged = [ex for examples in examples_by_label.values() for ex in examples]
+        merged.sort(key=lambda ex: ex["similarity"], reverse=True)
+        return merged[:limit]
+    
+    @staticmethod
+    def _similarity_profile(examples_by_label: Dict[int, List[Dict]], k: int = 3) -> Dict[int, float]:
+        """Kategori başına en benzer k örneğin ortalama benzerliği"""
+        profile = {}
+        for label in range(5):
+            similarities = [ex["similarity"] for ex in examples_by_label.get(label, [])[:k]]
+            profile[label] = float(np.mean(similarities)) if similarities else 0.0
+        return profile
+    
     def _normalize_text(self, text: str) -> str:
         """Normalize Turkish text for better similarity matching."""
         if not text:
@@ -207,13 +417,7 @@ class FewShotLearningModel:
             training_texts = [ex['text'] for ex in self.training_data]
             
             # TF-IDF vectorizer oluştur
-            self.vectorizer = TfidfVectorizer(
-                max_features=1000,
-                ngram_range=(1, 2),  # Unigram ve bigram
-                lowercase=True,
-                analyzer='word',
-                token_pattern=r'\b\w+\b'
-            )
+            self.vectorizer = self._build_vectorizer()
             
             # Training data'yı vektorize et
             self.tfidf_matrix = self.vectorizer.fit_transform(training_texts)
@@ -226,6 +430,175 @@ class FewShotLearningModel:
             self.vectorizer = None
             self.tfidf_matrix = None
     
+    @staticmethod
+    def _build_vectorizer() -> TfidfVectorizer:
+        return TfidfVectorizer(
+            max_features=1000,
+            ngram_range=(1, 2),  # Unigram ve bigram
+            lowercase=True,
+            analyzer='word',
+            token_pattern=r'\b\w+\b'
+        )
+    
+    def _snapshot(self):
+        """Tutarlı (training_data, vectorizer, tfidf_matrix) üçlüsü; satırlar örneklerle hizalı"""
+        with self._index_lock:
+            return self.training_data, self.vectorizer, self.tfidf_matrix
+    
+    def add_training_examples(self, examples: List[Dict[str, any]]) -> Dict[str, any]:
+        """
+        Yeni etiketli örnekleri yeniden eğitmeden retrieval index'ine ekle.
+        TF-IDF: sabit vocabulary ile yeni CSR satırları; dense: ANN insert.
+        Örnekler TRAINING_ADDITIONS_PATH'e yazılır (yeniden başlatmada yüklenir).
+        Korpusta veya aynı partide zaten olan metinler (normalize_text ile) atlanır.
+        REFIT_AFTER_APPENDS eklemeden sonra arka planda tam refit planlanır.
+        
+        Returns:
+            {"added": int, "duplicates": int, "retrieval": retrieval_stats()}
+        """
+        from config import TRAINING_ADDITIONS_PATH, REFIT_AFTER_APPENDS
+        new_examples = []
+        for ex in examples:
+            text = str(ex.get("text", "")).strip()
+            label = int(ex.get("label", -1))
+            if not text or label not in range(5):
+                raise ValueError(f"Geçersiz örnek: {ex!r} (boş olmayan metin ve 0-4 arası etiket gerekli)")
+            new_examples.append({"text": text, "label": label})
+        
+        with self._index_lock:
+            # Aynı metin top-k'yı tek başına doldurmasın diye bir kez eklenir
+            unique_examples = []
+            for ex in new_examples:
+                key = normalize_text(ex["text"])
+                if key not in self._text_keys:
+                    self._text_keys.add(key)
+                    unique_examples.append(ex)
+            duplicates = len(new_examples) - len(unique_examples)
+            new_examples = unique_examples
+            if not new_examples:
+                return {"added": 0, "duplicates": duplicates, "retrieval": self.retrieval_stats()}
+            texts = [ex["text"] for ex in new_examples]
+            
+            start = len(self.training_data)
+            if self.vectorizer is not None and self.tfidf_matrix is not None:
+                rows = self.vectorizer.transform(texts)
+                self.tfidf_matrix = sp.vstack([self.tfidf_matrix, rows], format="csr")
+            # Yeni liste: devam eden okumalar eski (tutarlı) listeyi kullanmaya devam eder
+            self.training_data = self.training_data + new_examples
+            if self.dense_retriever is not None:
+                self.dense_retriever.add(texts, start)
+            self.appended_since_refit += len(new_examples)
+            
+            header = not os.path.exists(TRAINING_ADDITIONS_PATH)
+            pd.DataFrame(new_examples).to_csv(
+                TRAINING_ADDITIONS_PATH, mode="a", header=header, index=False, encoding="utf-8"
+            )
+            needs_refit = self.vectorizer is None or (
+                REFIT_AFTER_APPENDS > 0 and self.appended_since_refit >= REFIT_AFTER_APPENDS
+            )
+        
+        print(f"✅ {len(new_examples)} örnek index'e eklendi (toplam {start + len(new_examples)}, {duplicates} tekrar atlandı)")
+        if needs_refit:
+            self.schedule_refit()
+        return {"added": len(new_examples), "duplicates": duplicates, "retrieval": self.retrieval_stats()}
+    
+    def schedule_refit(self) -> bool:
+        """TF-IDF'i arka planda baştan eğit; zaten çalışıyorsa False"""
+        with self._index_lock:
+            if self._refit_thread is not None and self._refit_thread.is_alive():
+                return False
+            self._refit_thread = threading.Thread(target=self._refit, name="tfidf-refit", daemon=True)
+            self._refit_thread.start()
+            return True
+    
+    def _refit(self):
+        """
+        Vocabulary ve IDF'i güncel korpusla yeniden hesapla; istekler eski index'le
+        sürerken yeni index hazırlanır ve tek kilit altında değiştirilir.
+        """
+        try:
+            started = time.perf_counter()
+            training_data, _, _ = self._snapshot()
+            vectorizer = self._build_vectorizer()
+            tfidf_matrix = vectorizer.fit_transform([ex["text"] for ex in training_data])
+            
+            with self._index_lock:
+                # Refit sürerken eklenenler yeni vocabulary ile sona eklenir
+                pending = self.training_data[len(training_data):]
+                if pending:
+                    rows = vectorizer.transform([ex["text"] for ex in pending])
+                    tfidf_matrix = sp.vstack([tfidf_matrix, rows], format="csr")
+                self.vectorizer = vectorizer
+                self.tfidf_matrix = tfidf_matrix
+                self.appended_since_refit = len(pending)
+                self.refits += 1
+                self.last_refit = {
+                    "corpus_size": tfidf_matrix.shape[0],
+                    "vocabulary_size": len(vectorizer.vocabulary_),
+                    "duration_s": round(time.perf_counter() - started, 3),
+                    "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                }
+            print(f"✅ TF-IDF refit tamamlandı: {self.last_refit}")
+        except Exception as e:
+            print(f"⚠️ TF-IDF refit hatası (eski index kullanılmaya devam ediyor): {e}")
+    
+    def _prepare_dense_retriever(self):
+        """RETRIEVAL_MODE=dense ise embedding + ANN index hazırla; hata olursa TF-IDF'e düş"""
+        from config import RETRIEVAL_MODE
+        self.dense_retriever = None
+        if RETRIEVAL_MODE != "dense" or not self.training_data:
+            return
+        try:
+            from config import (
+                EMBEDDING_MODEL, EMBEDDINGS_DIR, ANN_M, ANN_EF_CONSTRUCTION, ANN_EF_SEARCH,
+                EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_DIR
+            )
+            from .dense_retrieval import SentenceEncoder, DenseRetriever
+            from .embedding_cache import EmbeddingCache
+            encoder = SentenceEncoder(EMBEDDING_MODEL)
+            cache = None
+            if EMBEDDING_CACHE_SIZE > 0:
+                cache = EmbeddingCache(EMBEDDING_CACHE_DIR, encoder.dim, EMBEDDING_CACHE_SIZE, encoder.model_name)
+            self.dense_retriever = DenseRetriever(
+                [ex["text"] for ex in self.training_data],
+                encoder,
+                EMBEDDINGS_DIR,
+                M=ANN_M,
+                ef_construction=ANN_EF_CONSTRUCTION,
+                ef_search=ANN_EF_SEARCH,
+                cache=cache
+            )
+        except Exception as e:
+            print(f"⚠️ Dense retrieval hazırlanamadı, TF-IDF kullanılacak: {e}")
+            self.dense_retriever = None
+    
+    @staticmethod
+    def _create_prompt_builder() -> PromptBuilder:
+        from config import (
+            PROMPT_TOKEN_BUDGET, PROMPT_MAX_INPUT_TOKENS, PROMPT_MAX_EXAMPLE_TOKENS, PROMPT_DEDUP_THRESHOLD, PROMPT_MODE
+        )
+        return PromptBuilder(
+            budget=PROMPT_TOKEN_BUDGET,
+            max_input_tokens=PROMPT_MAX_INPUT_TOKENS,
+            max_example_tokens=PROMPT_MAX_EXAMPLE_TOKENS,
+            dedup_threshold=PROMPT_DEDUP_THRESHOLD,
+            mode=PROMPT_MODE
+        )
+    
+    def retrieval_stats(self) -> Dict[str, any]:
+        """Retrieval modu ve (varsa) embedding cache istatistikleri"""
+        stats = {
+            "mode": "dense" if self.dense_retriever is not None else "tfidf",
+            "corpus_size": len(self.training_data),
+            "appended_since_refit": self.appended_since_refit,
+            "refits": self.refits,
+            "refit_running": self._refit_thread is not None and self._refit_thread.is_alive(),
+            "last_refit": self.last_refit,
+        }
+        if self.dense_retriever is not None and self.dense_retriever.cache is not None:
+            stats["embedding_cache"] = self.dense_retriever.cache.stats()
+        return stats
+    
     def _calculate_similarity(self, text1: str, text2: str) -> float:
         """
         Calculate text similarity using TF-IDF + Cosine Similarity.
@@ -260,12 +633,16 @@ class FewShotLearningModel:
         
         return intersection / union if union > 0 else 0.0
     
-    def create_enhanced_prompt(self, text: str) -> str:
+    def create_enhanced_prompt(self, text: str, similar_examples: List[Dict] = None,
+                               examples_by_label: Dict[int, List[Dict]] = None) -> str:
         """
         Create enhanced prompt with static + dynamic few-shot examples.
+        Örnekler kompakt kodlanır ve prompt PROMPT_TOKEN_BUDGET ile sınırlanır (PromptBuilder).
         
         Args:
             text: Text to analyze
+            similar_examples: Önceden bulunmuş benzer örnekler (yoksa burada aranır)
+            examples_by_label: Kategori bazında en benzer örnekler (nadir kategoriler için)
             
         Returns:
             Enhanced prompt string
@@ -273,80 +650,51 @@ class FewShotLearningModel:
         print(f"\n🔍 Input Text: '{text}'")
         print("="*60)
         
-        # 1. Statik örnekler (her kategoriden 5'er)
-        static_examples_str = "\n🔸 SABİT ÖRNEKLER (Her kategoriden 5'er):\n"
-        for category in range(5):
-            category_name = self._get_category_name(category)
-            static_examples_str += f"\n--- Kategori {category}: {category_name} ---\n"
-            
-            examples = self.static_examples.get(category, [])[:5]
-            for i, ex in enumerate(examples, 1):
-                static_examples_str += f'{i}. "{ex["text"]}" -> {category}\n'
-        
-        print(static_examples_str)
-        
-        # 2. Dinamik benzer örnekler (en benzer 5)
-        similar_examples = self.get_few_shot_examples(text, limit=5)
+        # Dinamik benzer örnekler (en benzer 5)
+        if similar_examples is None:
+            similar_examples = self.get_few_shot_examples(text, limit=5)
         
-        dynamic_examples_str = "\n🔸 DİNAMİK BENZER ÖRNEKLER (En benzer 5):\n"
         print("\n📊 En Benzer 5 Örnek:")
         print("-" * 60)
-        
         for i, ex in enumerate(similar_examples, 1):
             category_name = self._get_category_name(ex["label"])
-            similarity = ex.get("similarity", 0)
-            dynamic_examples_str += f'{i}. "{ex["text"]}" -> {ex["label"]} ({category_name}) [Benzerlik: {similarity:.2f}]\n'
-            
             print(f"{i}. \"{ex['text']}\"")
             print(f"   → Category: {ex['label']} ({category_name})")
-            print(f"   → Similarity: {similarity:.3f}\n")
+            print(f"   → Similarity: {ex.get('similarity', 0):.3f}\n")
         
-        # Prompt'u oluştur
-        examples_for_prompt = "\n\nEĞİTİM ÖRNEKLERİ:\n"
+        # Kategori bazında en benzerler: global top-5 tek kategoriden gelse de her kategori temsil edilir
+        stratified_examples = self._stratified_prompt_examples(similar_examples, examples_by_label)
         
-        # Statik örnekleri ekle
-        for category in range(5):
-            examples = self.static_examples.get(category, [])[:5]
-            for ex in examples:
-                category_name = self._get_category_name(ex["label"])
-                examples_for_prompt += f'"{ex["text"]}" -> {ex["label"]} ({category_name})\n'
-        
-        # Dinamik benzer örnekleri ekle
-        examples_for_prompt += "\n💡 İNPUT'A EN BENZER ÖRNEKLER:\n"
-        for ex in similar_examples:
-            category_name = self._get_category_name(ex["label"])
-            similarity = ex.get("similarity", 0)
-            examples_for_prompt += f'"{ex["text"]}" -> {ex["label"]} ({category_name}) [Benzerlik: {similarity:.2f}]\n'
+        # Statikler dinamik/kategori bazındaki örneklerle çakışıyorsa atılır, bütçe dolunca kısılır
+        prompt, info = self.prompt_builder.build(text, similar_examples, stratified_examples, self.static_examples)
         
-        # Enhanced prompt
-        prompt = f"""
-Sen bir yorum sınıflandırma uzmanısın. Aşağıdaki yorumu analiz et ve kategorilerden birine sınıflandır.
-
-KATEGORİLER:
-0: No Harassment / Neutral (Zararsız/Nötr) - Normal, zararsız yorumlar
-1: Direct Insult / Profanity (Doğrudan Hakaret/Küfür) - Açık hakaret ve küfür
-2: Sexist / Sexual Implication (Cinsiyetçi/Cinsel İmada Bulunma) - Cinsiyetçi veya cinsel içerik
-3: Sarcasm / Microaggression (Alaycı/Mikroagresyon) - Alaycı veya gizli saldırganlık
-4: Appearance-based Criticism (Görünüm Temelli Eleştiri) - Fiziksel görünüm eleştirisi
-
-ÖNEMLİ KURALLAR:
-- "kadın", "erkek" gibi kelimeler tek başına zararlı DEĞİLDİR
-- Önce eğitim örneklerini öğren, sonra input'a benzer örneklere odaklan
-{examples_for_prompt}
-
-ŞİMDİ ANALİZ EDİLECEK YORUM:
-"{text}"
-
-Sadece kategori numarasını (0-4 arası) döndür. Açıklama yapma, sadece sayıyı ver.
-"""
         print("\n" + "="*60)
-        print("✅ Prompt hazırlandı:")
-        print(f"   - Statik örnekler: {sum(len(exs) for exs in self.static_examples.values())} adet")
-        print(f"   - Dinamik örnekler: {len(similar_examples)} adet")
+        print(f"✅ Prompt hazırlandı (~{info['tokens']} token, {self.prompt_builder.mode}, bütçe {self.prompt_builder.budget}):")
+        print(f"   - Statik örnekler: {info['static']} adet")
+        print(f"   - Dinamik örnekler: {info['dynamic']} adet")
+        print(f"   - Kategori bazında örnekler: {info['stratified']} adet")
+        if info["deduplicated"] or info["dropped"] or info["truncated"]:
+            print(f"   - Tekrar: {info['deduplicated']}, bütçe dışı: {info['dropped']}, kısaltılan: {info['truncated']}")
         print("="*60 + "\n")
         
         return prompt
     
+    def _stratified_prompt_examples(self, similar_examples: List[Dict],
+                                    examples_by_label: Dict[int, List[Dict]]) -> List[Dict[str, any]]:
+        """Her kategoriden STRATIFIED_PROMPT_EXAMPLES örnek; global listede olanlar ve sıfır benzerlikler hariç"""
+        from config import STRATIFIED_PROMPT_EXAMPLES
+        if not examples_by_label or STRATIFIED_PROMPT_EXAMPLES <= 0:
+            return []
+        already_shown = {ex["text"] for ex in similar_examples or []}
+        selected = []
+        for label in range(5):
+            candidates = [
+                ex for ex in examples_by_label.get(label, [])
+                if ex["text"] not in already_shown and ex["similarity"] > 0
+            ]
+            selected.extend(candidates[:STRATIFIED_PROMPT_EXAMPLES])
+        return selected
+    
     def _get_category_name(self, category: int) -> str:
         """Get category name from number."""
         category_names = {
@@ -358,22 +706,32 @@ Sadece kategori numarasını (0-4 arası) döndür. Açıklama yapma, sadece say
         }
         return category_names.get(category, "Unknown")
     
-    def predict_with_few_shot(self, text: str) -> Dict[str, any]:
+    def predict_with_few_shot(self, text: str, similar_examples: List[Dict] = None,
+                              examples_by_label: Dict[int, List[Dict]] = None) -> Dict[str, any]:
         """
         Predict using Gemini with few-shot learning from static training data.
         
         Args:
             text: Text to analyze
+            similar_examples: Önceden bulunmuş benzer örnekler (predict_batch için)
+            examples_by_label: Önceden bulunmuş kategori bazında benzer örnekler
             
         Returns:
             Prediction results
         """
         try:
+            # Benzer örnekler bir kez bulunur; prompt, confidence ve fallback aynısını kullanır.
+            # Kategori bazındaki arama global top-5'i de verir (tek matris çarpımı).
+            if similar_examples is None:
+                if examples_by_label is None:
+                    examples_by_label = self.get_examples_by_label(text, per_label=5)
+                similar_examples = self._merge_neighbours(examples_by_label, limit=5)
+            
             if self.model:
                 try:
                     # Gemini API ile analiz
-                    enhanced_prompt = self.create_enhanced_prompt(text)
-                    response = self.model.generate_content(enhanced_prompt)
+                    enhanced_prompt = self.create_enhanced_prompt(text, similar_examples, examples_by_label)
+                    response = self.model.generate_content(enhanced_prompt, examples=similar_examples)
                     prediction_text = response.text.strip()
                     
                     # Sayıyı çıkar
@@ -381,20 +739,38 @@ Sadece kategori numarasını (0-4 arası) döndür. Açıklama yapma, sadece say
                     
                     if prediction in range(5):
                         # Confidence hesaplama - benzer örneklerin ortalamasına göre
-                        similar_examples = self.get_few_shot_examples(text, limit=5)
-                        confidence = self._calculate_confidence(text, prediction, similar_examples)
+                        confidence = self._calculate_confidence(text, prediction, similar_examples, examples_by_label)
                         
                         return {
                             "category": prediction,
                             "confidence": round(confidence, 3),
-                            "message": "Gemini API + Few-shot learning"
+                            "message": self.model.message
                         }
                 except Exception as api_error:
                     print(f"Gemini API hatası: {api_error}")
                     # API hatası durumunda fallback'e geç
             
-            # Fallback: majority vote from similar examples
-            examples = self.get_few_shot_examples(text, limit=5)
+            # Fallback 1: eğitilmiş TF-IDF lineer model
+            fallback = self._get_fallback()
+            if fallback is not None:
+                result = fallback.predict(text)
+                result["message"] = f"{fallback.message} (fallback)"
+                return result
+            
+            # Fallback 2: kategori benzerlik profili (çoğunluk sınıfına yığılmayı önler)
+            if examples_by_label:
+                profile = self._similarity_profile(examples_by_label)
+                total = sum(profile.values())
+                if total > 0:
+                    prediction = max(profile, key=profile.get)
+                    return {
+                        "category": prediction,
+                        "confidence": round(profile[prediction] / total * 0.7, 3),
+                        "message": "Per-category similarity vote"
+                    }
+            
+            # Fallback 3: majority vote from similar examples
+            examples = similar_examples
             if not examples:
                 return self._default_response()
             
@@ -418,7 +794,62 @@ Sadece kategori numarasını (0-4 arası) döndür. Açıklama yapma, sadece say
                 "message": f"Error: {str(e)}"
             }
     
-    def _calculate_confidence(self, text: str, predicted_category: int, similar_examples: List[Dict]) -> float:
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, any]]:
+        """
+        Birden fazla metni tek geçişte sınıflandır.
+        Tekrarlanan metinler bir kez tahmin edilir; benzer örnekler toplu aranır.
+        
+        Args:
+            texts: Texts to analyze
+            
+        Returns:
+            Prediction results in input order
+        """
+        unique_texts = list(dict.fromkeys(texts))
+        
+        # Gemini yoksa tüm parti tek seferde lineer modelle skorlanır
+        fallback = self._get_fallback() if self.model is None else None
+        if fallback is not None:
+            results = fallback.predict_batch(unique_texts)
+            for result in results:
+                result["message"] = f"{fallback.message} (fallback)"
+            predictions = dict(zip(unique_texts, results))
+            return [dict(predictions[text]) for text in texts]
+        
+        try:
+            neighbours = self._retrieve_by_label(unique_texts, per_label=5)
+        except Exception as e:
+            print(f"Error getting similar examples: {e}")
+            neighbours = [{} for _ in unique_texts]
+        
+        predictions = {
+            text: self.predict_with_few_shot(
+                text,
+                similar_examples=self._merge_neighbours(by_label, limit=5),
+                examples_by_label=by_label
+            )
+            for text, by_label in zip(unique_texts, neighbours)
+        }
+        return [dict(predictions[text]) for text in texts]
+
+    def _get_fallback(self):
+        """Lineer fallback modeli; model dosyası yoksa None (majority vote kullanılır)"""
+        if self._fallback is None:
+            try:
+                from backend.classifiers import get_classifier
+                self._fallback = get_classifier("linear")
+            except Exception as e:
+                print(f"⚠️ Lineer fallback model yüklenemedi, majority vote kullanılacak: {e}")
+                self._fallback = False
+        return self._fallback or None
+    
+    def predict(self, text: str) -> Dict[str, any]:
+        """Classifier backend arayüzü (backend.classifiers) için tek metin tahmini"""
+        return self.predict_with_few_shot(text)
+
+    @traced("confidence")
+    def _calculate_confidence(self, text: str, predicted_category: int, similar_examples: List[Dict],
+                              examples_by_label: Dict[int, List[Dict]] = None) -> float:
         """
         Confidence skorunu akıllıca hesapla.
         
@@ -426,17 +857,30 @@ Sadece kategori numarasını (0-4 arası) döndür. Açıklama yapma, sadece say
         1. En benzer örneğin similarity skoru (ağırlık: 0.4)
         2. Benzer örneklerdeki kategori tutarlılığı (ağırlık: 0.4)
         3. Base confidence (ağırlık: 0.2)
+        
+        examples_by_label verilirse 1 ve 2 kategori benzerlik profilinden hesaplanır:
+        tahmin edilen kategorinin en benzer örneği ve profilinin en güçlü kategoriye oranı.
         """
         if not similar_examples:
             return 0.50  # Düşük confidence
         
-        # 1. En yüksek benzerlik skoru
-        max_similarity = similar_examples[0].get('similarity', 0)
-        similarity_score = max_similarity  # 0.0 - 1.0
-        
-        # 2. Kategori tutarlılığı (benzer örneklerin kaçı aynı kategoriyi gösteriyor?)
-        same_category_count = sum(1 for ex in similar_examples if ex['label'] == predicted_category)
-        consistency_score = same_category_count / len(similar_examples)  # 0.0 - 1.0
+        if examples_by_label:
+            profile = self._similarity_profile(examples_by_label)
+            predicted_examples = examples_by_label.get(predicted_category, [])
+            max_similarity = predicted_examples[0]["similarity"] if predicted_examples else 0.0
+            similarity_score = max_similarity
+            strongest = max(profile.values())
+            consistency_score = profile[predicted_category] / strongest if strongest > 0 else 0.0
+            consistency_label = "Profil oranı"
+        else:
+            # 1. En yüksek benzerlik skoru
+            max_similarity = similar_examples[0].get('similarity', 0)
+            similarity_score = max_similarity  # 0.0 - 1.0
+            
+            # 2. Kategori tutarlılığı (benzer örneklerin kaçı aynı kategoriyi gösteriyor?)
+            same_category_count = sum(1 for ex in similar_examples if ex['label'] == predicted_category)
+            consistency_score = same_category_count / len(similar_examples)  # 0.0 - 1.0
+            consistency_label = f"Tutarlılık ({same_category_count}/{len(similar_examples)})"
         
         # 3. Base confidence
         base_confidence = 0.70
@@ -453,7 +897,7 @@ Sadece kategori numarasını (0-4 arası) döndür. Açıklama yapma, sadece say
         
         print(f"📊 Confidence Hesaplama:")
         print(f"   - En yüksek benzerlik: {max_similarity:.3f}")
-        print(f"   - Tutarlılık ({same_category_count}/{len(similar_examples)}): {consistency_score:.3f}")
+        print(f"   - {consistency_label}: {consistency_score:.3f}")
         print(f"   - Base: {base_confidence:.3f}")
         print(f"   - Final Confidence: {final_confidence:.3f}")
         
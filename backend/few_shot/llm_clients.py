@@ -0,0 +1,219 @@
+"""
+LLM istemcileri.
+predict_with_few_shot yalnızca generate_content(prompt, examples=None) -> .text
+arayüzünü kullanır; istemci LLM_CLIENT ayarıyla seçilir:
+
+  - gemini: Google Gemini API (GOOGLE_API_KEY gerekir)
+  - fake: ağsız, deterministik istemci. Yanıt süresi ayarlı dağılımdan gelir,
+    503/429 hataları verilen oranlarda üretilir ve cevap retrieval komşularının
+    benzerlik ağırlıklı oylamasıdır. Eşzamanlılık, retry, cache ve batching
+    canlı anahtar olmadan yük testine tabi tutulabilir.
+"""
+import hashlib
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from google.api_core import exceptions as google_exceptions
+from backend.metrics import LLM_REQUEST_SECONDS, LLM_ERRORS
+from backend.tracing import span
+
+
+LLM_CLIENTS = ("gemini", "fake")
+FAKE_LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+
+class LLMResponse:
+    """Gemini yanıtının kullanılan kısmı"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class LLMClient:
+    """Ortak sayaçlar; alt sınıflar _generate'i uygular"""
+    name = "base"
+    # İstemcinin cevapladığı tahminlerin mesajı (fallback'lerden ve diğer istemcilerden ayırt etmek için)
+    message = "LLM + Few-shot learning"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.total_time = 0.0
+
+    def generate_content(self, prompt: str, examples: Optional[List[Dict]] = None):
+        started = time.perf_counter()
+        outcome = "ok"
+        with span("llm.generate_content", client=self.name, prompt_chars=len(prompt)) as current:
+            try:
+                return self._generate(prompt, examples)
+            except google_exceptions.ResourceExhausted:
+                outcome = "rate_limited"
+                with self._lock:
+                    self.rate_limited += 1
+                raise
+            except Exception:
+                outcome = "error"
+                with self._lock:
+                    self.errors += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.calls += 1
+                    self.total_time += elapsed
+                LLM_REQUEST_SECONDS.observe(elapsed, client=self.name, outcome=outcome)
+                if outcome != "ok":
+                    LLM_ERRORS.inc(client=self.name, kind=outcome)
+                if current is not None:
+                    current.set_attribute("outcome", outcome)
+
+    def _generate(self, prompt: str, examples: Optional[List[Dict]]):
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, any]:
+        with self._lock:
+            return {
+                "client": self.name,
+                "calls": self.calls,
+                "errors": self.errors,
+                "rate_limited": self.rate_limited,
+                "avg_latency_ms": round(self.total_time / self.calls * 1000, 2) if self.calls else 0.0,
+            }
+
+
+class GeminiClient(LLMClient):
+    """google.generativeai üzerinden Gemini; retrieval komşuları zaten prompt'ta"""
+    name = "gemini"
+    message = "Gemini API + Few-shot learning"
+
+    def __init__(self, api_key: str, model_name: str):
+        super().__init__()
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self._model = genai.GenerativeModel(model_name)
+
+    def _generate(self, prompt: str, examples: Optional[List[Dict]]):
+        return self._model.generate_content(prompt)
+
+
+class FakeLLMClient(LLMClient):
+    """
+    Deterministik sahte LLM. Gecikme ve hata kararı (seed, prompt, deneme no)
+    üçlüsünden türetilir: aynı istek sırası iş parçacığı zamanlamasından bağımsız
+    olarak aynı sonucu verir, aynı prompt'un tekrar denemesi ise yeni bir çekiliştir.
+    Deneme sayaçları LRU ile sınırlıdır; uzun yük testlerinde bellek büyümez.
+    """
+    name = "fake"
+    message = "Fake LLM + Few-shot learning"
+    max_tracked_prompts = 10000
+
+    def __init__(self, latency: str = "lognormal", latency_ms: float = 400.0, spread: float = 0.5,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, seed: int = 42):
+        super().__init__()
+        if latency not in FAKE_LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Geçersiz LLM_FAKE_LATENCY: {latency} (seçenekler: {', '.join(FAKE_LATENCY_DISTRIBUTIONS)})"
+            )
+        if error_rate + rate_limit_rate > 1:
+            raise ValueError("LLM_FAKE_ERROR_RATE + LLM_FAKE_RATE_LIMIT_RATE 1'i geçemez")
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.spread = spread
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.seed = seed
+        self._attempts = OrderedDict()  # prompt anahtarı -> deneme sayısı (en eski başta)
+
+    def _rng(self, prompt: str) -> random.Random:
+        key = hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).hexdigest()
+        with self._lock:
+            attempt = self._attempts.pop(key, 0)
+            self._attempts[key] = attempt + 1
+            if len(self._attempts) > self.max_tracked_prompts:
+                self._attempts.popitem(last=False)
+        return random.Random(f"{self.seed}:{key}:{attempt}")
+
+    def _sample_latency(self, rng: random.Random) -> float:
+        median = self.latency_ms / 1000
+        if self.latency == "fixed":
+            return median
+        if self.latency == "uniform":
+            return max(0.0, rng.uniform(median * (1 - self.spread), median * (1 + self.spread)))
+        # lognormal: medyanı latency_ms olan sağa çarpık dağılım (uzun kuyruk)
+        return median * rng.lognormvariate(0.0, self.spread)
+
+    @staticmethod
+    def answer(examples: Optional[List[Dict]], prompt: str) -> int:
+        """Komşuların benzerlik ağırlıklı oyu; komşu yoksa prompt hash'inden sabit kategori"""
+        scores = {}
+        for example in examples or []:
+            label = int(example["label"])
+            scores[label] = scores.get(label, 0.0) + float(example.get("similarity", 0.0))
+        if scores and max(scores.values()) > 0:
+            # Eşitlikte küçük kategori id'si (deterministik)
+            return max(sorted(scores), key=scores.get)
+        return int(hashlib.blake2b(prompt.encode("utf-8"), digest_size=4).hexdigest(), 16) % 5
+
+    def _generate(self, prompt: str, examples: Optional[List[Dict]]):
+        rng = self._rng(prompt)
+        delay = self._sample_latency(rng)
+        roll = rng.random()
+        if roll < self.rate_limit_rate:
+            # 429 genelde hızlı döner
+            time.sleep(min(delay, 0.05))
+            raise google_exceptions.ResourceExhausted("Fake LLM: rate limit (429)")
+        time.sleep(delay)
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise google_exceptions.ServiceUnavailable("Fake LLM: service unavailable (503)")
+        return LLMResponse(str(self.answer(examples, prompt)))
+
+    def stats(self) -> Dict[str, any]:
+        stats = super().stats()
+        stats.update({
+            "latency": self.latency,
+            "latency_ms": self.latency_ms,
+            "error_rate": self.error_rate,
+            "rate_limit_rate": self.rate_limit_rate,
+        })
+        return stats
+
+
+def create_llm_client(name: str = None) -> Optional[LLMClient]:
+    """
+    LLM_CLIENT ayarına göre istemci oluştur.
+    Gemini seçili ama anahtar yoksa None (predict_with_few_shot fallback'leri kullanılır).
+    """
+    from config import (
+        LLM_CLIENT, GEMINI_API_KEY, GEMINI_MODEL_NAME, LLM_FAKE_LATENCY, LLM_FAKE_LATENCY_MS,
+        LLM_FAKE_LATENCY_SPREAD, LLM_FAKE_ERROR_RATE, LLM_FAKE_RATE_LIMIT_RATE, LLM_FAKE_SEED
+    )
+
+    name = (name or LLM_CLIENT).strip().lower()
+    if name == "fake":
+        client = FakeLLMClient(
+            latency=LLM_FAKE_LATENCY,
+            latency_ms=LLM_FAKE_LATENCY_MS,
+            spread=LLM_FAKE_LATENCY_SPREAD,
+            error_rate=LLM_FAKE_ERROR_RATE,
+            rate_limit_rate=LLM_FAKE_RATE_LIMIT_RATE,
+            seed=LLM_FAKE_SEED
+        )
+        print(
+            f"🧪 Fake LLM client aktif: {LLM_FAKE_LATENCY} ~{LLM_FAKE_LATENCY_MS:.0f}ms, "
+            f"hata %{LLM_FAKE_ERROR_RATE * 100:.1f}, 429 %{LLM_FAKE_RATE_LIMIT_RATE * 100:.1f}"
+        )
+        return client
+    if name == "gemini":
+        if not GEMINI_API_KEY:
+            print("⚠️ GEMINI_API_KEY not found, falling back to majority vote")
+            return None
+        client = GeminiClient(GEMINI_API_KEY, GEMINI_MODEL_NAME)
+        print(f"✅ {GEMINI_MODEL_NAME} API configured for few-shot learning")
+        return client
+    raise ValueError(f"Bilinmeyen LLM_CLIENT: {name} (seçenekler: {', '.join(LLM_CLIENTS)})")
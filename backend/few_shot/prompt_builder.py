@@ -0,0 +1,269 @@
+"""
+Token bütçeli few-shot prompt oluşturucu.
+
+Şablon metni (rol, kategori açıklamaları, kurallar, talimat) önceki prompt'la
+aynıdır. Örnek satırları kompakt kodlanır ('"yorum" -> etiket', kategori adları
+sadece kategori listesinde), girdiye en benzer örneklerle çakışan statik örnekler
+atılır, uzun yorumlar baştan ve sondan korunarak kısaltılır. Bölümler öncelik
+sırasıyla (şablon + girdi, dinamik komşular, kategori bazındakiler, statikler)
+bütçe dolana kadar eklenir; prompt PROMPT_TOKEN_BUDGET'ı geçmez (bütçe sabit
+şablona bile yetmeyecek kadar küçük değilse). PROMPT_MODE=legacy önceki
+prompt'u aynen üretir (A/B karşılaştırması için).
+
+Token sayısı tokenizer'sız tahmin edilir (kelime parçaları ~4 karakter,
+noktalama ayrı token); Gemini'nin Türkçe sayımına yakın, biraz üstündedir.
+
+Usage:
+    builder = PromptBuilder(budget=1200)
+    prompt, info = builder.build(text, similar_examples, stratified_examples, static_examples)
+"""
+import functools
+import math
+import re
+import threading
+from typing import Dict, List, Tuple
+from config import CATEGORY_NAMES
+from backend.metrics import PROMPT_TOKENS, PROMPT_EXAMPLES_SKIPPED, PROMPT_TRUNCATIONS
+from .embedding_cache import normalize_text
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+ELLIPSIS = " … "
+
+PROMPT_MODES = ("budget", "legacy")
+
+# Şablon metni önceki prompt'la birebir aynıdır; sadece örnek satırları ve bütçe değişir
+HEADER = """
+Sen bir yorum sınıflandırma uzmanısın. Aşağıdaki yorumu analiz et ve kategorilerden birine sınıflandır.
+
+KATEGORİLER:
+0: No Harassment / Neutral (Zararsız/Nötr) - Normal, zararsız yorumlar
+1: Direct Insult / Profanity (Doğrudan Hakaret/Küfür) - Açık hakaret ve küfür
+2: Sexist / Sexual Implication (Cinsiyetçi/Cinsel İmada Bulunma) - Cinsiyetçi veya cinsel içerik
+3: Sarcasm / Microaggression (Alaycı/Mikroagresyon) - Alaycı veya gizli saldırganlık
+4: Appearance-based Criticism (Görünüm Temelli Eleştiri) - Fiziksel görünüm eleştirisi
+
+ÖNEMLİ KURALLAR:
+- "kadın", "erkek" gibi kelimeler tek başına zararlı DEĞİLDİR
+- Önce eğitim örneklerini öğren, sonra input'a benzer örneklere odaklan
+"""
+STATIC_TITLE = "\n\nEĞİTİM ÖRNEKLERİ:\n"
+DYNAMIC_TITLE = "\n💡 İNPUT'A EN BENZER ÖRNEKLER:\n"
+STRATIFIED_TITLE = "\n📂 HER KATEGORİDEN EN BENZER ÖRNEKLER:\n"
+FOOTER = """
+
+ŞİMDİ ANALİZ EDİLECEK YORUM:
+"{text}"
+
+Sadece kategori numarasını (0-4 arası) döndür. Açıklama yapma, sadece sayıyı ver.
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Yaklaşık token sayısı: kelime başına ceil(uzunluk/4), noktalama işaretleri birer token"""
+    return sum(math.ceil(len(piece) / 4) for piece in _WORD_RE.findall(text or ""))
+
+
+def truncate_text(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """
+    max_tokens'ı aşan metni baştan ve sondan kelimeler koruyarak kısalt
+    (hakaret yorumun sonunda da olabilir). Returns: (metin, kısaltıldı mı)
+    """
+    text = re.sub(r"\s+", " ", str(text)).strip()
+    if estimate_tokens(text) <= max_tokens:
+        return text, False
+    words = text.split(" ")
+    keep = max(1, max_tokens - 1)  # "…" için bir token
+    head, tail = [], []
+    used = 0
+    i, j = 0, len(words) - 1
+    while i <= j:
+        # Baştan iki, sondan bir kelime: yorumun başı genelde bağlamı taşır
+        side = head if len(head) < 2 * (len(tail) + 1) else tail
+        word = words[i] if side is head else words[j]
+        cost = estimate_tokens(word)
+        if used + cost > keep:
+            break
+        used += cost
+        if side is head:
+            head.append(word)
+            i += 1
+        else:
+            tail.append(word)
+            j -= 1
+    if not head and not tail:
+        return words[0][:keep * 4] + "…", True
+    return " ".join(head) + ELLIPSIS + " ".join(reversed(tail)), True
+
+
+@functools.lru_cache(maxsize=8192)
+def _word_set(text: str) -> frozenset:
+    return frozenset(normalize_text(text).split())
+
+
+@functools.lru_cache(maxsize=8192)
+def _compact(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """Örnek metni prompt için: kısaltılmış, çift tırnaklar tek tırnağa çevrilmiş (statik/sık örnekler cache'lenir)"""
+    text, truncated = truncate_text(text, max_tokens)
+    return text.replace('"', "'"), truncated
+
+
+def _overlaps(words: frozenset, shown: List[frozenset], threshold: float) -> bool:
+    """Gösterilen örneklerden biriyle Jaccard benzerliği eşiği geçiyor mu"""
+    for other in shown:
+        union = len(words | other)
+        if union and len(words & other) / union >= threshold:
+            return True
+    return False
+
+
+class PromptBuilder:
+    """
+    Bütçeli prompt oluşturma + prompt boyutu istatistikleri.
+    mode="legacy": önceki prompt'un aynısı (kategori adlı örnek satırları, bütçe/tekrar
+    eleme/kısaltma yok); A/B karşılaştırması için istatistikler yine tutulur.
+    """
+
+    def __init__(self, budget: int = 1200, max_input_tokens: int = 400, max_example_tokens: int = 60,
+                 dedup_threshold: float = 0.6, mode: str = "budget"):
+        if mode not in PROMPT_MODES:
+            raise ValueError(f"Geçersiz PROMPT_MODE: {mode} (seçenekler: {', '.join(PROMPT_MODES)})")
+        self.mode = mode
+        self.budget = budget
+        self.max_input_tokens = max_input_tokens
+        self.max_example_tokens = max_example_tokens
+        self.dedup_threshold = dedup_threshold
+        # Statik ve dinamik başlıkları her prompt'ta var (önceki şablondaki gibi)
+        self._fixed_tokens = sum(
+            estimate_tokens(part) for part in (HEADER, STATIC_TITLE, DYNAMIC_TITLE, FOOTER.format(text=""))
+        )
+        self._stratified_title_tokens = estimate_tokens(STRATIFIED_TITLE)
+        self._lock = threading.Lock()
+        self.prompts = 0
+        self.total_tokens = 0
+        self.max_tokens = 0
+        self.truncated = 0
+        self.deduplicated = 0
+        self.dropped = 0
+
+    def _line(self, example: Dict, with_similarity: bool) -> Tuple[str, bool]:
+        similarity = f' [Benzerlik: {example.get("similarity", 0):.2f}]' if with_similarity else ""
+        if self.mode == "legacy":
+            category_name = CATEGORY_NAMES.get(example["label"], "Unknown")
+            return f'"{example["text"]}" -> {example["label"]} ({category_name}){similarity}\n', False
+        text, truncated = _compact(example["text"], self.max_example_tokens)
+        return f'"{text}" -> {example["label"]}{similarity}\n', truncated
+
+    @staticmethod
+    def _render(text: str, lines: Dict[str, List[str]]) -> str:
+        parts = [HEADER, STATIC_TITLE, *lines["static"], DYNAMIC_TITLE, *lines["dynamic"]]
+        if lines["stratified"]:
+            parts += [STRATIFIED_TITLE, *lines["stratified"]]
+        parts.append(FOOTER.format(text=text))
+        return "".join(parts)
+
+    def build(self, text: str, similar_examples: List[Dict], stratified_examples: List[Dict],
+              static_examples: Dict[int, List[Dict]]) -> Tuple[str, Dict[str, int]]:
+        """
+        Returns:
+            (prompt, {"tokens", "dynamic", "stratified", "static", "deduplicated", "dropped", "truncated"})
+        """
+        similar_examples = similar_examples or []
+        stratified_examples = stratified_examples or []
+        if self.mode == "legacy":
+            lines = {
+                "static": [self._line(ex, False)[0] for category in range(5) for ex in static_examples.get(category, [])],
+                "dynamic": [self._line(ex, True)[0] for ex in similar_examples],
+                "stratified": [self._line(ex, True)[0] for ex in stratified_examples],
+            }
+            prompt = self._render(text, lines)
+            info = {section: len(section_lines) for section, section_lines in lines.items()}
+            info.update({"tokens": estimate_tokens(prompt), "deduplicated": 0, "dropped": 0, "truncated": 0})
+            self._record(info)
+            return prompt, info
+
+        truncated = 0
+        # Girdi her zaman sığar; bütçe şablona bile yetmiyorsa girdi en az birkaç token kalır
+        input_budget = max(8, min(self.max_input_tokens, self.budget - self._fixed_tokens))
+        input_text, was_truncated = truncate_text(text, input_budget)
+        truncated += was_truncated
+        remaining = self.budget - self._fixed_tokens - estimate_tokens(input_text)
+
+        # Aynı/çok benzer örnek prompt'ta bir kez görünür (öncelik: dinamik > kategori bazında > statik)
+        shown = []
+        deduplicated = 0
+        candidates = {"dynamic": [], "stratified": [], "static": []}
+        ordered = [("dynamic", (0, i), ex) for i, ex in enumerate(similar_examples)]
+        ordered += [("stratified", (0, i), ex) for i, ex in enumerate(stratified_examples)]
+        # Statikler kategori sırasıyla dönüşümlü seçilir (bütçe kısılınca her kategori eşit azalır),
+        # prompt'a ise önceki gibi kategori sırasıyla yazılır
+        static_lists = [static_examples.get(category, []) for category in range(5)]
+        for rank in range(max((len(examples) for examples in static_lists), default=0)):
+            ordered += [
+                ("static", (category, rank), examples[rank])
+                for category, examples in enumerate(static_lists) if rank < len(examples)
+            ]
+        for section, position, example in ordered:
+            words = _word_set(example["text"])
+            if _overlaps(words, shown, self.dedup_threshold):
+                deduplicated += 1
+                continue
+            shown.append(words)
+            candidates[section].append((position, example))
+
+        # Bütçe: şablon + girdi > dinamik > kategori bazında > statik
+        selected = {section: [] for section in candidates}
+        dropped = 0
+        for section in ("dynamic", "stratified", "static"):
+            for position, example in candidates[section]:
+                line, was_truncated = self._line(example, with_similarity=section != "static")
+                cost = estimate_tokens(line)
+                if section == "stratified" and not selected[section]:
+                    cost += self._stratified_title_tokens
+                if cost > remaining:
+                    dropped += 1
+                    continue
+                remaining -= cost
+                truncated += was_truncated
+                selected[section].append((position, line))
+
+        lines = {section: [line for _, line in sorted(entries)] for section, entries in selected.items()}
+        prompt = self._render(input_text, lines)
+        info = {
+            "tokens": estimate_tokens(prompt),
+            "dynamic": len(lines["dynamic"]),
+            "stratified": len(lines["stratified"]),
+            "static": len(lines["static"]),
+            "deduplicated": deduplicated,
+            "dropped": dropped,
+            "truncated": truncated,
+        }
+        self._record(info)
+        return prompt, info
+
+    def _record(self, info: Dict[str, int]) -> None:
+        with self._lock:
+            self.prompts += 1
+            self.total_tokens += info["tokens"]
+            self.max_tokens = max(self.max_tokens, info["tokens"])
+            self.truncated += info["truncated"]
+            self.deduplicated += info["deduplicated"]
+            self.dropped += info["dropped"]
+        PROMPT_TOKENS.observe(info["tokens"])
+        for reason in ("deduplicated", "dropped"):
+            if info[reason]:
+                PROMPT_EXAMPLES_SKIPPED.inc(info[reason], reason=reason)
+        if info["truncated"]:
+            PROMPT_TRUNCATIONS.inc(info["truncated"])
+
+    def stats(self) -> Dict[str, any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "budget": self.budget,
+                "prompts": self.prompts,
+                "avg_tokens": round(self.total_tokens / self.prompts, 1) if self.prompts else 0.0,
+                "max_tokens": self.max_tokens,
+                "truncated_comments": self.truncated,
+                "deduplicated_examples": self.deduplicated,
+                "dropped_examples": self.dropped,
+            }
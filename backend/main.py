@@ -1,22 +1,30 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 import google.generativeai as genai
 import pandas as pd
 import os
 import json
+import uuid
 from typing import Optional, List, Dict
 import uvicorn
 from datetime import datetime, timedelta
 
-from scrapers.instagram_comments_scraper import scrape_instagram_comments
+from scrapers.instagram_comments_scraper import iter_instagram_comment_batches
 
-from config import LABEL_MAP, REVERSE_LABEL_MAP
-from config.settings import ACCESS_TOKEN_EXPIRE_MINUTES
-from backend.utils import clean_unicode_text, load_dataset, generate_mock_user_report
+from config import LABEL_MAP, REVERSE_LABEL_MAP, CLASSIFIER_BACKEND
+from config.settings import ACCESS_TOKEN_EXPIRE_MINUTES, TRACING_ENABLED, PROFILING_ENABLED, PROFILING_MAX_SECONDS
+from backend.utils import clean_unicode_text, load_dataset, aggregate_user_profiles, RISK_RECOMMENDATIONS
 from backend.few_shot.fewshot_model import few_shot_model
+from backend.classifiers import get_classifier, loaded_classifiers, classifier_stats
+from backend.pipeline import scrape_and_classify
 from backend.models import (
     CommentRequest,
+    TrainingExamplesRequest,
     PredictionResponse,
     DatasetUploadResponse,
     ErrorResponse,
@@ -28,14 +36,22 @@ from backend.models import (
     TokenResponse,
     UserResponse,
 )
-from database import get_db, User, Analysis, ManualPrediction, PredictionType
+from database import get_db, get_async_db, User, Analysis, ManualPrediction, PredictionType, UserStatsRollup
+from database.rollups import record_analysis, record_manual_prediction, rollup_summary, TOTAL_PERIOD
 from database.auth_utils import (
-    get_password_hash,
+    get_password_hash_async,
     authenticate_user,
     create_access_token,
     get_current_user,
+    get_current_admin,
     get_user_by_email,
+    invalidate_cached_user,
 )
+from database.user_cache import user_cache
+from database.database import pool_metrics, async_pool_metrics
+from backend.metrics import MetricsMiddleware, REGISTRY, render_metrics
+from backend.tracing import TracingMiddleware, span
+from backend.profiling import ProfilingMiddleware, request_profiler, sample_stacks
 
 app = FastAPI(
     title="Yorum Kategorisi Tahmin Sistemi",
@@ -73,6 +89,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Tek istek cProfile capture'ı (PROFILING_ENABLED); kapalıyken hiç eklenmez
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+# İstek bazında trace (TRACING_ENABLED / DEBUG); kapalıyken span'lar no-op
+if TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+# En dışta: CORS preflight'ları dahil tüm istekler ölçülür
+app.add_middleware(MetricsMiddleware)
 
 # React frontend statik dosyaları kendi sunucusunda servis ediyor
 # Static files artık gerekli değil
@@ -80,6 +104,62 @@ app.add_middleware(
 # Gemini API konfigürasyonu (fewshot_model kendi yapılandırmasını yapıyor)
 
 
+def resolve_classifier(backend: Optional[str] = None):
+    """
+    Sınıflandırıcı seçimi: ?backend=fewshot|local|onnx|linear|tfidf|cascade (verilmezse CLASSIFIER_BACKEND).
+    Usage: classifier = Depends(resolve_classifier)
+    """
+    try:
+        return get_classifier(backend)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Classifier yükleme hatası ({backend or CLASSIFIER_BACKEND}): {e}")
+        raise HTTPException(status_code=503, detail=f"Sınıflandırıcı yüklenemedi: {str(e)}")
+
+
+async def _predict_rows(classifier, texts):
+    """Toplu tahmin; batch hata verirse satır satır tekrar dener, başarısız satırlar None döner"""
+    try:
+        return await run_in_threadpool(classifier.predict_batch, texts)
+    except Exception as e:
+        print(f"⚠️ Toplu tahmin hatası, satır satır deneniyor: {e}")
+    results = []
+    for text in texts:
+        try:
+            results.append(await run_in_threadpool(classifier.predict, text))
+        except Exception as e:
+            print(f"Tahmin hatası: {e}")
+            results.append(None)
+    return results
+
+
+def _collect_runtime_metrics():
+    """Scrape anında mevcut sayaçlardan gauge'lar: cache'ler ve DB pool'ları"""
+    caches = {"user": user_cache.stats()}
+    embedding_cache = few_shot_model.retrieval_stats().get("embedding_cache")
+    if embedding_cache:
+        caches["embedding"] = embedding_cache
+    yield ("socialguard_cache_hits_total", "counter", "Cache isabetleri",
+           [({"cache": name}, stats["hits"]) for name, stats in caches.items()])
+    yield ("socialguard_cache_misses_total", "counter", "Cache ıskaları",
+           [({"cache": name}, stats["misses"]) for name, stats in caches.items()])
+    yield ("socialguard_cache_hit_ratio", "gauge", "Cache isabet oranı",
+           [({"cache": name}, stats["hit_rate"]) for name, stats in caches.items()])
+    yield ("socialguard_cache_entries", "gauge", "Cache kayıt sayısı",
+           [({"cache": name}, stats["size"]) for name, stats in caches.items()])
+
+    pools = {"sync": pool_metrics.snapshot(), "async": async_pool_metrics.snapshot()}
+    for key in sorted(set(pools["sync"]) | set(pools["async"])):
+        metric_type = "counter" if key in ("checkouts", "timeouts", "connections_opened", "slow_queries") else "gauge"
+        name = f"socialguard_db_pool_{key}" + ("_total" if metric_type == "counter" else "")
+        yield (name, metric_type, f"DB pool: {key}",
+               [({"pool": pool}, stats[key]) for pool, stats in pools.items() if key in stats])
+
+
+REGISTRY.register_collector(_collect_runtime_metrics)
+
+
 @app.get("/")
 async def read_root():
     """Ana sayfa - React frontend'e yönlendir"""
@@ -93,7 +173,27 @@ async def read_root():
 @app.get("/api/health")
 async def health_check():
     """Sağlık kontrolü"""
-    return {"status": "healthy", "model": "gemini-2.0-flash-exp"}
+    return {
+        "status": "healthy",
+        "model": "gemini-2.0-flash-exp",
+        "classifier_backend": CLASSIFIER_BACKEND,
+        "loaded_classifiers": loaded_classifiers(),
+        "classifier_stats": classifier_stats(),
+        "retrieval": few_shot_model.retrieval_stats(),
+        "llm": few_shot_model.model.stats() if few_shot_model.model else None,
+        "prompt": few_shot_model.prompt_builder.stats(),
+        "user_cache": user_cache.stats(),
+        "db_pool": {
+            "sync": pool_metrics.snapshot(),
+            "async": async_pool_metrics.snapshot()
+        }
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text formatında metrikler (route gecikmeleri, LLM, retrieval, scraper, cache, DB pool)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 
 # ============================================================================
@@ -101,11 +201,11 @@ async def health_check():
 # ============================================================================
 
 @app.post("/api/auth/register", response_model=TokenResponse)
-async def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_async_db)):
     """Kullanıcı kaydı oluştur"""
     try:
         # Email kontrolü
-        existing_user = get_user_by_email(db, user_data.email)
+        existing_user = await get_user_by_email(db, user_data.email)
         if existing_user:
             raise HTTPException(
                 status_code=400,
@@ -120,7 +220,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
             )
         
         # Kullanıcı oluştur
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hash_async(user_data.password)
         new_user = User(
             name=user_data.name,
             email=user_data.email,
@@ -129,8 +229,8 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
         )
         
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
         
         # Token oluştur
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -157,16 +257,16 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Kayıt hatası: {str(e)}")
 
 
 @app.post("/api/auth/login", response_model=TokenResponse)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Kullanıcı girişi"""
     try:
         # Kullanıcı doğrulama
-        user = authenticate_user(db, user_data.email, user_data.password)
+        user = await authenticate_user(db, user_data.email, user_data.password)
         if not user:
             raise HTTPException(
                 status_code=401,
@@ -175,7 +275,8 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
         
         # Son giriş zamanını güncelle
         user.last_login = datetime.utcnow()
-        db.commit()
+        await db.commit()
+        invalidate_cached_user(user.id)
         
         # Token oluştur
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -289,10 +390,36 @@ async def get_similar_examples(request: CommentRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Benzer örnek bulma hatası: {str(e)}")
 
+@app.post("/api/training-examples")
+async def add_training_examples(
+    request: TrainingExamplesRequest,
+    admin: User = Depends(get_current_admin)
+):
+    """
+    Etiketli örnekleri (ör. düzeltilmiş tahminler) yeniden başlatmadan retrieval index'ine ekle.
+    Korpus tüm kullanıcıların tahminlerini etkilediği için sadece admin.
+    """
+    try:
+        examples = [example.model_dump() for example in request.examples]
+        result = await run_in_threadpool(few_shot_model.add_training_examples, examples)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if request.refit:
+        few_shot_model.schedule_refit()
+        result["retrieval"] = few_shot_model.retrieval_stats()
+    return result
+
+@app.post("/api/training-examples/refit")
+async def refit_training_index(admin: User = Depends(get_current_admin)):
+    """(Admin) TF-IDF index'ini arka planda baştan eğit; hazır olunca atomik olarak devreye alınır"""
+    started = few_shot_model.schedule_refit()
+    return {"scheduled": started, "retrieval": few_shot_model.retrieval_stats()}
+
 @app.post("/api/predict", response_model=PredictionResponse)
 async def predict_comment(
     request: CommentRequest, 
     fewshot: bool = True,
+    classifier=Depends(resolve_classifier),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -302,8 +429,8 @@ async def predict_comment(
         if not request.comment.strip():
             raise HTTPException(status_code=400, detail="Yorum boş olamaz")
         
-        # Few-shot tahmin
-        fs = few_shot_model.predict_with_few_shot(request.comment)
+        # Seçili backend ile tahmin (few-shot veya lokal model)
+        fs = await run_in_threadpool(classifier.predict, request.comment)
         prediction_id = int(fs.get("category", 0))
         prediction_name = REVERSE_LABEL_MAP.get(prediction_id, "No Harassment / Neutral")
         confidence = float(fs.get("confidence", 0.7))
@@ -331,8 +458,10 @@ async def predict_comment(
                 **category_counts
             )
             
-            db.add(manual_prediction)
-            db.commit()
+            with span("db.commit"):
+                db.add(manual_prediction)
+                record_manual_prediction(db, manual_prediction)
+                db.commit()
             print(f"Single prediction saved to database with ID: {manual_prediction.id}")
         except Exception as db_error:
             print(f"Database save error: {db_error}")
@@ -351,6 +480,7 @@ async def predict_comment(
 @app.post("/api/upload-dataset")
 async def upload_dataset(
     file: UploadFile = File(...),
+    classifier=Depends(resolve_classifier),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -385,9 +515,18 @@ async def upload_dataset(
         predictions_data = []
         category_counts = {i: 0 for i in range(5)}
         
-        for idx, comment in enumerate(df['comment']):
+        results = await _predict_rows(classifier, [str(comment) for comment in df['comment']])
+        if results and all(result is None for result in results):
+            # Sınıflandırıcı tamamen çöktüyse her satırı "No Harassment" diye kaydetme
+            os.remove(file_path)
+            raise HTTPException(status_code=503, detail="Sınıflandırıcı hiçbir yorumu etiketleyemedi")
+        
+        for idx, (comment, result) in enumerate(zip(df['comment'], results)):
+            if result is None:
+                # Tekrar denemede de başarısız olan satır: yalnızca bu satır varsayılan etikete düşer, sayaçlara girmez
+                labels.append(0)
+                continue
             try:
-                result = few_shot_model.predict_with_few_shot(str(comment))
                 label = int(result.get("category", 0))
                 confidence = float(result.get("confidence", 0.7))
                 category_name = REVERSE_LABEL_MAP.get(label, "Unknown")
@@ -440,8 +579,10 @@ async def upload_dataset(
                 processing_time=processing_time
             )
             
-            db.add(manual_prediction)
-            db.commit()
+            with span("db.commit"):
+                db.add(manual_prediction)
+                record_manual_prediction(db, manual_prediction)
+                db.commit()
             print(f"Dataset prediction saved to database with ID: {manual_prediction.id}")
         except Exception as db_error:
             print(f"Database save error: {db_error}")
@@ -466,7 +607,8 @@ async def upload_dataset(
             "output_file": output_filename,
             "download_url": f"/api/download-dataset/{output_filename}"
         }
-        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Dosya yükleme hatası: {str(e)}")
 
@@ -490,6 +632,7 @@ async def download_dataset(filename: str):
 @app.post("/api/batch-predict")
 async def batch_predict(
     comments: List[str],
+    classifier=Depends(resolve_classifier),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -499,8 +642,8 @@ async def batch_predict(
         results = []
         category_counts = {i: 0 for i in range(5)}
         
-        for comment in comments:
-            fs = few_shot_model.predict_with_few_shot(comment)
+        predictions = await run_in_threadpool(classifier.predict_batch, comments)
+        for comment, fs in zip(comments, predictions):
             prediction_id = int(fs.get("category", 0))
             prediction_name = REVERSE_LABEL_MAP.get(prediction_id, "No Harassment / Neutral")
             confidence = float(fs.get("confidence", 0.7))
@@ -534,8 +677,10 @@ async def batch_predict(
                 processing_time=processing_time
             )
             
-            db.add(manual_prediction)
-            db.commit()
+            with span("db.commit"):
+                db.add(manual_prediction)
+                record_manual_prediction(db, manual_prediction)
+                db.commit()
             print(f"Batch prediction saved to database with ID: {manual_prediction.id}")
         except Exception as db_error:
             print(f"Database save error: {db_error}")
@@ -549,24 +694,18 @@ async def batch_predict(
 @app.post("/api/social-media-analysis", response_model=SocialMediaAnalysisResponse)
 async def analyze_social_media(
     request: SocialMediaAnalysisRequest,
+    classifier=Depends(resolve_classifier),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Sosyal medya URL'sini analiz et ve kullanıcıları tespit et"""
     start_time = datetime.utcnow()
     try:
-        # Instagram yorumlarını çıkar
-        scrape_result = scrape_instagram_comments(request.url, request.max_comments)
-        
-        # Yeni format: {'comments': [...], 'post_owner': '...', 'total_comments': N}
-        # Eski format uyumluluğu için kontrol
-        if isinstance(scrape_result, dict) and 'comments' in scrape_result:
-            comments = scrape_result['comments']
-            post_owner = scrape_result.get('post_owner', 'unknown')
-        else:
-            # Eski format (sadece liste)
-            comments = scrape_result if isinstance(scrape_result, list) else []
-            post_owner = 'unknown'
+        # Instagram yorumlarını çek ve scroll devam ederken parti parti sınıflandır
+        comments, predictions, post_owner = await scrape_and_classify(
+            lambda: iter_instagram_comment_batches(request.url, request.max_comments),
+            classifier.predict_batch
+        )
         
         if not comments:
             raise HTTPException(status_code=400, detail="Bu URL'den yorum çıkarılamadı")
@@ -580,82 +719,30 @@ async def analyze_social_media(
         # Platform tespit et
         platform = "instagram"  # Şimdilik sadece Instagram
         
-        # Kullanıcıları grupla
-        users_data = {}
-        for comment in comments:
-            author = comment['author']
-            if author not in users_data:
-                users_data[author] = []
-            users_data[author].append(comment)
-        
-        # Her kullanıcıyı analiz et
-        user_analyses = {}
-        flagged_count = 0
+        # Tahminleri yorumlara işle
+        for comment, fs in zip(comments, predictions):
+            pred_id = int(fs.get("category", 0))
+            comment['predicted_category_id'] = pred_id
+            comment['predicted_category_name'] = REVERSE_LABEL_MAP.get(pred_id, "No Harassment / Neutral")
+            comment['predicted_confidence'] = float(fs.get("confidence", 0.7))
+        
+        # Kullanıcı bazında toplu hesaplama (tek groupby)
+        user_profiles = aggregate_user_profiles(
+            [comment['author'] for comment in comments],
+            [comment['predicted_category_id'] for comment in comments],
+            request.threshold
+        )
         
-        for user_id, user_comments in users_data.items():
-            try:
-                # Mock kullanıcı analizi
-                user_profile = {
-                    'total_comments': len(user_comments),
-                    'harmful_comments': 0,
-                    'harmful_ratio': 0.0,
-                    'risk_category': 'safe',
-                    'flagged': False,
-                    'analysis_timestamp': datetime.now().isoformat()
-                }
-                
-                # Zararlı yorum tespiti (unified predictor + few-shot)
-                harmful_count = 0
-                for comment in user_comments:
-                    try:
-                        fs = few_shot_model.predict_with_few_shot(comment['text'])
-                        pred_id = int(fs.get("category", 0))
-                        pred_name = REVERSE_LABEL_MAP.get(pred_id, "No Harassment / Neutral")
-                        pred_conf = float(fs.get("confidence", 0.7))
-                        comment['predicted_category_id'] = pred_id
-                        comment['predicted_category_name'] = pred_name
-                        comment['predicted_confidence'] = pred_conf
-                        if pred_id > 0:
-                            harmful_count += 1
-                    except Exception:
-                        continue
-                
-                user_profile['harmful_comments'] = harmful_count
-                user_profile['harmful_ratio'] = harmful_count / len(user_comments) if user_comments else 0
-                
-                # Risk kategorisi belirle
-                if user_profile['harmful_ratio'] > 0.3:
-                    user_profile['risk_category'] = 'high_risk'
-                elif user_profile['harmful_ratio'] > 0.1:
-                    user_profile['risk_category'] = 'medium_risk'
-                elif user_profile['harmful_ratio'] > 0.05:
-                    user_profile['risk_category'] = 'low_risk'
-                else:
-                    user_profile['risk_category'] = 'safe'
-                
-                # Flagged durumu belirle (Frontend'den gelen threshold değerini kullan)
-                user_profile['flagged'] = user_profile['harmful_ratio'] > request.threshold
-                
-                if user_profile['total_comments'] >= 1:  # En az 1 yorum
-                    report = generate_mock_user_report(user_profile, user_id)
-                    
-                    user_analyses[user_id] = UserAnalysisResponse(
-                        user_id=user_id,
-                        total_comments=user_profile['total_comments'],
-                        harmful_comments=user_profile['harmful_comments'],
-                        harmful_ratio=user_profile['harmful_ratio'],
-                        risk_category=user_profile['risk_category'],
-                        flagged=user_profile['flagged'],
-                        recommendations=report['recommendations'],
-                        analysis_timestamp=user_profile['analysis_timestamp']
-                    )
-                    
-                    if user_profile['flagged']:
-                        flagged_count += 1
-                        
-            except Exception as e:
-                print(f"Kullanıcı analiz hatası ({user_id}): {e}")
-                continue
+        analysis_timestamp = datetime.now().isoformat()
+        user_analyses = {
+            profile['user_id']: UserAnalysisResponse(
+                **profile,
+                recommendations=[RISK_RECOMMENDATIONS[profile['risk_category']]],
+                analysis_timestamp=analysis_timestamp
+            )
+            for profile in user_profiles.to_dict('records')
+        }
+        flagged_count = int(user_profiles['flagged'].sum())
         
         print(f"Returning {len(comments)} comments in response")
         if comments:
@@ -713,8 +800,10 @@ async def analyze_social_media(
                 analysis_duration=analysis_duration
             )
             
-            db.add(new_analysis)
-            db.commit()
+            with span("db.commit"):
+                db.add(new_analysis)
+                record_analysis(db, new_analysis)
+                db.commit()
             db.refresh(new_analysis)
             
             print(f"Analysis saved to database with ID: {new_analysis.id}")
@@ -756,26 +845,58 @@ async def update_detection_threshold(threshold: float):
 # Analysis History Endpoints
 # ============================================================================
 
+async def _get_owned(db: AsyncSession, model, record_id: str, current_user: User):
+    """Kullanıcıya ait kaydı ID ile getir (geçersiz UUID -> None)"""
+    try:
+        record_uuid = uuid.UUID(str(record_id))
+    except ValueError:
+        return None
+    result = await db.execute(
+        select(model).where(
+            model.id == record_uuid,
+            model.user_id == current_user.id
+        )
+    )
+    return result.scalars().first()
+
+
 @app.get("/api/analyses/history")
 async def get_analysis_history(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     limit: int = 50,
     offset: int = 0
 ):
     """Kullanıcının analiz geçmişini getir"""
     try:
         # Kullanıcının analizlerini getir (en yeni önce)
-        analyses = db.query(Analysis).filter(
-            Analysis.user_id == current_user.id
-        ).order_by(
-            Analysis.created_at.desc()
-        ).limit(limit).offset(offset).all()
+        # Liste görünümü için büyük JSON kolonları (comments, user_analyses) çekilmez
+        rows = await db.execute(
+            select(
+                Analysis.id,
+                Analysis.url,
+                Analysis.platform,
+                Analysis.post_owner,
+                Analysis.total_comments,
+                Analysis.analyzed_users,
+                Analysis.flagged_users,
+                Analysis.threshold,
+                Analysis.created_at,
+                Analysis.analysis_duration,
+            ).where(
+                Analysis.user_id == current_user.id
+            ).order_by(
+                Analysis.created_at.desc()
+            ).limit(limit).offset(offset)
+        )
+        analyses = rows.all()
         
         # Toplam analiz sayısı
-        total_count = db.query(Analysis).filter(
-            Analysis.user_id == current_user.id
-        ).count()
+        total_count = await db.scalar(
+            select(func.count()).select_from(Analysis).where(
+                Analysis.user_id == current_user.id
+            )
+        )
         
         # Response formatı
         results = []
@@ -808,15 +929,12 @@ async def get_analysis_history(
 async def get_analysis_detail(
     analysis_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Belirli bir analizin detaylarını getir"""
     try:
         # Analizi getir
-        analysis = db.query(Analysis).filter(
-            Analysis.id == analysis_id,
-            Analysis.user_id == current_user.id
-        ).first()
+        analysis = await _get_owned(db, Analysis, analysis_id, current_user)
         
         if not analysis:
             raise HTTPException(status_code=404, detail="Analiz bulunamadı")
@@ -846,66 +964,70 @@ async def get_analysis_detail(
 async def delete_analysis(
     analysis_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Belirli bir analizi sil"""
     try:
         # Analizi getir
-        analysis = db.query(Analysis).filter(
-            Analysis.id == analysis_id,
-            Analysis.user_id == current_user.id
-        ).first()
+        analysis = await _get_owned(db, Analysis, analysis_id, current_user)
         
         if not analysis:
             raise HTTPException(status_code=404, detail="Analiz bulunamadı")
         
-        db.delete(analysis)
-        db.commit()
+        await db.run_sync(record_analysis, analysis, -1)
+        await db.delete(analysis)
+        await db.commit()
         
         return {"message": "Analiz başarıyla silindi"}
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Silme hatası: {str(e)}")
 
 
 @app.get("/api/analyses/stats/summary")
 async def get_analysis_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Kullanıcının analiz istatistiklerini getir"""
+    """Kullanıcının analiz istatistiklerini getir (rollup tablosundan tek satır)"""
     try:
-        # Toplam analiz sayısı
-        total_analyses = db.query(Analysis).filter(
-            Analysis.user_id == current_user.id
-        ).count()
-        
-        # Tüm analizleri getir
-        analyses = db.query(Analysis).filter(
-            Analysis.user_id == current_user.id
-        ).all()
-        
-        total_comments_analyzed = sum(a.total_comments for a in analyses)
-        total_flagged_users = sum(a.flagged_users for a in analyses)
-        total_users_analyzed = sum(a.analyzed_users for a in analyses)
+        result = await db.execute(
+            select(UserStatsRollup).where(
+                UserStatsRollup.user_id == current_user.id,
+                UserStatsRollup.period == TOTAL_PERIOD
+            )
+        )
+        return rollup_summary(result.scalars().first())
         
-        # Platform dağılımı
-        platform_stats = {}
-        for analysis in analyses:
-            platform = analysis.platform
-            if platform not in platform_stats:
-                platform_stats[platform] = 0
-            platform_stats[platform] += 1
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"İstatistik hatası: {str(e)}")
+
+
+@app.get("/api/analyses/stats/daily")
+async def get_daily_stats(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    days: int = 30
+):
+    """Kullanıcının günlük istatistiklerini getir (en yeni gün önce)"""
+    try:
+        result = await db.execute(
+            select(UserStatsRollup).where(
+                UserStatsRollup.user_id == current_user.id,
+                UserStatsRollup.period != TOTAL_PERIOD
+            ).order_by(
+                UserStatsRollup.period.desc()
+            ).limit(max(1, min(days, 366)))
+        )
         
         return {
-            "total_analyses": total_analyses,
-            "total_comments_analyzed": total_comments_analyzed,
-            "total_users_analyzed": total_users_analyzed,
-            "total_flagged_users": total_flagged_users,
-            "platform_distribution": platform_stats
+            "days": [
+                {"date": rollup.period, **rollup_summary(rollup)}
+                for rollup in result.scalars().all()
+            ]
         }
         
     except Exception as e:
@@ -919,33 +1041,48 @@ async def get_analysis_stats(
 @app.get("/api/manual-predictions/history")
 async def get_manual_predictions(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     prediction_type: Optional[str] = None,
     limit: int = 50,
     offset: int = 0
 ):
     """Kullanıcının manuel tahmin geçmişini getir"""
     try:
-        query = db.query(ManualPrediction).filter(
-            ManualPrediction.user_id == current_user.id
-        )
+        conditions = [ManualPrediction.user_id == current_user.id]
         
         # Tip filtreleme
         if prediction_type:
             if prediction_type == "single":
-                query = query.filter(ManualPrediction.prediction_type == PredictionType.SINGLE)
+                conditions.append(ManualPrediction.prediction_type == PredictionType.SINGLE)
             elif prediction_type == "batch":
-                query = query.filter(ManualPrediction.prediction_type == PredictionType.BATCH)
+                conditions.append(ManualPrediction.prediction_type == PredictionType.BATCH)
             elif prediction_type == "dataset":
-                query = query.filter(ManualPrediction.prediction_type == PredictionType.DATASET)
+                conditions.append(ManualPrediction.prediction_type == PredictionType.DATASET)
         
         # Toplam sayı
-        total_count = query.count()
+        total_count = await db.scalar(
+            select(func.count()).select_from(ManualPrediction).where(*conditions)
+        )
         
-        # Sonuçları getir
-        predictions = query.order_by(
-            ManualPrediction.created_at.desc()
-        ).limit(limit).offset(offset).all()
+        # Sonuçları getir (predictions JSON kolonu liste için çekilmez)
+        rows = await db.execute(
+            select(
+                ManualPrediction.id,
+                ManualPrediction.prediction_type,
+                ManualPrediction.filename,
+                ManualPrediction.total_comments,
+                ManualPrediction.category_0_count,
+                ManualPrediction.category_1_count,
+                ManualPrediction.category_2_count,
+                ManualPrediction.category_3_count,
+                ManualPrediction.category_4_count,
+                ManualPrediction.created_at,
+                ManualPrediction.processing_time,
+            ).where(*conditions).order_by(
+                ManualPrediction.created_at.desc()
+            ).limit(limit).offset(offset)
+        )
+        predictions = rows.all()
         
         # Response formatı
         results = []
@@ -979,14 +1116,11 @@ async def get_manual_predictions(
 async def get_manual_prediction_detail(
     prediction_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Belirli bir manuel tahminin detaylarını getir"""
     try:
-        prediction = db.query(ManualPrediction).filter(
-            ManualPrediction.id == prediction_id,
-            ManualPrediction.user_id == current_user.id
-        ).first()
+        prediction = await _get_owned(db, ManualPrediction, prediction_id, current_user)
         
         if not prediction:
             raise HTTPException(status_code=404, detail="Tahmin bulunamadı")
@@ -1016,29 +1150,111 @@ async def get_manual_prediction_detail(
 async def delete_manual_prediction(
     prediction_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Belirli bir manuel tahmini sil"""
     try:
-        prediction = db.query(ManualPrediction).filter(
-            ManualPrediction.id == prediction_id,
-            ManualPrediction.user_id == current_user.id
-        ).first()
+        prediction = await _get_owned(db, ManualPrediction, prediction_id, current_user)
         
         if not prediction:
             raise HTTPException(status_code=404, detail="Tahmin bulunamadı")
         
-        db.delete(prediction)
-        db.commit()
+        await db.run_sync(record_manual_prediction, prediction, -1)
+        await db.delete(prediction)
+        await db.commit()
         
         return {"message": "Tahmin başarıyla silindi"}
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Silme hatası: {str(e)}")
 
+# ============================================================================
+# Admin Profiling Endpoints (PROFILING_ENABLED=true + ADMIN_EMAILS)
+# ============================================================================
+
+def profiling_enabled() -> None:
+    """Profilleme kapalıyken endpoint'ler yokmuş gibi davranır (kimlik doğrulamadan önce kontrol edilir)"""
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+def require_profiling(
+    enabled: None = Depends(profiling_enabled),
+    admin: User = Depends(get_current_admin)
+) -> User:
+    """Profilleme açık ve kullanıcı admin (bağımlılıklar sırayla çözülür: önce bayrak, sonra yetki)"""
+    return admin
+
+
+@app.post("/api/admin/profiling/sample")
+async def profile_sample(
+    seconds: float = 10,
+    interval_ms: float = 5,
+    include_idle: bool = False,
+    admin: User = Depends(require_profiling)
+):
+    """Çalışan worker'ı N saniye örnekle; collapsed-stack (flamegraph) dosyası döndür"""
+    if not 0 < seconds <= PROFILING_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds 0-{PROFILING_MAX_SECONDS:g} arasında olmalı")
+    if not 1 <= interval_ms <= 1000:
+        raise HTTPException(status_code=400, detail="interval_ms 1-1000 arasında olmalı")
+    try:
+        # Örnekleyici ayrı thread'de çalışır; event loop istek almaya devam eder
+        result = await run_in_threadpool(sample_stacks, seconds, interval_ms / 1000, include_idle)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    filename = f"profile-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.collapsed"
+    return PlainTextResponse(result["collapsed"], headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "X-Profile-Samples": str(result["samples"]),
+        "X-Profile-Seconds": str(result["seconds"]),
+    })
+
+
+@app.post("/api/admin/profiling/capture")
+async def arm_profile_capture(
+    route: str,
+    method: str = "POST",
+    admin: User = Depends(require_profiling)
+):
+    """Verilen route'a (şablon, örn. /api/predict) gelecek bir sonraki isteği cProfile ile ölç"""
+    target = next(
+        (r for r in app.routes if getattr(r, "path", None) == route and method.upper() in getattr(r, "methods", ())),
+        None
+    )
+    if target is None:
+        raise HTTPException(status_code=404, detail=f"Route bulunamadı: {method.upper()} {route}")
+    return {"armed": request_profiler.arm(method, target)}
+
+
+@app.get("/api/admin/profiling/captures")
+async def list_profile_captures(admin: User = Depends(require_profiling)):
+    """Kurulu capture ve son cProfile sonuçları"""
+    return {**request_profiler.status(), "results": request_profiler.list()}
+
+
+@app.get("/api/admin/profiling/captures/{capture_id}")
+async def get_profile_capture(
+    capture_id: str,
+    format: str = "text",
+    admin: User = Depends(require_profiling)
+):
+    """cProfile sonucu: text (cumulative sıralı pstats) veya pstats (snakeviz / pstats.Stats ile açılır)"""
+    capture = request_profiler.get(capture_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Capture bulunamadı")
+    if format == "pstats":
+        return Response(capture["pstats"], media_type="application/octet-stream", headers={
+            "Content-Disposition": f'attachment; filename="{capture_id}.pstats"'
+        })
+    if format != "text":
+        raise HTTPException(status_code=400, detail="format: text veya pstats")
+    return PlainTextResponse(capture["text"])
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
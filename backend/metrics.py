@@ -0,0 +1,259 @@
+"""
+Prometheus text formatında metrikler (/metrics).
+Bağımlılıksız küçük bir registry: Counter, Gauge, Histogram (etiketli) ve
+scrape anında mevcut istatistiklerden (DB pool, cache'ler) değer üreten collector'lar.
+
+Usage:
+    with RETRIEVAL_SECONDS.time(op="top_k"):
+        ...
+    LLM_ERRORS.inc(client="gemini", kind="rate_limited")
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Saniye cinsinden gecikme kovaları (HTTP, LLM, retrieval)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Prompt boyutu (tahmini token)
+PROMPT_TOKEN_BUCKETS = (100, 200, 300, 400, 500, 600, 800, 1000, 1500, 2000, 3000)
+# Scraper aşamaları saniyeler-dakikalar sürer
+SCRAPER_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    escaped = (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        for value in values
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        REGISTRY.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: etiketler {self.labelnames} olmalı, verilen {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Kümülatif kovalar + _sum/_count (Prometheus histogram)"""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Blok süresini gözlemle (hata olsa da)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+        bucket_names = self.labelnames + ("le",)
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(bucket_names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(bucket_names, key + ('+Inf',))} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Metrikler + scrape anında çağrılan collector'lar"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            self._metrics.append(metric)
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]) -> None:
+        """collector() -> [(isim, tip, açıklama, [(etiketler, değer), ...]), ...]"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                print(f"⚠️ Metrics collector hatası: {e}")
+                continue
+            for name, metric_type, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    label_names = tuple(labels)
+                    label_values = tuple(labels[label] for label in label_names)
+                    lines.append(f"{name}{_format_labels(label_names, label_values)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "socialguard_http_request_duration_seconds", "HTTP istek süresi (route şablonu bazında)",
+    ("method", "route", "status")
+)
+HTTP_IN_FLIGHT = Gauge("socialguard_http_requests_in_flight", "İşlenmekte olan HTTP istekleri")
+LLM_REQUEST_SECONDS = Histogram(
+    "socialguard_llm_request_duration_seconds", "LLM generate_content süresi", ("client", "outcome")
+)
+LLM_ERRORS = Counter("socialguard_llm_errors_total", "LLM hataları (rate_limited: 429)", ("client", "kind"))
+RETRIEVAL_SECONDS = Histogram(
+    "socialguard_retrieval_duration_seconds", "Benzer örnek arama süresi (çağrı başına, toplu olabilir)",
+    ("op",)
+)
+RETRIEVAL_QUERIES = Counter("socialguard_retrieval_queries_total", "Aranan sorgu metni sayısı", ("op",))
+PROMPT_TOKENS = Histogram(
+    "socialguard_llm_prompt_tokens", "Few-shot prompt boyutu (tahmini token)", buckets=PROMPT_TOKEN_BUCKETS
+)
+PROMPT_EXAMPLES_SKIPPED = Counter(
+    "socialguard_llm_prompt_examples_skipped_total", "Prompt'a alınmayan örnekler (deduplicated, dropped: bütçe)",
+    ("reason",)
+)
+PROMPT_TRUNCATIONS = Counter("socialguard_llm_prompt_truncations_total", "Kısaltılan uzun yorumlar (girdi ve örnekler)")
+SCRAPER_PHASE_SECONDS = Histogram(
+    "socialguard_scraper_phase_duration_seconds", "Scraper aşama süreleri (launch, login, scroll, extract)",
+    ("phase",), buckets=SCRAPER_BUCKETS
+)
+
+
+_route_paths = {}  # id(app) -> {endpoint: route şablonu}
+
+
+def route_template(scope) -> str:
+    """
+    İstek işlendikten sonra route şablonu (/api/analyses/{analysis_id}).
+    Router eşleşen endpoint'i scope'a yazar; eşleşmeyen yollar "unmatched"
+    olarak toplanır, böylece etiket kardinalitesi sınırlı kalır.
+    """
+    app = scope.get("app")
+    paths = _route_paths.get(id(app))
+    if paths is None:
+        paths = _route_paths[id(app)] = {
+            route.endpoint: route.path for route in getattr(app, "routes", []) if hasattr(route, "endpoint")
+        }
+    return paths.get(scope.get("endpoint"), "unmatched")
+
+
+class MetricsMiddleware:
+    """Saf ASGI middleware: in-flight gauge ve route bazında gecikme histogramı"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"], route=route_template(scope), status=str(status["code"])
+            )
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
@@ -37,6 +37,16 @@ class CommentRequest(BaseModel):
     comment: str
 
 
+class TrainingExample(BaseModel):
+    text: str
+    label: int
+
+
+class TrainingExamplesRequest(BaseModel):
+    examples: List[TrainingExample]
+    refit: Optional[bool] = False  # True: eklemeden sonra arka planda tam refit başlat
+
+
 class PredictionResponse(BaseModel):
     prediction_id: int
     prediction_name: str
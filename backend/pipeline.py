@@ -0,0 +1,88 @@
+"""
+Pipelined scrape-and-classify.
+Scraper bir thread'de yorum partileri üretirken sınıflandırma her partiyi
+sınırlı bir kuyruk üzerinden hemen işler; toplam süre ~max(scrape, classify) olur.
+"""
+import asyncio
+import contextvars
+import threading
+from typing import Callable, Dict, Iterator, List, Tuple
+from starlette.concurrency import run_in_threadpool
+from config.settings import PIPELINE_QUEUE_SIZE
+from backend.tracing import span
+
+_DONE = object()
+
+
+async def scrape_and_classify(
+    batches_factory: Callable[[], Iterator[Dict]],
+    classify: Callable[[List[str]], List[Dict]],
+    queue_size: int = PIPELINE_QUEUE_SIZE
+) -> Tuple[List[Dict], List[Dict], str]:
+    """
+    Scraper partilerini üretici/tüketici hattında sınıflandır.
+    
+    Args:
+        batches_factory: {'post_owner': str, 'comments': [...]} partileri üreten (bloklayan) generator fabrikası
+        classify: Metin listesini sınıflandıran (bloklayan) fonksiyon, örn. few_shot_model.predict_batch
+        queue_size: Kuyrukta bekleyebilecek en fazla parti (backpressure)
+        
+    Returns:
+        (comments, predictions, post_owner) - yorumlar ve tahminler aynı sırada
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+
+    def put(item):
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def produce():
+        batches = batches_factory()
+        try:
+            for batch in batches:
+                if stop.is_set():
+                    break
+                put(batch)
+        except Exception as e:
+            put(e)
+        finally:
+            close = getattr(batches, "close", None)
+            if close is not None:
+                close()  # Generator'ın finally bloğu (driver.quit) hemen çalışsın
+            put(_DONE)
+
+    # Scraper span'ları isteğin trace'ine bağlansın (run_in_executor context kopyalamaz)
+    producer = loop.run_in_executor(None, contextvars.copy_context().run, produce)
+
+    comments: List[Dict] = []
+    predictions: List[Dict] = []
+    post_owner = 'unknown'
+    finished = False
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                finished = True
+                break
+            if isinstance(item, Exception):
+                raise item
+            post_owner = item.get('post_owner') or post_owner
+            batch = item.get('comments') or []
+            if batch:
+                with span("pipeline.classify_batch", comments=len(batch)):
+                    batch_predictions = await run_in_threadpool(classify, [comment['text'] for comment in batch])
+                comments.extend(batch)
+                predictions.extend(batch_predictions)
+    finally:
+        if not finished:
+            # Hata durumunda üreticiyi durdur ve kuyruğu boşaltarak serbest bırak
+            stop.set()
+            while not producer.done():
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    await asyncio.sleep(0.01)
+        await producer
+
+    return comments, predictions, post_owner
@@ -0,0 +1,184 @@
+"""
+Canlı worker profilleme (admin-only, PROFILING_ENABLED ile açılır).
+
+  - sample_stacks: N saniye boyunca tüm thread'lerin stack'lerini örnekler ve
+    collapsed-stack formatında döndürür (flamegraph.pl, speedscope, inferno).
+    Saf Python'dur; örnekleme sadece istek süresince çalışır.
+  - RequestProfiler + ProfilingMiddleware: admin bir route'u "kurar", o route'a
+    gelen bir sonraki tek istek cProfile ile ölçülür ve sonuç saklanır.
+    Kurulu capture yokken middleware'in maliyeti tek bir attribute kontrolüdür.
+
+cProfile sadece isteğin event loop thread'indeki işi görür; ölçüm sırasında
+aynı loop'ta çalışan diğer istekler de profile karışabilir, threadpool'da
+çalışan senkron kod (run_in_threadpool) görünmez.
+"""
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, List, Optional
+from starlette.routing import Match
+from config import BASE_DIR
+
+# Boşta bekleyen thread'lerin yaprak frame'leri (varsayılan olarak dışlanır)
+_IDLE_LEAVES = {
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"), ("queue.py", "get"), ("thread.py", "_worker"),
+}
+_sampling_lock = threading.Lock()
+
+
+def _frame_label(code) -> str:
+    """'fonksiyon (yol:satır)'; proje dosyaları repo köküne, kütüphaneler paket adına göre"""
+    path = code.co_filename
+    root = str(BASE_DIR) + os.sep
+    if path.startswith(root):
+        path = path[len(root):]
+    elif "site-packages" + os.sep in path:
+        path = path.split("site-packages" + os.sep, 1)[1]
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_LEAVES
+
+
+def sample_stacks(seconds: float, interval: float = 0.005, include_idle: bool = False) -> Dict[str, any]:
+    """
+    Çağıran thread hariç tüm thread'leri `interval` aralıkla örnekle.
+    Aynı anda tek örnekleme çalışır; meşgulse RuntimeError.
+
+    Returns:
+        {"collapsed": "thread;f1;f2 12\\n...", "samples": int, "seconds": float}
+    """
+    if not _sampling_lock.acquire(blocking=False):
+        raise RuntimeError("Başka bir profil örneklemesi zaten çalışıyor")
+    try:
+        own_id = threading.get_ident()
+        stacks = Counter()
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (not include_idle and _is_idle(frame)):
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                stacks[";".join(reversed(labels))] += 1
+            samples += 1
+            time.sleep(interval)
+        elapsed = time.perf_counter() - started
+    finally:
+        _sampling_lock.release()
+
+    collapsed = "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+    return {"collapsed": collapsed + "\n" if collapsed else "", "samples": samples, "seconds": round(elapsed, 3)}
+
+
+class RequestProfiler:
+    """Tek seferlik route capture'ları ve son sonuçlar (bellekte, en fazla `keep` adet)"""
+
+    def __init__(self, keep: int = 10):
+        self._lock = threading.Lock()
+        self.armed = None  # (method, route) - middleware'in tek kontrolü
+        self.captures = deque(maxlen=keep)
+
+    def arm(self, method: str, route) -> Dict[str, str]:
+        with self._lock:
+            self.armed = (method.upper(), route)
+        return {"method": method.upper(), "route": route.path}
+
+    def claim(self, scope) -> bool:
+        """İstek kurulu route'a uyuyorsa capture'ı (atomik olarak) bu isteğe ver"""
+        armed = self.armed
+        if armed is None or scope["method"] != armed[0]:
+            return False
+        if armed[1].matches(scope)[0] != Match.FULL:
+            return False
+        with self._lock:
+            if self.armed is not armed:
+                return False
+            self.armed = None
+        return True
+
+    def record(self, scope, status: int, duration: float, profile: cProfile.Profile, limit: int = 60) -> None:
+        profile.create_stats()
+        # pstats.Stats(profile) profile.stats'ı boşaltır; ham istatistikler önce alınır
+        raw = marshal.dumps(profile.stats)
+        text = io.StringIO()
+        pstats.Stats(profile, stream=text).sort_stats("cumulative").print_stats(limit)
+        capture = {
+            "id": uuid.uuid4().hex[:12],
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status,
+            "duration_ms": round(duration * 1000, 2),
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        with self._lock:
+            self.captures.appendleft({**capture, "text": text.getvalue(), "pstats": raw})
+        print(f"🔬 cProfile capture {capture['id']}: {scope['method']} {scope['path']} ({capture['duration_ms']} ms)")
+
+    def list(self) -> List[Dict[str, any]]:
+        with self._lock:
+            return [
+                {key: value for key, value in capture.items() if key not in ("text", "pstats")}
+                for capture in self.captures
+            ]
+
+    def get(self, capture_id: str) -> Optional[Dict[str, any]]:
+        with self._lock:
+            return next((capture for capture in self.captures if capture["id"] == capture_id), None)
+
+    def status(self) -> Dict[str, any]:
+        armed = self.armed
+        return {
+            "armed": {"method": armed[0], "route": armed[1].path} if armed else None,
+            "captures": len(self.captures),
+        }
+
+
+request_profiler = RequestProfiler()
+
+
+class ProfilingMiddleware:
+    """Kurulu capture varsa eşleşen ilk isteği cProfile altında çalıştır"""
+
+    def __init__(self, app, profiler: RequestProfiler = request_profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if self.profiler.armed is None or scope["type"] != "http" or not self.profiler.claim(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.disable()
+            self.profiler.record(scope, status["code"], time.perf_counter() - started, profile)
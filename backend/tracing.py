@@ -0,0 +1,240 @@
+"""
+İstek bazında hafif tracing.
+Her HTTP isteği bir trace id ve kök span alır; span() ile açılan iç içe span'lar
+contextvars üzerinden (run_in_threadpool dahil) doğru parent'a bağlanır.
+Biten trace'ler OTLP/JSON formatında (opentelemetry-collector'ın file
+exporter/receiver'ı ile aynı) TRACE_EXPORT_PATH'e satır satır yazılır.
+DEBUG modunda yanıtlara X-Trace-Id ve Server-Timing başlıkları eklenir.
+
+Aktif bir trace yokken span() hiçbir şey kaydetmez (scriptler, arka plan işleri).
+
+Usage:
+    with span("llm.generate_content", client="gemini") as current:
+        ...
+        current.set_attribute("outcome", "ok")
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+from config.settings import TRACE_EXPORT_PATH, DEBUG
+from backend.metrics import route_template
+
+# OTLP span kind / status kodları
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace, name: str, parent_id: Optional[str], kind: int, attributes: Dict[str, any]):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_otlp(self) -> Dict[str, any]:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": STATUS_ERROR, "message": self.error} if self.error else {"code": STATUS_OK},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class Trace:
+    """Bir isteğin span'ları; farklı thread'lerden (scraper, threadpool) eklenebilir"""
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self._lock = threading.Lock()
+        self.spans: List[Span] = []
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def finished_spans(self) -> List[Span]:
+        with self._lock:
+            return [span for span in self.spans if span.end_ns is not None]
+
+    def summary(self, exclude: Span = None) -> Dict[str, Dict[str, float]]:
+        """Span adı bazında toplam süre ve adet (Server-Timing için)"""
+        totals = {}
+        for span in self.finished_spans():
+            if span is exclude:
+                continue
+            entry = totals.setdefault(span.name, {"count": 0, "total_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += span.duration_ms
+        return totals
+
+
+def _otlp_attribute(key: str, value) -> Dict[str, any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Aktif trace altında iç içe span; trace yoksa no-op (None verir)"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    current = Span(parent.trace, name, parent.span_id, SPAN_KIND_INTERNAL, attributes)
+    parent.trace.add(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_ns = time.time_ns()
+
+
+def traced(name: str):
+    """Fonksiyon/metod çağrısını span ile sarmalayan dekoratör"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TraceExporter:
+    """Trace başına bir OTLP/JSON satırı (resourceSpans)"""
+
+    def __init__(self, path: str, service_name: str = "socialguard-api"):
+        self.path = Path(path) if path else None
+        self.service_name = service_name
+        self._lock = threading.Lock()
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, trace: Trace) -> None:
+        if self.path is None:
+            return
+        record = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "backend.tracing"},
+                    "spans": [span.to_otlp() for span in trace.finished_spans()],
+                }],
+            }]
+        }
+        line = json.dumps(record, ensure_ascii=False)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print(f"⚠️ Trace yazılamadı: {e}")
+
+
+def _server_timing(summary: Dict[str, Dict[str, float]], limit: int = 20) -> str:
+    """Server-Timing: en uzun span grupları (tarayıcı devtools'ta görünür)"""
+    ranked = sorted(summary.items(), key=lambda item: item[1]["total_ms"], reverse=True)[:limit]
+    return ", ".join(
+        f'{name.replace(" ", "_")};dur={entry["total_ms"]:.1f};desc="x{entry["count"]}"'
+        for name, entry in ranked
+    )
+
+
+class TracingMiddleware:
+    """
+    Saf ASGI middleware: her HTTP isteği için kök span (SERVER) açar.
+    Kök span adı istek bitince route şablonuyla güncellenir ("POST /api/predict").
+    """
+
+    def __init__(self, app, exporter: TraceExporter = None, debug_headers: bool = DEBUG):
+        self.app = app
+        self.exporter = exporter or TraceExporter(TRACE_EXPORT_PATH)
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        root = Span(trace, f'{scope["method"]} {scope["path"]}', None, SPAN_KIND_SERVER, {
+            "http.method": scope["method"],
+            "http.target": scope["path"],
+        })
+        trace.add(root)
+        token = _current_span.set(root)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                if self.debug_headers:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-trace-id", trace.trace_id.encode()))
+                    timing = _server_timing(trace.summary(exclude=root))
+                    if timing:
+                        headers.append((b"server-timing", timing.encode("utf-8")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            root.end_ns = time.time_ns()
+            route = route_template(scope)
+            root.name = f'{scope["method"]} {route}'
+            root.set_attribute("http.route", route)
+            if root.attributes.get("http.status_code", 500) >= 500 and root.error is None:
+                root.error = "HTTP 5xx"
+            self.exporter.export(trace)
+
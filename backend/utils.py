@@ -2,8 +2,17 @@ import re
 import unicodedata
 from datetime import datetime
 from typing import Optional
+import numpy as np
 import pandas as pd
 
+# Risk kategorisi -> öneri metni
+RISK_RECOMMENDATIONS = {
+    'high_risk': "Bu kullanıcı yüksek risk kategorisinde. Dikkatli izleme önerilir.",
+    'medium_risk': "Bu kullanıcı orta risk kategorisinde. Periyodik kontrol önerilir.",
+    'low_risk': "Bu kullanıcı güvenli kategorisinde.",
+    'safe': "Bu kullanıcı güvenli kategorisinde.",
+}
+
 
 def clean_unicode_text(text: Optional[str]) -> str:
     if not text:
@@ -29,16 +38,36 @@ def load_dataset(file_path: str) -> Optional[pd.DataFrame]:
 
 
 def generate_mock_user_report(user_profile, user_id):
-    recommendations = []
-    if user_profile['risk_category'] == 'high_risk':
-        recommendations.append("Bu kullanıcı yüksek risk kategorisinde. Dikkatli izleme önerilir.")
-    elif user_profile['risk_category'] == 'medium_risk':
-        recommendations.append("Bu kullanıcı orta risk kategorisinde. Periyodik kontrol önerilir.")
-    else:
-        recommendations.append("Bu kullanıcı güvenli kategorisinde.")
     return {
-        'recommendations': recommendations,
+        'recommendations': [RISK_RECOMMENDATIONS[user_profile['risk_category']]],
         'analysis_timestamp': datetime.now().isoformat()
     }
 
 
+def aggregate_user_profiles(authors, category_ids, threshold: float) -> pd.DataFrame:
+    """
+    Yorum bazlı tahminlerden kullanıcı profillerini tek groupby ile hesapla.
+    Satırlar yazarların ilk görülme sırasını korur.
+    """
+    df = pd.DataFrame({
+        'user_id': pd.Series(authors, dtype=object),
+        'harmful': np.asarray(category_ids, dtype=np.int64) > 0,
+    })
+    profiles = df.groupby('user_id', sort=False)['harmful'].agg(
+        total_comments='size',
+        harmful_comments='sum'
+    ).reset_index()
+    
+    profiles['total_comments'] = profiles['total_comments'].astype(int)
+    profiles['harmful_comments'] = profiles['harmful_comments'].astype(int)
+    profiles['harmful_ratio'] = profiles['harmful_comments'] / profiles['total_comments']
+    ratio = profiles['harmful_ratio'].to_numpy()
+    profiles['risk_category'] = np.select(
+        [ratio > 0.3, ratio > 0.1, ratio > 0.05],
+        ['high_risk', 'medium_risk', 'low_risk'],
+        default='safe'
+    )
+    profiles['flagged'] = ratio > threshold
+    return profiles
+
+
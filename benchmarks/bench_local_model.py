@@ -0,0 +1,151 @@
+"""
+Local Model Inference Benchmark
+PyTorch checkpoint'ini ONNX Runtime (fp32 ve dinamik int8) ile karşılaştırır.
+
+Her backend ayrı bir process'te yüklenir; böylece bellek ölçümü (peak RSS)
+diğer backend'lerden etkilenmez. Tekli istek gecikmesi (p50/p99), batched
+throughput ve test seti doğruluğu raporlanır.
+
+Kullanım:
+    python benchmarks/bench_local_model.py --model-dir models/turkish_sentiment \
+        --onnx-dir models/turkish_sentiment_onnx --output local_model.json
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary(latencies):
+    return {
+        "count": len(latencies),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+def _peak_rss_mb():
+    # Linux'ta ru_maxrss KB cinsinden
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _load_classifier(backend, path):
+    if backend == "pytorch":
+        from backend.classifiers.transformer_classifier import TransformerClassifier
+        return TransformerClassifier(path)
+    from backend.classifiers.onnx_classifier import OnnxClassifier
+    return OnnxClassifier(path)
+
+
+def _run_backend(backend, path, test_set, repeat):
+    """Bu process içinde tek bir backend'i ölç"""
+    import numpy as np
+    import pandas as pd
+
+    df = pd.read_csv(test_set).dropna(subset=["comment", "label"])
+    texts = df["comment"].astype(str).tolist()
+    labels = df["label"].astype(int).to_numpy()
+
+    baseline_rss = _peak_rss_mb()
+    started = time.perf_counter()
+    classifier = _load_classifier(backend, path)
+    load_time = time.perf_counter() - started
+    loaded_rss = _peak_rss_mb()
+
+    # Isınma (ilk çağrıdaki lazy init ölçüme girmesin)
+    classifier.predict_proba(texts[:2])
+
+    single_latencies = []
+    for _ in range(repeat):
+        for text in texts:
+            started = time.perf_counter()
+            classifier.predict_proba([text])
+            single_latencies.append(time.perf_counter() - started)
+
+    batch_texts = texts * repeat
+    started = time.perf_counter()
+    probabilities = classifier.predict_proba(batch_texts)
+    batch_time = time.perf_counter() - started
+
+    predictions = probabilities[:len(texts)].argmax(axis=1)
+    return {
+        "load_time_s": round(load_time, 3),
+        "single_latency": _summary(single_latencies),
+        "batch_size": classifier.batch_size,
+        "batch_throughput_per_s": round(len(batch_texts) / batch_time, 1),
+        "accuracy": round(float(np.mean(predictions == labels)), 4),
+        "model_rss_mb": round(loaded_rss - baseline_rss, 1),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _run_child(backend, path, args):
+    """Her backend ayrı process'te çalışır"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(ROOT_DIR)
+    command = [
+        sys.executable, __file__, "--child", backend, "--child-path", str(path),
+        "--test-set", args.test_set, "--repeat", str(args.repeat),
+    ]
+    output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result.update({"backend": backend, "path": str(path)})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local model inference benchmark")
+    parser.add_argument("--model-dir", type=str, default=None, help="PyTorch checkpoint klasörü")
+    parser.add_argument("--onnx-dir", type=str, default=None, help="ML/export_onnx_model.py çıktı klasörü")
+    parser.add_argument("--test-set", type=str, default=str(ROOT_DIR / "data" / "test_set_siber_zorbalik_v2.csv"))
+    parser.add_argument("--repeat", type=int, default=5, help="Test setinin kaç kez tekrarlanacağı")
+    parser.add_argument("--output", type=str, default=None, help="JSON çıktı dosyası")
+    parser.add_argument("--child", type=str, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--child-path", type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = _run_backend(args.child, args.child_path, args.test_set, args.repeat)
+        print(json.dumps(result))
+        return
+
+    backends = []
+    if args.model_dir:
+        backends.append(("pytorch", Path(args.model_dir)))
+    if args.onnx_dir:
+        backends.append(("onnx_fp32", Path(args.onnx_dir) / "model.onnx"))
+        backends.append(("onnx_int8", Path(args.onnx_dir) / "model.quant.onnx"))
+    if not backends:
+        parser.error("--model-dir ve/veya --onnx-dir gerekli")
+
+    results = {
+        "benchmark": "local_model_inference",
+        "test_set": args.test_set,
+        "repeat": args.repeat,
+        "runs": [_run_child(backend, path, args) for backend, path in backends if path.exists()],
+    }
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        Path(args.output).write_text(report, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Login Throughput Benchmark
+bcrypt'in event loop üzerinde (inline) ve thread pool'da çalıştırılmasını karşılaştırır.
+
+Eşzamanlı login istekleri atılırken /api/health'e sürekli ping gönderilir;
+ping gecikmesi, login'lerin diğer istekleri ne kadar bloke ettiğini gösterir.
+
+Kullanım:
+    python benchmarks/bench_login.py --requests 40 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary(latencies):
+    return {
+        "count": len(latencies),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+async def _run_load(total_requests, concurrency, probe_interval):
+    """Bu process içinde app'i ayağa kaldır ve yükü uygula"""
+    import httpx
+    from database.database import init_db
+    from backend.main import app
+
+    init_db()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        credentials = {"email": "bench@example.com", "password": "bench-password"}
+        await client.post("/api/auth/register", json={"name": "bench", **credentials})
+
+        login_latencies = []
+        probe_latencies = []
+        semaphore = asyncio.Semaphore(concurrency)
+        done = asyncio.Event()
+
+        async def one_login():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/api/auth/login", json=credentials)
+                login_latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        async def probe():
+            # Gecikme planlanan gönderim anından ölçülür; event loop bloke olduğunda
+            # kaçırılan ping'ler de sonuca yansır (coordinated omission yok)
+            scheduled = time.perf_counter()
+            while not done.is_set():
+                await client.get("/api/health")
+                probe_latencies.append(time.perf_counter() - scheduled)
+                scheduled += probe_interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(one_login() for _ in range(total_requests)))
+        wall_time = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    return {
+        "wall_time_s": round(wall_time, 3),
+        "logins_per_s": round(total_requests / wall_time, 2),
+        "login_latency": _summary(login_latencies),
+        "concurrent_probe_latency": _summary(probe_latencies),
+    }
+
+
+def _run_mode(mode, workers, args):
+    """Her mod ayrı bir process'te çalışır (ayarlar import sırasında okunuyor)"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = dict(os.environ)
+        env.update({
+            "DATABASE_URL": f"sqlite:///{tmp_dir}/bench.db",
+            "PASSWORD_HASH_WORKERS": str(workers),
+            "BCRYPT_ROUNDS": str(args.rounds),
+            "PYTHONPATH": str(ROOT_DIR),
+        })
+        command = [
+            sys.executable, __file__, "--child",
+            "--requests", str(args.requests),
+            "--concurrency", str(args.concurrency),
+        ]
+        output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        result.update({"mode": mode, "workers": workers, "bcrypt_rounds": args.rounds})
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput benchmark")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4, help="Thread pool boyutu")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--output", type=str, default=None, help="JSON çıktı dosyası")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = asyncio.run(_run_load(args.requests, args.concurrency, probe_interval=0.01))
+        print(json.dumps(result))
+        return
+
+    results = {
+        "benchmark": "login_throughput",
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "runs": [
+            _run_mode("inline", 0, args),
+            _run_mode("thread_pool", args.workers, args),
+        ],
+    }
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        Path(args.output).write_text(report, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Dense Retrieval Benchmark
+HNSW index'inin recall@k ve gecikmesini exact (brute-force) arama ile karşılaştırır.
+
+Gerçek korpus: dataset.csv bir sentence embedding modeliyle embed edilir,
+sorgular test setinden gelir. Model yoksa --synthetic ile kümelenmiş rastgele
+vektörlerde farklı korpus boyutları ölçülür.
+
+Kullanım:
+    python benchmarks/bench_retrieval.py --embedding-model models/minilm-onnx
+    python benchmarks/bench_retrieval.py --synthetic 2000 20000 100000 --dim 384
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from backend.few_shot.dense_retrieval import ExactIndex, HnswIndex, SentenceEncoder, _normalize
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary(latencies):
+    return {
+        "count": len(latencies),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3) if latencies else 0.0,
+    }
+
+
+def _per_query_latency(index, queries, k):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def _recall(exact_ids, approx_ids):
+    """recall@k: ANN'in bulduğu gerçek top-k komşu oranı"""
+    hits = sum(len(set(e) & set(a)) for e, a in zip(exact_ids, approx_ids))
+    return hits / exact_ids.size
+
+
+def run_case(corpus, queries, ks, ef_values, M, ef_construction):
+    """Tek korpus için exact vs HNSW (farklı ef_search değerleri)"""
+    vectors = corpus.astype(np.float16)  # Servisteki memmap ile aynı hassasiyet
+    exact = ExactIndex(vectors)
+
+    started = time.perf_counter()
+    hnsw = HnswIndex.build(vectors, M=M, ef_construction=ef_construction)
+    build_time = time.perf_counter() - started
+
+    max_k = max(ks)
+    exact_ids, _ = exact.search(queries, max_k)
+    result = {
+        "corpus_size": len(corpus),
+        "dim": corpus.shape[1],
+        "hnsw_build_s": round(build_time, 3),
+        "exact_latency": _summary(_per_query_latency(exact, queries, max_k)),
+        "hnsw": [],
+    }
+    for ef in ef_values:
+        hnsw.index.set_ef(max(ef, max_k))
+        approx_ids, _ = hnsw.search(queries, max_k)
+        result["hnsw"].append({
+            "ef_search": ef,
+            **{f"recall@{k}": round(_recall(exact_ids[:, :k], approx_ids[:, :k]), 4) for k in ks},
+            "latency": _summary(_per_query_latency(hnsw, queries, max_k)),
+        })
+    return result
+
+
+def _synthetic(size, centers, rng):
+    """Kümelenmiş normalize vektörler (gerçek embedding dağılımına daha yakın)"""
+    dim = centers.shape[1]
+    assignment = rng.integers(0, len(centers), size=size)
+    return _normalize(centers[assignment] + 0.5 * rng.normal(size=(size, dim)).astype(np.float32))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dense retrieval recall@k benchmark")
+    parser.add_argument("--embedding-model", type=str, default=None, help="sentence-transformers adı veya model.onnx klasörü")
+    parser.add_argument("--synthetic", type=int, nargs="*", default=None, help="Sentetik korpus boyutları")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200, help="Sentetik sorgu sayısı")
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128])
+    parser.add_argument("--M", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--output", type=str, default=None, help="JSON çıktı dosyası")
+    args = parser.parse_args()
+
+    cases = []
+    if args.embedding_model:
+        import pandas as pd
+        from backend.few_shot.fewshot_model import few_shot_model
+
+        encoder = SentenceEncoder(args.embedding_model)
+        corpus = encoder.encode([ex["text"] for ex in few_shot_model.training_data])
+        test_df = pd.read_csv(ROOT_DIR / "data" / "test_set_siber_zorbalik_v2.csv")
+        queries = encoder.encode(test_df["comment"].astype(str).tolist())
+        case = run_case(corpus, queries, args.k, args.ef, args.M, args.ef_construction)
+        case["corpus"] = "dataset.csv"
+        cases.append(case)
+
+    if args.synthetic:
+        rng = np.random.default_rng(42)
+        for size in args.synthetic:
+            centers = rng.normal(size=(max(size // 100, 5), args.dim)).astype(np.float32)
+            corpus = _synthetic(size, centers, rng)
+            queries = _synthetic(args.queries, centers, rng)
+            case = run_case(corpus, queries, args.k, args.ef, args.M, args.ef_construction)
+            case["corpus"] = "synthetic"
+            cases.append(case)
+
+    if not cases:
+        parser.error("--embedding-model ve/veya --synthetic gerekli")
+
+    report = json.dumps({"benchmark": "dense_retrieval", "M": args.M,
+                         "ef_construction": args.ef_construction, "cases": cases}, indent=2)
+    print(report)
+    if args.output:
+        Path(args.output).write_text(report, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""
+Few-shot Pipeline Benchmark Suite
+Commit'ler arası karşılaştırılabilir JSON rapor üretir:
+
+  - retrieval: get_few_shot_examples tekli sorgu ve toplu (_retrieve / _retrieve_by_label)
+    gecikmesi, farklı korpus boyutlarında (dataset.csv çoğaltılarak, TF-IDF yolu)
+  - prompt: create_enhanced_prompt oluşturma süresi
+  - predict: predict_with_few_shot, sabit gecikmeli fake LLM istemcisiyle (ağ yok)
+  - startup: backend.main import süresi (ayrı process, soğuk başlangıç)
+  - endpoints: /api/predict ve /api/batch-predict throughput'u (in-process ASGI client)
+
+Model yükleme logları stdout'a yazıldığından rapor --output dosyasına da kaydedilir.
+--compare ile önceki bir raporla metrik bazında oran (yeni / eski) yazdırılır.
+
+Kullanım:
+    python benchmarks/bench_suite.py --output bench_before.json
+    python benchmarks/bench_suite.py --output bench_after.json --compare bench_before.json
+    python benchmarks/bench_suite.py --only retrieval prompt --sizes 1 4 16
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+CASES = ("retrieval", "prompt", "predict", "startup", "endpoints")
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary(latencies):
+    return {
+        "count": len(latencies),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3) if latencies else 0.0,
+    }
+
+
+def _timed(fn, items):
+    latencies = []
+    for item in items:
+        started = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def _fake_llm(latency_ms):
+    """Sabit gecikmeli, hatasız fake LLM istemcisi (ağ yok)"""
+    from backend.few_shot.llm_clients import FakeLLMClient
+    return FakeLLMClient(latency="fixed", latency_ms=latency_ms)
+
+
+def _load_model():
+    """few_shot_model'i yükle; yükleme logları rapora karışmasın"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        from backend.few_shot.fewshot_model import few_shot_model
+    return few_shot_model
+
+
+def _queries(model, count):
+    import pandas as pd
+
+    test_path = ROOT_DIR / "data" / "test_set_siber_zorbalik_v2.csv"
+    if test_path.exists():
+        texts = pd.read_csv(test_path)["comment"].dropna().astype(str).tolist()
+    else:
+        texts = [ex["text"] for ex in model.training_data]
+    return [texts[i % len(texts)] for i in range(count)]
+
+
+@contextlib.contextmanager
+def _scaled_corpus(model, factor):
+    """Korpusu factor kez çoğaltıp TF-IDF index'ini yeniden kur; çıkışta eski hale getir"""
+    saved = (model.training_data, model.vectorizer, model.tfidf_matrix, model.dense_retriever)
+    try:
+        if factor != 1:
+            training_data = [dict(ex) for _ in range(factor) for ex in saved[0]]
+            vectorizer = model._build_vectorizer()
+            tfidf_matrix = vectorizer.fit_transform([ex["text"] for ex in training_data])
+            with model._index_lock:
+                model.training_data, model.vectorizer, model.tfidf_matrix = training_data, vectorizer, tfidf_matrix
+        # Boyut taraması TF-IDF yolunu ölçer; dense index çoğaltılmış korpusla hizalı değil
+        model.dense_retriever = None
+        yield len(model.training_data)
+    finally:
+        with model._index_lock:
+            model.training_data, model.vectorizer, model.tfidf_matrix, model.dense_retriever = saved
+
+
+def bench_retrieval(model, args):
+    queries = _queries(model, args.queries)
+    cases = []
+    for factor in args.sizes:
+        with _scaled_corpus(model, factor) as corpus_size:
+            model.get_few_shot_examples(queries[0])  # Isınma (label blok cache'i vb.)
+            model._retrieve_by_label(queries[:1])
+            case = {
+                "corpus_size": corpus_size,
+                "single": _summary(_timed(lambda q: model.get_few_shot_examples(q, limit=5), queries)),
+                "by_label_single": _summary(_timed(lambda q: model.get_examples_by_label(q), queries)),
+            }
+            started = time.perf_counter()
+            model._retrieve(queries, 5)
+            batch_time = time.perf_counter() - started
+            started = time.perf_counter()
+            model._retrieve_by_label(queries, per_label=5)
+            by_label_time = time.perf_counter() - started
+            case["batch"] = {
+                "queries": len(queries),
+                "total_ms": round(batch_time * 1000, 3),
+                "per_query_ms": round(batch_time * 1000 / len(queries), 4),
+            }
+            case["by_label_batch"] = {
+                "queries": len(queries),
+                "total_ms": round(by_label_time * 1000, 3),
+                "per_query_ms": round(by_label_time * 1000 / len(queries), 4),
+            }
+            cases.append(case)
+    return {"mode": "tfidf", "cases": cases}
+
+
+def bench_prompt(model, args):
+    from backend.few_shot.prompt_builder import estimate_tokens
+    queries = _queries(model, args.queries)
+    neighbours = model._retrieve_by_label(queries, per_label=5)
+    inputs = [
+        (text, model._merge_neighbours(by_label, limit=5), by_label)
+        for text, by_label in zip(queries, neighbours)
+    ]
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        latencies = _timed(lambda item: model.create_enhanced_prompt(*item), inputs)
+        prompts = [model.create_enhanced_prompt(*item) for item in inputs[:20]]
+    sizes = [len(prompt) for prompt in prompts]
+    tokens = [estimate_tokens(prompt) for prompt in prompts]
+    return {
+        "latency": _summary(latencies),
+        "prompt_chars_mean": round(sum(sizes) / len(sizes), 1),
+        "prompt_tokens_mean": round(sum(tokens) / len(tokens), 1),
+        "prompt_tokens_max": max(tokens),
+    }
+
+
+def bench_predict(model, args):
+    queries = _queries(model, args.queries)
+    llm = _fake_llm(args.llm_latency_ms)
+    saved = model.model
+    model.model = llm
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.predict_with_few_shot(queries[0])
+            llm.calls = 0
+            single = _timed(model.predict_with_few_shot, queries)
+            started = time.perf_counter()
+            model.predict_batch(queries)
+            batch_time = time.perf_counter() - started
+    finally:
+        model.model = saved
+    return {
+        "llm_latency_ms": args.llm_latency_ms,
+        "llm_calls": llm.calls,
+        "single": _summary(single),
+        "batch": {
+            "queries": len(queries),
+            "total_ms": round(batch_time * 1000, 3),
+            "per_query_ms": round(batch_time * 1000 / len(queries), 4),
+        },
+    }
+
+
+def bench_startup(args):
+    """Her tekrar ayrı, taze bir process'te: modül cache'i ve lazy init ölçüme dahil"""
+    code = (
+        "import time, json, contextlib, io\n"
+        "started = time.perf_counter()\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    import backend.main\n"
+        "print(json.dumps(time.perf_counter() - started))\n"
+    )
+    timings = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = _child_env(tmp_dir)
+        for _ in range(args.startup_runs):
+            output = subprocess.run(
+                [sys.executable, "-c", code], env=env, cwd=ROOT_DIR,
+                capture_output=True, text=True, check=True
+            ).stdout
+            timings.append(json.loads(output.strip().splitlines()[-1]))
+    return {"import_backend_main": _summary(timings)}
+
+
+async def _run_endpoints(args):
+    """Bu process içinde app'i ayağa kaldır; fake LLM ile /api/predict ve /api/batch-predict"""
+    import httpx
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        from database.database import init_db
+        from backend.main import app
+        from backend.few_shot.fewshot_model import few_shot_model
+        init_db()
+    few_shot_model.model = _fake_llm(args.llm_latency_ms)
+    queries = _queries(few_shot_model, args.queries)
+    params = {"backend": args.backend} if args.backend else None
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        credentials = {"email": "bench@example.com", "password": "bench-password"}
+        await client.post("/api/auth/register", json={"name": "bench", **credentials})
+        response = await client.post("/api/auth/login", json=credentials)
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies = []
+
+        async def one_predict(text):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/api/predict", json={"comment": text},
+                                             params=params, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            await one_predict(queries[0])  # Isınma
+            latencies.clear()
+            started = time.perf_counter()
+            await asyncio.gather(*(one_predict(text) for text in queries))
+            predict_time = time.perf_counter() - started
+
+            batches = [queries[i:i + args.batch_size] for i in range(0, len(queries), args.batch_size)]
+            batch_latencies = []
+            started = time.perf_counter()
+            for batch in batches:
+                batch_started = time.perf_counter()
+                response = await client.post("/api/batch-predict", json=batch, params=params, headers=headers)
+                batch_latencies.append(time.perf_counter() - batch_started)
+                response.raise_for_status()
+            batch_time = time.perf_counter() - started
+
+    return {
+        "backend": args.backend or "default",
+        "concurrency": args.concurrency,
+        "llm_latency_ms": args.llm_latency_ms,
+        "predict": {
+            "requests": len(queries),
+            "requests_per_s": round(len(queries) / predict_time, 2),
+            "latency": _summary(latencies),
+        },
+        "batch_predict": {
+            "batch_size": args.batch_size,
+            "comments_per_s": round(len(queries) / batch_time, 2),
+            "latency": _summary(batch_latencies),
+        },
+    }
+
+
+def _child_env(tmp_dir):
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{tmp_dir}/bench.db",
+        "BCRYPT_ROUNDS": "4",  # Login maliyeti ölçülmüyor
+        "PYTHONPATH": str(ROOT_DIR),
+    })
+    return env
+
+
+def bench_endpoints(args):
+    """Ayrı process: ayarlar (DATABASE_URL) import sırasında okunuyor"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        command = [
+            sys.executable, __file__, "--child",
+            "--queries", str(args.queries),
+            "--concurrency", str(args.concurrency),
+            "--batch-size", str(args.batch_size),
+            "--llm-latency-ms", str(args.llm_latency_ms),
+        ]
+        if args.backend:
+            command += ["--backend", args.backend]
+        output = subprocess.run(command, env=_child_env(tmp_dir), cwd=ROOT_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _flatten(value, prefix=""):
+    """İç içe raporu 'a.b.c' -> sayı eşlemesine çevir (listeler index ile)"""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = ((str(i), v) for i, v in enumerate(value))
+    else:
+        return {prefix: value} if isinstance(value, (int, float)) and not isinstance(value, bool) else {}
+    flat = {}
+    for key, child in items:
+        flat.update(_flatten(child, f"{prefix}.{key}" if prefix else key))
+    return flat
+
+
+def compare_reports(baseline, current):
+    """Ortak metrikler için yeni / eski oranı (gecikmede < 1, throughput'ta > 1 iyileşme)"""
+    old = _flatten(baseline.get("results", {}))
+    new = _flatten(current.get("results", {}))
+    return {
+        key: {"baseline": old[key], "current": new[key], "ratio": round(new[key] / old[key], 3)}
+        for key in sorted(old.keys() & new.keys())
+        if old[key]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Few-shot pipeline benchmark suite")
+    parser.add_argument("--only", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4, 16], help="Korpus çoğaltma katsayıları")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Fake LLM yanıt gecikmesi")
+    parser.add_argument("--backend", type=str, default=None, help="Endpoint'lerde ?backend= (varsayılan: CLASSIFIER_BACKEND)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--startup-runs", type=int, default=3)
+    parser.add_argument("--output", type=str, default=None, help="JSON çıktı dosyası")
+    parser.add_argument("--compare", type=str, default=None, help="Karşılaştırılacak önceki rapor")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(_run_endpoints(args))))
+        return
+
+    results = {}
+    if {"retrieval", "prompt", "predict"} & set(args.only):
+        model = _load_model()
+        if "retrieval" in args.only:
+            results["retrieval"] = bench_retrieval(model, args)
+        if "prompt" in args.only:
+            results["prompt"] = bench_prompt(model, args)
+        if "predict" in args.only:
+            results["predict"] = bench_predict(model, args)
+    if "startup" in args.only:
+        results["startup"] = bench_startup(args)
+    if "endpoints" in args.only:
+        results["endpoints"] = bench_endpoints(args)
+
+    report = {
+        "benchmark": "fewshot_suite",
+        "commit": _git_commit(),
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        report["baseline_commit"] = baseline.get("commit")
+        report["comparison"] = compare_reports(baseline, report)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,66 @@ STATIC_DIR = BASE_DIR / "static"
 
 # Gemini API - Production'da environment variable'dan al
 GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY", "")
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.0-flash-exp")
+
+# LLM istemcisi: "gemini" (varsayılan) veya "fake" (ağsız, deterministik yük testi istemcisi)
+LLM_CLIENT = os.getenv("LLM_CLIENT", "gemini")
+LLM_FAKE_LATENCY = os.getenv("LLM_FAKE_LATENCY", "lognormal")  # fixed, uniform veya lognormal
+LLM_FAKE_LATENCY_MS = float(os.getenv("LLM_FAKE_LATENCY_MS", 400))  # Medyan yanıt süresi
+LLM_FAKE_LATENCY_SPREAD = float(os.getenv("LLM_FAKE_LATENCY_SPREAD", 0.5))  # lognormal sigma / uniform ±oran
+LLM_FAKE_ERROR_RATE = float(os.getenv("LLM_FAKE_ERROR_RATE", 0))  # 503 oranı
+LLM_FAKE_RATE_LIMIT_RATE = float(os.getenv("LLM_FAKE_RATE_LIMIT_RATE", 0))  # 429 oranı
+LLM_FAKE_SEED = int(os.getenv("LLM_FAKE_SEED", 42))
+
+# Few-shot benzer örnek arama: "tfidf" (varsayılan) veya "dense" (sentence embedding + HNSW)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "tfidf")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")  # veya model.onnx içeren klasör
+EMBEDDINGS_DIR = os.getenv("EMBEDDINGS_DIR", str(BASE_DIR / "models" / "embeddings"))  # float16 memmap + HNSW index
+ANN_M = int(os.getenv("ANN_M", 16))
+ANN_EF_CONSTRUCTION = int(os.getenv("ANN_EF_CONSTRUCTION", 200))
+ANN_EF_SEARCH = int(os.getenv("ANN_EF_SEARCH", 64))
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 50000))  # Gelen yorum embedding cache'i (0: kapalı)
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", str(Path(EMBEDDINGS_DIR) / "query_cache"))
+
+# Çalışma zamanında eklenen etiketli örnekler (düzeltilmiş tahminler vb.)
+TRAINING_ADDITIONS_PATH = os.getenv("TRAINING_ADDITIONS_PATH", str(DATA_DIR / "dataset_additions.csv"))
+REFIT_AFTER_APPENDS = int(os.getenv("REFIT_AFTER_APPENDS", 200))  # Bu kadar eklemeden sonra arka planda TF-IDF refit (0: sadece manuel)
+STRATIFIED_PROMPT_EXAMPLES = int(os.getenv("STRATIFIED_PROMPT_EXAMPLES", 2))  # Prompt'ta kategori başına en benzer örnek sayısı (0: kapalı)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 1200))  # Few-shot prompt'un tahmini token üst sınırı
+PROMPT_MAX_INPUT_TOKENS = int(os.getenv("PROMPT_MAX_INPUT_TOKENS", 400))  # Daha uzun yorumlar baştan/sondan kısaltılır
+PROMPT_MAX_EXAMPLE_TOKENS = int(os.getenv("PROMPT_MAX_EXAMPLE_TOKENS", 60))  # Örnek yorum başına üst sınır
+PROMPT_DEDUP_THRESHOLD = float(os.getenv("PROMPT_DEDUP_THRESHOLD", 0.6))  # Bu Jaccard benzerliğinin üstündeki örnekler tekrar gösterilmez
+PROMPT_MODE = os.getenv("PROMPT_MODE", "budget")  # budget veya legacy (önceki prompt, bütçesiz; A/B için)
+
+# Sınıflandırıcı backend'i: "fewshot" (Gemini + few-shot), "local" (fine-tune edilmiş transformer)
+# "onnx" (aynı modelin ONNX Runtime / int8 hali), "linear" (eğitilmiş TF-IDF lineer model),
+# "tfidf" (few-shot TF-IDF matrisi üzerinde başlangıçta eğitilen logistic regression)
+# veya "cascade" (lokal aşama + belirsiz yorumlar için Gemini)
+# İstek bazında ?backend=... ile değiştirilebilir
+CLASSIFIER_BACKEND = os.getenv("CLASSIFIER_BACKEND", "fewshot")
+
+# Lokal transformer modeli (trainer.save_model() + tokenizer.save_pretrained() çıktısı)
+LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH", str(BASE_DIR / "models" / "turkish_sentiment"))
+LOCAL_MODEL_BATCH_SIZE = int(os.getenv("LOCAL_MODEL_BATCH_SIZE", 32))
+LOCAL_MODEL_MAX_LENGTH = int(os.getenv("LOCAL_MODEL_MAX_LENGTH", 128))
+LOCAL_MODEL_THREADS = int(os.getenv("LOCAL_MODEL_THREADS", 0))  # 0: torch varsayılanı
+
+# ONNX Runtime backend'i (ML/export_onnx_model.py çıktısı; tokenizer aynı klasörde)
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH", str(BASE_DIR / "models" / "turkish_sentiment_onnx" / "model.quant.onnx"))
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", 0))  # 0: fiziksel çekirdek sayısı
+ONNX_INTER_OP_THREADS = int(os.getenv("ONNX_INTER_OP_THREADS", 1))  # Sequential execution için 1 yeterli
+
+# TF-IDF lineer model (ML/train_linear_model.py çıktısı) - Gemini fallback'i ve cascade ilk aşaması
+LINEAR_MODEL_PATH = os.getenv("LINEAR_MODEL_PATH", str(BASE_DIR / "models" / "linear_tfidf.joblib"))
+
+# Cascade: önce hızlı lokal aşama, sadece düşük confidence'lı yorumlar Gemini'ye gider
+CASCADE_FIRST_STAGE = os.getenv("CASCADE_FIRST_STAGE", "linear")  # linear, tfidf, local veya onnx
+CASCADE_THRESHOLD = float(os.getenv("CASCADE_THRESHOLD", 0))  # 0: kalibrasyonla otomatik belirlenir
+CASCADE_TARGET_ACCURACY = float(os.getenv("CASCADE_TARGET_ACCURACY", 0.85))  # İlk aşamada kalan tahminlerin hedef doğruluğu
+# Out-of-fold verisi olmayan ilk aşamalar (local/onnx) için: eğitim scriptinin ayırdığı validation split'i
+# (train_turkish_sentiment_model.py ile aynı dosya, oran ve seed). Test setleri kalibrasyonda kullanılamaz.
+CASCADE_CALIBRATION_SET = os.getenv("CASCADE_CALIBRATION_SET", str(DATA_DIR / "nlpaug_turkish_augmented.csv"))
+CASCADE_CALIBRATION_HOLDOUT = float(os.getenv("CASCADE_CALIBRATION_HOLDOUT", 0.2))  # 0: dosyanın tamamı (ayrı tutulmuş bir set ise)
 
 # Label mappings and categories
 LABEL_MAP = {
@@ -29,6 +29,26 @@ if not DATABASE_URL:
     DATABASE_PASSWORD = os.getenv("DATABASE_PASSWORD", "")
     DATABASE_URL = f"postgresql://{DATABASE_USER}:{DATABASE_PASSWORD}@{DATABASE_HOST}:{DATABASE_PORT}/{DATABASE_NAME}"
 
+# Async Database Configuration
+# PostgreSQL -> asyncpg, SQLite (lokal testler) -> aiosqlite
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+if not ASYNC_DATABASE_URL:
+    if DATABASE_URL.startswith(("postgresql://", "postgres://")):
+        ASYNC_DATABASE_URL = "postgresql+asyncpg://" + DATABASE_URL.split("://", 1)[1]
+    elif DATABASE_URL.startswith("sqlite://"):
+        ASYNC_DATABASE_URL = "sqlite+aiosqlite://" + DATABASE_URL.split("://", 1)[1]
+    else:
+        ASYNC_DATABASE_URL = DATABASE_URL
+
+# Connection pool (sync ve async engine için ayrı ayrı uygulanır)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))  # seconds - checkout bekleme limiti
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", -1))  # seconds - -1: kapalı
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", 0))  # 0: yavaş sorgu loglama kapalı
+
 # JWT Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "cyberbullying-secret-key-change-in-production-2024")
 if ENVIRONMENT == "production" and SECRET_KEY == "cyberbullying-secret-key-change-in-production-2024":
@@ -37,11 +57,31 @@ if ENVIRONMENT == "production" and SECRET_KEY == "cyberbullying-secret-key-chang
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60 * 24 * 7))  # 7 days default
 
+# Password hashing (bcrypt) - event loop'u bloklamamak için thread pool'da çalışır
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))  # Cost factor (passlib default: 12)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 4))  # 0: inline (event loop üzerinde)
+
+# Authenticated user cache (get_current_user) - 0 ile kapatılır
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 30))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", 1024))
+
+# Request tracing (OpenTelemetry uyumlu JSON lines, collector gerekmez)
+DEBUG = os.getenv("DEBUG", "false").lower() == "true"  # Yanıtlara X-Trace-Id + Server-Timing başlıkları
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true" or DEBUG
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", str(BASE_DIR / "logs" / "traces.jsonl"))  # Boş: dosyaya yazma
+
+# Canlı worker profilleme (admin-only, opt-in). Kapalıyken endpoint'ler ve middleware eklenmez.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_MAX_SECONDS = float(os.getenv("PROFILING_MAX_SECONDS", 60))
+# Admin yetkisi: User modelinde rol alanı olmadığından e-posta listesiyle verilir (virgülle ayrılmış)
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+
 # Scraping settings (Timeout yok - Uzun işlemler için)
 DEFAULT_MAX_COMMENTS = 20  # Çok az yorum (3-5 dakika altında bitmeli)
 SCROLL_TIMEOUT = 600  # 10 dakika max (uzun scroll işlemleri için)
 SCROLL_DELAY = 1  # seconds (çok hızlı)
 LONG_SCROLL_DELAY = 1  # seconds (çok hızlı)
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 4))  # Scraper -> sınıflandırma arasında bekleyen parti sayısı
 
 # Chrome options (ULTRA MINIMAL - FREE TIER 512MB)
 # Başka projelerde çalışan minimal konfigürasyon
@@ -1,6 +1,9 @@
 """Database package"""
-from .database import engine, SessionLocal, get_db, Base
-from .db_models import User, Analysis, ManualPrediction, PredictionType
-
-__all__ = ["engine", "SessionLocal", "get_db", "Base", "User", "Analysis", "ManualPrediction", "PredictionType"]
+from .database import engine, SessionLocal, get_db, Base, async_engine, AsyncSessionLocal, get_async_db
+from .db_models import User, Analysis, ManualPrediction, PredictionType, UserStatsRollup
 
+__all__ = [
+    "engine", "SessionLocal", "get_db", "Base",
+    "async_engine", "AsyncSessionLocal", "get_async_db",
+    "User", "Analysis", "ManualPrediction", "PredictionType", "UserStatsRollup",
+]
@@ -1,21 +1,63 @@
 """Database connection and session management"""
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from config.settings import DATABASE_URL
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from config.settings import (
+    DATABASE_URL, ASYNC_DATABASE_URL,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+    DB_SLOW_QUERY_MS
+)
+from .pool_metrics import PoolMetrics, instrumented_pool_class, instrument_engine
+
+# Pool istatistikleri (/api/health ve metrics için)
+pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+
+def _pool_kwargs(url: str, pool_cls, metrics: PoolMetrics) -> dict:
+    """Pool parameters (SQLite dialects manage their own pools)"""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": instrumented_pool_class(pool_cls, metrics),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,  # Verify connections before using
+    }
+
 
 # SQLAlchemy engine
 engine = create_engine(
     DATABASE_URL,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,  # Verify connections before using
-    echo=False  # Set to True for SQL debugging
+    echo=False,  # Set to True for SQL debugging
+    **_pool_kwargs(DATABASE_URL, QueuePool, pool_metrics)
+)
+instrument_engine(engine, pool_metrics, slow_query_ms=DB_SLOW_QUERY_MS)
+
+# Async SQLAlchemy engine (asyncpg / aiosqlite)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    **_pool_kwargs(ASYNC_DATABASE_URL, AsyncAdaptedQueuePool, async_pool_metrics)
 )
+instrument_engine(async_engine.sync_engine, async_pool_metrics, slow_query_ms=DB_SLOW_QUERY_MS)
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async session factory
+# expire_on_commit=False: commit sonrası nesneler endpoint'te okunmaya devam ediyor
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -32,9 +74,17 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Async database session dependency for FastAPI.
+    Usage: db: AsyncSession = Depends(get_async_db)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """Initialize database tables"""
-    from .db_models import User, Analysis, ManualPrediction
+    from .db_models import User, Analysis, ManualPrediction, UserStatsRollup
     Base.metadata.create_all(bind=engine)
     print("Database tables created successfully!")
-
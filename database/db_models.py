@@ -1,7 +1,6 @@
 """SQLAlchemy Database Models"""
-from sqlalchemy import Column, String, Integer, Float, DateTime, Text, ForeignKey, JSON, Enum
+from sqlalchemy import Column, String, Integer, Float, DateTime, Text, ForeignKey, JSON, Enum, Uuid, UniqueConstraint
 from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 import uuid
 import enum
@@ -19,7 +18,7 @@ class User(Base):
     """User model - stores registered user information"""
     __tablename__ = "users"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False)
     email = Column(String(255), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
@@ -31,6 +30,7 @@ class User(Base):
     # Relationships
     analyses = relationship("Analysis", back_populates="user", cascade="all, delete-orphan")
     manual_predictions = relationship("ManualPrediction", back_populates="user", cascade="all, delete-orphan")
+    stats_rollups = relationship("UserStatsRollup", back_populates="user", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email}, name={self.name})>"
@@ -40,10 +40,10 @@ class Analysis(Base):
     """Analysis model - stores social media analysis results"""
     __tablename__ = "analyses"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
     # User relation
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     user = relationship("User", back_populates="analyses")
     
     # Analysis metadata
@@ -77,10 +77,10 @@ class ManualPrediction(Base):
     """Manuel tahmin modeli - Tekli, çoklu ve veri seti yükleme tahminleri"""
     __tablename__ = "manual_predictions"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
     # User relation
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     user = relationship("User", back_populates="manual_predictions")
     
     # Tahmin türü
@@ -111,3 +111,41 @@ class ManualPrediction(Base):
         return f"<ManualPrediction(id={self.id}, user_id={self.user_id}, type={self.prediction_type}, total={self.total_comments})>"
 
 
+class UserStatsRollup(Base):
+    """Dashboard özetleri - kullanıcı başına toplam ('total') ve günlük (YYYY-MM-DD) satırlar"""
+    __tablename__ = "user_stats_rollups"
+    __table_args__ = (
+        UniqueConstraint("user_id", "period", name="uq_user_stats_rollups_user_period"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # User relation
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    user = relationship("User", back_populates="stats_rollups")
+    period = Column(String(10), nullable=False)  # "total" veya "YYYY-MM-DD"
+    
+    # Sosyal medya analizleri
+    analyses_count = Column(Integer, default=0, nullable=False)
+    analysis_comments = Column(Integer, default=0, nullable=False)
+    analyzed_users = Column(Integer, default=0, nullable=False)
+    flagged_users = Column(Integer, default=0, nullable=False)
+    analysis_duration_total = Column(Float, default=0.0, nullable=False)  # saniye
+    platform_counts = Column(JSON, nullable=True)  # {"instagram": 3}
+    
+    # Manuel tahminler
+    manual_predictions_count = Column(Integer, default=0, nullable=False)
+    manual_comments = Column(Integer, default=0, nullable=False)
+    processing_time_total = Column(Float, default=0.0, nullable=False)  # saniye
+    
+    # Kategori dağılımı (analiz yorumları + manuel tahminler)
+    category_0_count = Column(Integer, default=0, nullable=False)
+    category_1_count = Column(Integer, default=0, nullable=False)
+    category_2_count = Column(Integer, default=0, nullable=False)
+    category_3_count = Column(Integer, default=0, nullable=False)
+    category_4_count = Column(Integer, default=0, nullable=False)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<UserStatsRollup(user_id={self.user_id}, period={self.period})>"
@@ -48,6 +48,7 @@ def main():
         print("  - users (Kullanıcı bilgileri)")
         print("  - analyses (Sosyal medya analizleri)")
         print("  - manual_predictions (Manuel tahminler)")
+        print("  - user_stats_rollups (Dashboard özetleri)")
         print()
         print("=" * 60)
         print("Database initialization completed successfully! 🎉")
@@ -0,0 +1,143 @@
+"""Connection pool instrumentation and slow query logging"""
+import threading
+import time
+from sqlalchemy import event, exc
+
+
+class PoolMetrics:
+    """
+    Bir engine'in connection pool istatistikleri.
+    Checkout bekleme süresi, overflow kullanımı, bağlantı yaşı ve timeout'lar.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.engine = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.timeouts = 0
+        self.connections_opened = 0
+        self.peak_overflow = 0
+        self.hold_time_total = 0.0
+        self.hold_time_max = 0.0
+        self.checkins = 0
+        self.connection_age_max = 0.0
+        self.slow_queries = 0
+
+    def record_wait(self, seconds: float, overflow: int) -> None:
+        with self._lock:
+            self.waits += 1
+            self.checkout_wait_total += seconds
+            self.checkout_wait_max = max(self.checkout_wait_max, seconds)
+            self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connections_opened += 1
+
+    def record_checkout(self, age: float = None) -> None:
+        with self._lock:
+            self.checkouts += 1
+            if age is not None:
+                self.connection_age_max = max(self.connection_age_max, age)
+
+    def record_checkin(self, hold_time: float) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.hold_time_total += hold_time
+            self.hold_time_max = max(self.hold_time_max, hold_time)
+
+    def record_slow_query(self) -> None:
+        with self._lock:
+            self.slow_queries += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "checkout_wait_avg_ms": round(self.checkout_wait_total / self.waits * 1000, 3) if self.waits else 0.0,
+                "checkout_wait_max_ms": round(self.checkout_wait_max * 1000, 3),
+                "timeouts": self.timeouts,
+                "connections_opened": self.connections_opened,
+                "peak_overflow": self.peak_overflow,
+                "hold_time_avg_ms": round(self.hold_time_total / self.checkins * 1000, 3) if self.checkins else 0.0,
+                "hold_time_max_ms": round(self.hold_time_max * 1000, 3),
+                "connection_age_max_s": round(self.connection_age_max, 1),
+                "slow_queries": self.slow_queries,
+            }
+        pool = self.engine.pool if self.engine is not None else None
+        if pool is not None and hasattr(pool, "checkedout"):
+            stats.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            })
+        return stats
+
+
+def instrumented_pool_class(pool_cls, metrics: PoolMetrics):
+    """
+    Checkout bekleme süresini ölçen pool alt sınıfı üret.
+    SQLAlchemy'de checkout öncesi event olmadığı için _do_get sarmalanıyor;
+    metrics sınıf özelliği olduğundan dispose()/recreate() sonrası da korunur.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = pool_cls._do_get(self)
+        except exc.TimeoutError:
+            metrics.record_timeout()
+            raise
+        metrics.record_wait(time.perf_counter() - started, max(self.overflow(), 0))
+        return record
+
+    return type(f"Instrumented{pool_cls.__name__}", (pool_cls,), {"_do_get": _do_get})
+
+
+def instrument_engine(sync_engine, metrics: PoolMetrics, slow_query_ms: float = 0) -> None:
+    """Pool event'lerini ve (isteğe bağlı) yavaş sorgu loglamayı bağla"""
+    metrics.engine = sync_engine
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        connection_record.info["connected_at"] = time.monotonic()
+        metrics.record_connect()
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        now = time.monotonic()
+        connection_record.info["checked_out_at"] = now
+        connected_at = connection_record.info.get("connected_at")
+        metrics.record_checkout(now - connected_at if connected_at is not None else None)
+
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            metrics.record_checkin(time.monotonic() - checked_out_at)
+
+    if slow_query_ms and slow_query_ms > 0:
+        threshold = slow_query_ms / 1000
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def _before_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def _after_execute(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get("query_start_time")
+            if not starts:
+                return
+            elapsed = time.perf_counter() - starts.pop()
+            if elapsed >= threshold:
+                metrics.record_slow_query()
+                compact = " ".join(statement.split())
+                print(f"🐢 Slow query [{metrics.name}] {elapsed * 1000:.1f} ms: {compact[:300]}")
@@ -0,0 +1,47 @@
+"""
+Dashboard Rollup Rebuild Script
+user_stats_rollups tablosunu ham analiz ve manuel tahmin kayıtlarından yeniden hesaplar.
+Tutarlılık onarımı veya rollup tablosu eklenmeden önceki veriler için çalıştırın.
+
+Kullanım:
+    python database/rebuild_rollups.py              # Tüm kullanıcılar
+    python database/rebuild_rollups.py <user_id>    # Tek kullanıcı
+"""
+import sys
+import os
+import uuid
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.database import SessionLocal, init_db
+from database.rollups import rebuild_rollups
+
+
+def main():
+    """Main rebuild function"""
+    print("=" * 60)
+    print("Dashboard Rollup Rebuild")
+    print("=" * 60)
+
+    user_id = uuid.UUID(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    # Rollup tablosu yoksa oluştur
+    init_db()
+
+    db = SessionLocal()
+    try:
+        processed = rebuild_rollups(db, user_id=user_id)
+        db.commit()
+        target = f"kullanıcı {user_id}" if user_id else "tüm kullanıcılar"
+        print(f"✓ Rollup'lar yeniden hesaplandı ({target}): {processed} kayıt işlendi")
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Rollup rebuild hatası: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
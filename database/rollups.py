@@ -0,0 +1,169 @@
+"""
+Incrementally maintained per-user dashboard rollups.
+Analysis / ManualPrediction yazan (veya silen) transaction içinde çağrılır,
+böylece istatistik endpoint'leri ham satırları taramadan tek satır okur.
+"""
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from .db_models import Analysis, ManualPrediction, UserStatsRollup
+
+TOTAL_PERIOD = "total"
+
+COUNTER_FIELDS = (
+    "analyses_count", "analysis_comments", "analyzed_users", "flagged_users", "analysis_duration_total",
+    "manual_predictions_count", "manual_comments", "processing_time_total",
+    "category_0_count", "category_1_count", "category_2_count", "category_3_count", "category_4_count",
+)
+
+
+def analysis_deltas(analysis: Analysis) -> Dict[str, float]:
+    """Bir analizin rollup'a katkısı"""
+    deltas = {
+        "analyses_count": 1,
+        "analysis_comments": analysis.total_comments or 0,
+        "analyzed_users": analysis.analyzed_users or 0,
+        "flagged_users": analysis.flagged_users or 0,
+        "analysis_duration_total": analysis.analysis_duration or 0.0,
+    }
+    for comment in analysis.comments or []:
+        category = comment.get("predicted_category_id") if isinstance(comment, dict) else None
+        if category in range(5):
+            key = f"category_{category}_count"
+            deltas[key] = deltas.get(key, 0) + 1
+    return deltas
+
+
+def manual_prediction_deltas(prediction: ManualPrediction) -> Dict[str, float]:
+    """Bir manuel tahminin rollup'a katkısı"""
+    deltas = {
+        "manual_predictions_count": 1,
+        "manual_comments": prediction.total_comments or 0,
+        "processing_time_total": prediction.processing_time or 0.0,
+    }
+    for i in range(5):
+        deltas[f"category_{i}_count"] = getattr(prediction, f"category_{i}_count") or 0
+    return deltas
+
+
+def _new_rollup(user_id, period: str) -> UserStatsRollup:
+    rollup = UserStatsRollup(user_id=user_id, period=period, platform_counts={})
+    for field in COUNTER_FIELDS:
+        setattr(rollup, field, 0)
+    return rollup
+
+
+def _get_or_create_rollup(db: Session, user_id, period: str) -> UserStatsRollup:
+    """Rollup satırını kilitleyerek getir; yoksa oluştur (eşzamanlı insert'e dayanıklı)"""
+    query = select(UserStatsRollup).where(
+        UserStatsRollup.user_id == user_id,
+        UserStatsRollup.period == period
+    ).with_for_update()
+
+    rollup = db.execute(query).scalars().first()
+    if rollup is not None:
+        return rollup
+
+    try:
+        with db.begin_nested():
+            rollup = _new_rollup(user_id, period)
+            db.add(rollup)
+        return rollup
+    except IntegrityError:
+        # Başka bir transaction aynı satırı az önce oluşturdu
+        return db.execute(query).scalars().one()
+
+
+def _apply(db: Session, user_id, created_at: Optional[datetime], deltas: Dict[str, float],
+           platform: Optional[str] = None, sign: int = 1) -> None:
+    day = (created_at or datetime.utcnow()).date().isoformat()
+    for period in (TOTAL_PERIOD, day):
+        rollup = _get_or_create_rollup(db, user_id, period)
+        for field, value in deltas.items():
+            setattr(rollup, field, (getattr(rollup, field) or 0) + sign * value)
+        if platform:
+            platform_counts = dict(rollup.platform_counts or {})
+            platform_counts[platform] = max(platform_counts.get(platform, 0) + sign, 0)
+            if platform_counts[platform] == 0:
+                del platform_counts[platform]
+            rollup.platform_counts = platform_counts
+
+
+def record_analysis(db: Session, analysis: Analysis, sign: int = 1) -> None:
+    """
+    Analizi rollup'a ekle (sign=1) veya çıkar (sign=-1).
+    Analiz ile aynı session/transaction içinde, commit'ten önce çağrılmalı.
+    """
+    if analysis.created_at is None:
+        analysis.created_at = datetime.utcnow()
+    _apply(db, analysis.user_id, analysis.created_at, analysis_deltas(analysis),
+           platform=analysis.platform, sign=sign)
+
+
+def record_manual_prediction(db: Session, prediction: ManualPrediction, sign: int = 1) -> None:
+    """Manuel tahmini rollup'a ekle (sign=1) veya çıkar (sign=-1)."""
+    if prediction.created_at is None:
+        prediction.created_at = datetime.utcnow()
+    _apply(db, prediction.user_id, prediction.created_at, manual_prediction_deltas(prediction), sign=sign)
+
+
+def rollup_summary(rollup: Optional[UserStatsRollup]) -> dict:
+    """Rollup satırını dashboard response formatına çevir"""
+    values = {field: (getattr(rollup, field) or 0) if rollup is not None else 0 for field in COUNTER_FIELDS}
+    analyses_count = values["analyses_count"]
+    manual_count = values["manual_predictions_count"]
+    return {
+        "total_analyses": analyses_count,
+        "total_comments_analyzed": values["analysis_comments"],
+        "total_users_analyzed": values["analyzed_users"],
+        "total_flagged_users": values["flagged_users"],
+        "platform_distribution": dict(rollup.platform_counts or {}) if rollup is not None else {},
+        "avg_analysis_duration": round(values["analysis_duration_total"] / analyses_count, 3) if analyses_count else 0.0,
+        "total_manual_predictions": manual_count,
+        "total_manual_comments": values["manual_comments"],
+        "avg_processing_time": round(values["processing_time_total"] / manual_count, 3) if manual_count else 0.0,
+        "category_distribution": {str(i): values[f"category_{i}_count"] for i in range(5)},
+    }
+
+
+def rebuild_rollups(db: Session, user_id=None) -> int:
+    """
+    Rollup'ları ham Analysis / ManualPrediction satırlarından yeniden hesapla.
+    Tutarlılık onarımı için; çağıran taraf commit etmeli. İşlenen kayıt sayısını döndürür.
+    """
+    delete_query = UserStatsRollup.__table__.delete()
+    analyses_query = select(Analysis)
+    predictions_query = select(ManualPrediction)
+    if user_id is not None:
+        delete_query = delete_query.where(UserStatsRollup.user_id == user_id)
+        analyses_query = analyses_query.where(Analysis.user_id == user_id)
+        predictions_query = predictions_query.where(ManualPrediction.user_id == user_id)
+
+    # Önce bellekte topla, sonra tek seferde yaz
+    rollups: Dict[tuple, UserStatsRollup] = {}
+
+    def accumulate(owner_id, created_at, deltas, platform=None):
+        day = (created_at or datetime.utcnow()).date().isoformat()
+        for period in (TOTAL_PERIOD, day):
+            rollup = rollups.get((owner_id, period))
+            if rollup is None:
+                rollup = rollups[(owner_id, period)] = _new_rollup(owner_id, period)
+            for field, value in deltas.items():
+                setattr(rollup, field, getattr(rollup, field) + value)
+            if platform:
+                rollup.platform_counts[platform] = rollup.platform_counts.get(platform, 0) + 1
+
+    processed = 0
+    for analysis in db.execute(analyses_query.execution_options(yield_per=200)).scalars():
+        accumulate(analysis.user_id, analysis.created_at, analysis_deltas(analysis), analysis.platform)
+        processed += 1
+    for prediction in db.execute(predictions_query.execution_options(yield_per=200)).scalars():
+        accumulate(prediction.user_id, prediction.created_at, manual_prediction_deltas(prediction))
+        processed += 1
+
+    db.execute(delete_query)
+    db.add_all(rollups.values())
+    db.flush()
+    return processed
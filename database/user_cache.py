@@ -0,0 +1,80 @@
+"""In-process cache for authenticated user lookups"""
+import threading
+import time
+from collections import OrderedDict
+from config.settings import USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_SIZE
+
+
+class UserCache:
+    """
+    Kısa ömürlü (TTL) kullanıcı önbelleği.
+    get_current_user her istekte DB'ye gitmesin diye user_id -> User tutar.
+    Kullanıcı güncellendiğinde invalidate() ile açıkça temizlenmeli.
+    """
+
+    def __init__(self, ttl_seconds: float = USER_CACHE_TTL_SECONDS, max_size: int = USER_CACHE_MAX_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, user_id: str):
+        """Return cached user or None (expired entries count as misses)"""
+        if not self.enabled:
+            return None
+        key = str(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user
+
+    def set(self, user_id: str, user) -> None:
+        if not self.enabled:
+            return
+        key = str(user_id)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            if self._entries.pop(str(user_id), None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+# Global user cache instance
+user_cache = UserCache()
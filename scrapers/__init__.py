@@ -1,6 +1,6 @@
 """
 Instagram Comments Scraper Package
 """
-from .instagram_comments_scraper import scrape_instagram_comments
+from .instagram_comments_scraper import scrape_instagram_comments, iter_instagram_comment_batches
 
-__all__ = ['scrape_instagram_comments']
+__all__ = ['scrape_instagram_comments', 'iter_instagram_comment_batches']
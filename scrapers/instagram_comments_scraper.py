@@ -8,6 +8,7 @@ Instagram yorumlarını XPath ile çeken gelişmiş scraper
 
 import time
 import json
+from contextlib import contextmanager
 from pathlib import Path
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -22,17 +23,23 @@ from config.settings import (
     COMMENT_XPATH, USERNAME_XPATH, LOGIN_BUTTON_XPATH, NOT_NOW_BUTTON_XPATH
 )
 from config import DATA_DIR
+from backend.metrics import SCRAPER_PHASE_SECONDS
+from backend.tracing import span
 
-def scrape_instagram_comments(post_url, max_comments=DEFAULT_MAX_COMMENTS, username=None, password=None):
-    """Advanced XPath method ile Instagram yorumlarını çek"""
-    
-    # Use default credentials if not provided
-    username = username or INSTAGRAM_USERNAME
-    password = password or INSTAGRAM_PASSWORD
-    
-    post_owner = None  # Post sahibinin kullanıcı adı
-    
-    # Chrome WebDriver kurulum
+
+@contextmanager
+def _phase(phases, name):
+    """Aşama süresini biriktir ve trace'e span olarak ekle (yield'da beklenen süre dahil edilmez)"""
+    started = time.perf_counter()
+    try:
+        with span(f"scrape.{name}"):
+            yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - started
+
+
+def _create_driver():
+    """Chrome WebDriver kurulum (memory optimize)"""
     chrome_options = ChromeOptions()
     
     # Chrome binary path (Docker için)
@@ -59,184 +66,301 @@ def scrape_instagram_comments(post_url, max_comments=DEFAULT_MAX_COMMENTS, usern
     # Page load strategy
     chrome_options.page_load_strategy = 'eager'  # Don't wait for full page load
     
-    driver = None
+    from selenium.webdriver.chrome.service import Service
+    service = Service()
+    
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    driver.set_page_load_timeout(300)  # 5 dakika (uzun yüklenmeler için)
+    driver.set_script_timeout(300)  # 5 dakika (uzun scriptler için)
+    return driver
+
+
+def _login_via_popup(driver, post_url, username, password):
+    """Popup'tan giriş yap ve post sayfasına geri dön"""
     try:
-        from selenium.webdriver.chrome.service import Service
-        service = Service()
+        # "Giriş yap" butonunu bul ve tıkla
+        login_button = driver.find_element(By.XPATH, LOGIN_BUTTON_XPATH)
+        print("Giris yap popup'i bulundu, giris yapiliyor...")
+        login_button.click()
+        time.sleep(3)
+        
+        # Kullanıcı adı alanını bul ve doldur
+        username_field = driver.find_element(By.CSS_SELECTOR, 'input[name="username"]')
+        username_field.clear()
+        username_field.send_keys(username)
+        time.sleep(2)
+        
+        # Şifre alanını bul ve doldur
+        password_field = driver.find_element(By.CSS_SELECTOR, 'input[name="password"]')
+        password_field.clear()
+        password_field.send_keys(password)
+        time.sleep(2)
+        
+        # Giriş butonuna tıkla
+        submit_button = driver.find_element(By.CSS_SELECTOR, 'button[type="submit"]')
+        submit_button.click()
+        time.sleep(3)  # Azaltıldı: 5→3
         
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        driver.set_page_load_timeout(300)  # 5 dakika (uzun yüklenmeler için)
-        driver.set_script_timeout(300)  # 5 dakika (uzun scriptler için)
+        print("Popup'tan giris yapildi!")
         
-        print(f"Post sayfasina gidiliyor: {post_url}")
+        # Giriş bilgilerini kaydetme uyarısını geç
+        try:
+            not_now_button = driver.find_element(By.XPATH, NOT_NOW_BUTTON_XPATH)
+            print("Giris bilgilerini kaydetme uyarisi bulundu, 'Simdi degil' seciliyor...")
+            not_now_button.click()
+            time.sleep(3)
+        except Exception as e:
+            print(f"Giris bilgilerini kaydetme uyarisi bulunamadi: {e}")
+        
+        # Ana sayfaya yönlendirildikten sonra tekrar post URL'sine git
+        print("Ana sayfaya yonlendirildi, tekrar post sayfasina gidiliyor...")
         driver.get(post_url)
-        time.sleep(2)  # Sayfa yüklenmesini bekle (azaltıldı: 5→2)
+        time.sleep(2)  # Post sayfasının yüklenmesini bekle (azaltıldı: 5→2)
         
-        # Popup'tan giriş yapma
-        if username and password:
-            try:
-                # "Giriş yap" butonunu bul ve tıkla
-                login_button = driver.find_element(By.XPATH, LOGIN_BUTTON_XPATH)
-                print("Giris yap popup'i bulundu, giris yapiliyor...")
-                login_button.click()
-                time.sleep(3)
-                
-                # Kullanıcı adı alanını bul ve doldur
-                username_field = driver.find_element(By.CSS_SELECTOR, 'input[name="username"]')
-                username_field.clear()
-                username_field.send_keys(username)
-                time.sleep(2)
-                
-                # Şifre alanını bul ve doldur
-                password_field = driver.find_element(By.CSS_SELECTOR, 'input[name="password"]')
-                password_field.clear()
-                password_field.send_keys(password)
-                time.sleep(2)
-                
-                # Giriş butonuna tıkla
-                submit_button = driver.find_element(By.CSS_SELECTOR, 'button[type="submit"]')
-                submit_button.click()
-                time.sleep(3)  # Azaltıldı: 5→3
-                
-                print("Popup'tan giris yapildi!")
-                
-                # Giriş bilgilerini kaydetme uyarısını geç
-                try:
-                    not_now_button = driver.find_element(By.XPATH, NOT_NOW_BUTTON_XPATH)
-                    print("Giris bilgilerini kaydetme uyarisi bulundu, 'Simdi degil' seciliyor...")
-                    not_now_button.click()
-                    time.sleep(3)
-                except Exception as e:
-                    print(f"Giris bilgilerini kaydetme uyarisi bulunamadi: {e}")
-                
-                # Ana sayfaya yönlendirildikten sonra tekrar post URL'sine git
-                print("Ana sayfaya yonlendirildi, tekrar post sayfasina gidiliyor...")
-                driver.get(post_url)
-                time.sleep(2)  # Post sayfasının yüklenmesini bekle (azaltıldı: 5→2)
-                
-            except Exception as e:
-                print(f"Popup giris yapilamadi: {e}")
-                pass
+    except Exception as e:
+        print(f"Popup giris yapilamadi: {e}")
+
+
+def _find_post_owner(driver):
+    """Post sahibinin kullanıcı adını al (SCROLL YAPMADAN ÖNCE!)"""
+    post_owner = None
+    try:
+        print("\n" + "="*50)
+        print("POST SAHİBİ ARANIYOR...")
+        print("="*50)
         
-        # Post sahibinin kullanıcı adını al (SCROLL YAPMADAN ÖNCE!)
-        post_owner = None
+        # Yöntem 1: Tüm span'leri tara, username'e benzer olanı bul
         try:
-            print("\n" + "="*50)
-            print("POST SAHİBİ ARANIYOR...")
-            print("="*50)
+            all_spans = driver.find_elements(By.TAG_NAME, 'span')
+            print(f"Toplam {len(all_spans)} span elementi bulundu")
             
-            # Yöntem 1: Tüm span'leri tara, username'e benzer olanı bul
-            try:
-                all_spans = driver.find_elements(By.TAG_NAME, 'span')
-                print(f"Toplam {len(all_spans)} span elementi bulundu")
-                
-                # İlk 30 span'i kontrol et
-                for idx, span in enumerate(all_spans[:30]):
-                    try:
-                        text = span.text.strip()
-                        # Username kriterleri: 3-30 karakter, boşluksuz, özel karakter yok
-                        if (text and 
-                            3 < len(text) < 30 and 
-                            ' ' not in text and 
-                            '\n' not in text and
-                            '?' not in text and
-                            '@' not in text and
-                            not text.isdigit() and
-                            text.lower() not in ['takip', 'following', 'followers', 'posts', 'reels', 'tagged']):
-                            
-                            # Parent'ı kontrol et - header içinde mi?
-                            parent_html = driver.execute_script("return arguments[0].parentElement.parentElement.parentElement.tagName", span)
-                            if parent_html and parent_html.upper() in ['HEADER', 'A', 'DIV']:
-                                post_owner = text
-                                print(f"✓✓✓ Post sahibi BULUNDU (Span #{idx}): {post_owner}")
-                                break
-                    except:
-                        continue
-                        
-                if post_owner:
-                    print(f"✅ SUCCESS: {post_owner}")
-            except Exception as e:
-                print(f"Yöntem 1 başarısız: {e}")
-            
-            # Yöntem 2: Header a tag'lerinin text'lerini kontrol et
-            if not post_owner:
+            # İlk 30 span'i kontrol et
+            for idx, span in enumerate(all_spans[:30]):
                 try:
-                    header_links = driver.find_elements(By.CSS_SELECTOR, 'header a')
-                    print(f"Header'da {len(header_links)} link bulundu")
-                    for idx, link in enumerate(header_links[:10]):
-                        text = link.text.strip()
-                        print(f"  Link {idx} text: '{text}'")
-                        if text and 3 < len(text) < 30 and ' ' not in text and '?' not in text:
+                    text = span.text.strip()
+                    # Username kriterleri: 3-30 karakter, boşluksuz, özel karakter yok
+                    if (text and 
+                        3 < len(text) < 30 and 
+                        ' ' not in text and 
+                        '\n' not in text and
+                        '?' not in text and
+                        '@' not in text and
+                        not text.isdigit() and
+                        text.lower() not in ['takip', 'following', 'followers', 'posts', 'reels', 'tagged']):
+                        
+                        # Parent'ı kontrol et - header içinde mi?
+                        parent_html = driver.execute_script("return arguments[0].parentElement.parentElement.parentElement.tagName", span)
+                        if parent_html and parent_html.upper() in ['HEADER', 'A', 'DIV']:
                             post_owner = text
-                            print(f"✓ Post sahibi (Header Link Text): {post_owner}")
+                            print(f"✓✓✓ Post sahibi BULUNDU (Span #{idx}): {post_owner}")
                             break
-                except Exception as e:
-                    print(f"Yöntem 2 başarısız: {e}")
+                except:
+                    continue
+                    
+            if post_owner:
+                print(f"✅ SUCCESS: {post_owner}")
+        except Exception as e:
+            print(f"Yöntem 1 başarısız: {e}")
+        
+        # Yöntem 2: Header a tag'lerinin text'lerini kontrol et
+        if not post_owner:
+            try:
+                header_links = driver.find_elements(By.CSS_SELECTOR, 'header a')
+                print(f"Header'da {len(header_links)} link bulundu")
+                for idx, link in enumerate(header_links[:10]):
+                    text = link.text.strip()
+                    print(f"  Link {idx} text: '{text}'")
+                    if text and 3 < len(text) < 30 and ' ' not in text and '?' not in text:
+                        post_owner = text
+                        print(f"✓ Post sahibi (Header Link Text): {post_owner}")
+                        break
+            except Exception as e:
+                print(f"Yöntem 2 başarısız: {e}")
+        
+        # Yöntem 3: Article section içindeki ilk birkaç link'in text'i
+        if not post_owner:
+            try:
+                article_links = driver.find_elements(By.CSS_SELECTOR, 'article a')
+                for idx, link in enumerate(article_links[:15]):
+                    text = link.text.strip()
+                    if text and 3 < len(text) < 30 and ' ' not in text and '?' not in text:
+                        post_owner = text
+                        print(f"✓ Post sahibi (Article Link Text): {post_owner}")
+                        break
+            except Exception as e:
+                print(f"Yöntem 3 başarısız: {e}")
+        
+        if not post_owner:
+            print("❌ POST SAHİBİ BULUNAMADI!")
             
-            # Yöntem 3: Article section içindeki ilk birkaç link'in text'i
-            if not post_owner:
-                try:
-                    article_links = driver.find_elements(By.CSS_SELECTOR, 'article a')
-                    for idx, link in enumerate(article_links[:15]):
-                        text = link.text.strip()
-                        if text and 3 < len(text) < 30 and ' ' not in text and '?' not in text:
-                            post_owner = text
-                            print(f"✓ Post sahibi (Article Link Text): {post_owner}")
-                            break
-                except Exception as e:
-                    print(f"Yöntem 3 başarısız: {e}")
+    except Exception as e:
+        print(f"❌ HATA: {e}")
+    
+    print(f"\n{'='*50}")
+    print(f"FINAL POST SAHİBİ: {post_owner}")
+    print("="*50 + "\n")
+    return post_owner
+
+
+def _find_scroll_container(driver, first_comment):
+    """Yorum listesinin scroll container'ını bul"""
+    return driver.execute_script("""
+    let el = arguments[0];
+    function isScrollable(node){
+        const style = window.getComputedStyle(node);
+        const y = style.overflowY;
+        return (y === 'auto' || y === 'scroll') && node.scrollHeight > node.clientHeight;
+    }
+    while (el && el !== document.body){
+        if (isScrollable(el)) return el;
+        el = el.parentElement;
+    }
+    return document.scrollingElement || document.documentElement;
+    """, first_comment)
+
+
+def _extract_author(comment_element, i):
+    """Yorumun kendi container'ından kullanıcı adını bul"""
+    try:
+        # Yorumun üst container'ında kullanıcı adını ara
+        username_element = comment_element.find_element(By.XPATH, "./ancestor::div[contains(@class, '_ae5q') or contains(@class, '_ae5r')]//a[contains(@href,'/')]/span[@class='_ap3a _aaco _aacw _aacx _aad7 _aade']")
+        return username_element.text.strip()
+    except:
+        pass
+    try:
+        # Alternatif yol: yorumun üstündeki a elementinden kullanıcı adını al
+        username_element = comment_element.find_element(By.XPATH, "./ancestor::div[contains(@class, '_ae5q') or contains(@class, '_ae5r')]//a[contains(@href,'/')]//span")
+        return username_element.text.strip()
+    except:
+        pass
+    try:
+        # Başka bir alternatif: yorumun parent'ından kullanıcı adını ara
+        username_element = comment_element.find_element(By.XPATH, "./ancestor::div[1]/preceding-sibling::div//a//span")
+        return username_element.text.strip()
+    except:
+        # Son çare: sıra numarası kullan
+        return f"user_{i+1}"
+
+
+def _format_comment(comment_element, text, i):
+    return {
+        'text': text,  # Sadece başta/sonda boşluk temizlenmiş
+        'author': _extract_author(comment_element, i),
+        'likes': 0,
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'platform': 'instagram',
+        'comment_id': f"xpath_{i+1}"
+    }
+
+
+def iter_instagram_comment_batches(post_url, max_comments=DEFAULT_MAX_COMMENTS, username=None, password=None):
+    """
+    Instagram yorumlarını scroll sırasında parti parti üret (generator).
+    Her scroll'dan sonra yeni yüklenen yorumlar hemen yield edilir; böylece
+    tüketici (sınıflandırma) scraping bitmeden çalışmaya başlayabilir.
+    
+    Yields:
+        {'post_owner': str, 'comments': [...]} - comments boş olabilir (ilk parti)
+    """
+    
+    # Use default credentials if not provided
+    username = username or INSTAGRAM_USERNAME
+    password = password or INSTAGRAM_PASSWORD
+    
+    driver = None
+    # Aşama süreleri (launch, login, scroll, extract) -> /metrics
+    phases = {}
+    try:
+        with _phase(phases, "launch"):
+            driver = _create_driver()
             
-            if not post_owner:
-                print("❌ POST SAHİBİ BULUNAMADI!")
-                
-        except Exception as e:
-            print(f"❌ HATA: {e}")
+            print(f"Post sayfasina gidiliyor: {post_url}")
+            driver.get(post_url)
+            time.sleep(2)  # Sayfa yüklenmesini bekle (azaltıldı: 5→2)
+        
+        # Popup'tan giriş yapma
+        if username and password:
+            with _phase(phases, "login"):
+                _login_via_popup(driver, post_url, username, password)
         
-        print(f"\n{'='*50}")
-        print(f"FINAL POST SAHİBİ: {post_owner}")
-        print("="*50 + "\n")
+        with _phase(phases, "extract"):
+            post_owner = _find_post_owner(driver) or 'unknown'
         
         # XPath ile yorumları bul
         xpath = COMMENT_XPATH
         
         print("XPath ile yorumlar araniyor...")
-        comments = driver.find_elements(By.XPATH, xpath)
+        with _phase(phases, "extract"):
+            comments = driver.find_elements(By.XPATH, xpath)
         
-        if len(comments) > 0:
-            print(f"İlk yorum bulundu, scroll container araniyor...")
-            first_comment = comments[0]
-            
-            # Scroll container'ı bul
-            scroll_container = driver.execute_script("""
-            let el = arguments[0];
-            function isScrollable(node){
-                const style = window.getComputedStyle(node);
-                const y = style.overflowY;
-                return (y === 'auto' || y === 'scroll') && node.scrollHeight > node.clientHeight;
-            }
-            while (el && el !== document.body){
-                if (isScrollable(el)) return el;
-                el = el.parentElement;
-            }
-            return document.scrollingElement || document.documentElement;
-            """, first_comment)
-            
-            print("Scroll container bulundu, yorumlar yukleniyor...")
+        if len(comments) == 0:
+            print("Hic yorum bulunamadi")
+            yield {'post_owner': post_owner, 'comments': []}
+            return
+        
+        print(f"İlk yorum bulundu, scroll container araniyor...")
+        with _phase(phases, "extract"):
+            scroll_container = _find_scroll_container(driver, comments[0])
+        print("Scroll container bulundu, yorumlar yukleniyor...")
+        
+        # Yield edilmiş element sayısı ve üretilen yorum sayısı
+        seen_elements = 0
+        emitted = 0
+        
+        def collect_new():
+            """Yeni yüklenen elementleri formatla"""
+            nonlocal seen_elements, emitted
+            current = driver.find_elements(By.XPATH, xpath)
+            batch = []
+            for i in range(seen_elements, len(current)):
+                if max_comments > 0 and emitted >= max_comments:
+                    break
+                seen_elements = i + 1
+                try:
+                    text = current[i].text.strip()
+                except Exception:
+                    continue
+                if not text:
+                    print(f"Boş yorum atlandı #{i+1}")
+                    continue
+                try:
+                    batch.append(_format_comment(current[i], text, i))
+                except Exception as e:
+                    print(f"Kullanıcı adı bulunamadı yorum {i+1}: {e}")
+                    batch.append({
+                        'text': text,
+                        'author': f"user_{i+1}",
+                        'likes': 0,
+                        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                        'platform': 'instagram',
+                        'comment_id': f"xpath_{i+1}"
+                    })
+                emitted += 1
+            return batch
+        
+        # İlk yüklenen yorumlar scroll beklemeden işlenmeye başlar
+        with _phase(phases, "extract"):
+            batch = collect_new()
+        yield {'post_owner': post_owner, 'comments': batch}
+        
+        # Scroll yaparak daha fazla yorum yükle
+        last_height = 0
+        scroll_attempts = 0
+        max_scroll_attempts = 100  # Daha fazla scroll denemesi
+        start_time = time.time()
+        max_duration = SCROLL_TIMEOUT
+        
+        while scroll_attempts < max_scroll_attempts:
+            if max_comments > 0 and emitted >= max_comments:
+                print(f"İstenen yorum sayısı ({max_comments}) bulundu, scroll durduruluyor...")
+                break
             
-            # Scroll yaparak daha fazla yorum yükle
-            last_height = 0
-            scroll_attempts = 0
-            max_scroll_attempts = 100  # Daha fazla scroll denemesi
-            start_time = time.time()
-            max_duration = SCROLL_TIMEOUT  # 2 dakika
+            elapsed_time = time.time() - start_time
+            if elapsed_time >= max_duration:
+                print(f"Süre doldu, scroll durduruluyor... (Toplam süre: {elapsed_time:.1f} saniye)")
+                break
             
-            while scroll_attempts < max_scroll_attempts:
-                # 2 dakika kontrolü
-                elapsed_time = time.time() - start_time
-                if elapsed_time >= max_duration:
-                    print(f"2 dakika doldu, scroll durduruluyor... (Toplam süre: {elapsed_time:.1f} saniye)")
-                    break
-                
+            with _phase(phases, "scroll"):
                 new_height = driver.execute_script(
                     "return arguments[0].scrollHeight;", scroll_container
                 )
@@ -248,111 +372,31 @@ def scrape_instagram_comments(post_url, max_comments=DEFAULT_MAX_COMMENTS, usern
                 
                 # 3. scroll'dan sonra daha uzun bekleme
                 if scroll_attempts >= 2:
-                    print("3. scroll'dan sonra uzun bekleme...")
-                    time.sleep(LONG_SCROLL_DELAY)  # 10 saniye bekleme
+                    time.sleep(LONG_SCROLL_DELAY)
                 else:
                     time.sleep(SCROLL_DELAY)  # Normal bekleme
-                
-                if new_height == last_height:  # yeni yükleme olmadıysa dur
-                    print("Yeni yorum yuklenmedi, scroll durduruluyor...")
-                    break
-                
-                # Yeterli yorum bulundu mu kontrol et
-                current_comments = driver.find_elements(By.XPATH, xpath)
-                current_texts = [c.text.strip() for c in current_comments if c.text.strip()]
-                
-                if max_comments > 0 and len(current_texts) >= max_comments:
-                    print(f"İstenen yorum sayısı ({max_comments}) bulundu, scroll durduruluyor...")
-                    break
-                
-                last_height = new_height
-                scroll_attempts += 1
-                elapsed_time = time.time() - start_time
-                print(f"Scroll {scroll_attempts}: Yeni yukseklik: {new_height}, Bulunan yorum: {len(current_texts)} (Geçen süre: {elapsed_time:.1f}s)")
-            
-            # Güncel yorumları al
-            comments = driver.find_elements(By.XPATH, xpath)
-            
-            texts = [c.text.strip() for c in comments if c.text.strip()]
-            
-            print(f"Toplam {len(texts)} yorum bulundu")
-            
-            # Eğer max_comments çok küçükse, bulunan yorum sayısını kullan
-            actual_limit = min(len(texts), max_comments) if max_comments > 0 else len(texts)
-            print(f"İşlenecek yorum sayısı: {actual_limit}")
-            
-            # Yorumları formatla - her yorum için kendi container'ından kullanıcı adını al
-            formatted_comments = []
-            empty_count = 0
-            for i, text in enumerate(texts[:actual_limit]):
-                if text and len(text.strip()) > 0:  # Sadece boş olmayanları al
-                    try:
-                        # Her yorum için kendi container'ından kullanıcı adını bul
-                        comment_element = comments[i]
-                        
-                        # Yorumun parent container'ından kullanıcı adını ara
-                        try:
-                            # Yorumun üst container'ında kullanıcı adını ara
-                            username_element = comment_element.find_element(By.XPATH, "./ancestor::div[contains(@class, '_ae5q') or contains(@class, '_ae5r')]//a[contains(@href,'/')]/span[@class='_ap3a _aaco _aacw _aacx _aad7 _aade']")
-                            author_name = username_element.text.strip()
-                        except:
-                            try:
-                                # Alternatif yol: yorumun üstündeki a elementinden kullanıcı adını al
-                                username_element = comment_element.find_element(By.XPATH, "./ancestor::div[contains(@class, '_ae5q') or contains(@class, '_ae5r')]//a[contains(@href,'/')]//span")
-                                author_name = username_element.text.strip()
-                            except:
-                                try:
-                                    # Başka bir alternatif: yorumun parent'ından kullanıcı adını ara
-                                    username_element = comment_element.find_element(By.XPATH, "./ancestor::div[1]/preceding-sibling::div//a//span")
-                                    author_name = username_element.text.strip()
-                                except:
-                                    # Son çare: sıra numarası kullan
-                                    author_name = f"user_{i+1}"
-                        
-                    except Exception as e:
-                        print(f"Kullanıcı adı bulunamadı yorum {i+1}: {e}")
-                        author_name = f"user_{i+1}"
-                    
-                    formatted_comment = {
-                        'text': text.strip(),  # Sadece başta/sonda boşluk temizle
-                        'author': author_name,
-                        'likes': 0,
-                        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                        'platform': 'instagram',
-                        'comment_id': f"xpath_{i+1}"
-                    }
-                    formatted_comments.append(formatted_comment)
-                else:
-                    empty_count += 1
-                    print(f"Boş yorum atlandı #{i+1}: '{text}'")
             
-            print(f"Sonuc: {len(formatted_comments)} yorum cekildi")
-            print(f"Filtrelenen yorum sayısı: {actual_limit - len(formatted_comments)}")
-            print(f"Başarı oranı: {(len(formatted_comments)/actual_limit)*100:.1f}%")
+            # Yeni yüklenen yorumları hemen gönder
+            with _phase(phases, "extract"):
+                batch = collect_new()
+            if batch:
+                yield {'post_owner': post_owner, 'comments': batch}
             
-            # Post sahibi bilgisini ekle
-            result = {
-                'comments': formatted_comments,
-                'post_owner': post_owner,
-                'total_comments': len(formatted_comments)
-            }
+            if new_height == last_height:  # yeni yükleme olmadıysa dur
+                print("Yeni yorum yuklenmedi, scroll durduruluyor...")
+                break
             
-            return result
-        else:
-            print("Hic yorum bulunamadi")
-            return {
-                'comments': [],
-                'post_owner': post_owner or 'unknown',
-                'total_comments': 0
-            }
+            last_height = new_height
+            scroll_attempts += 1
+            elapsed_time = time.time() - start_time
+            print(f"Scroll {scroll_attempts}: Yeni yukseklik: {new_height}, Bulunan yorum: {emitted} (Geçen süre: {elapsed_time:.1f}s)")
+        
+        print(f"Sonuc: {emitted} yorum cekildi")
             
     except Exception as e:
+        # Selenium/giriş hataları tüketiciye ulaşsın (driver finally'de kapatılır)
         print(f"Hata: {e}")
-        return {
-            'comments': [],
-            'post_owner': 'unknown',
-            'total_comments': 0
-        }
+        raise
     finally:
         if driver:
             try:
@@ -360,6 +404,31 @@ def scrape_instagram_comments(post_url, max_comments=DEFAULT_MAX_COMMENTS, usern
                 print("Chrome driver kapatıldı")
             except Exception as e:
                 print(f"Driver kapatma hatası: {e}")
+        for phase, seconds in phases.items():
+            SCRAPER_PHASE_SECONDS.observe(seconds, phase=phase)
+
+
+def scrape_instagram_comments(post_url, max_comments=DEFAULT_MAX_COMMENTS, username=None, password=None):
+    """Advanced XPath method ile Instagram yorumlarını çek (tüm yorumlar tek seferde)"""
+    post_owner = 'unknown'
+    formatted_comments = []
+    try:
+        for batch in iter_instagram_comment_batches(post_url, max_comments, username, password):
+            post_owner = batch['post_owner']
+            formatted_comments.extend(batch['comments'])
+    except Exception:
+        # Eski davranış: hata yazdırıldı, boş sonuç döner
+        return {
+            'comments': [],
+            'post_owner': 'unknown',
+            'total_comments': 0
+        }
+    
+    return {
+        'comments': formatted_comments,
+        'post_owner': post_owner,
+        'total_comments': len(formatted_comments)
+    }
 
 # Test
 if __name__ == "__main__":